@@ -8,6 +8,7 @@ from typing import Literal
 
 from app.config import get_settings
 from app.engines.asset_generator import AssetGenerator
+from app.services.image_cache import get_image_cache
 
 router = APIRouter()
 
@@ -52,6 +53,7 @@ async def generate_character_preview(
         blob.upload_from_string(image_bytes, content_type=file.content_type or "image/jpeg")
         blob.make_public()
         original_url = blob.public_url
+        await get_image_cache().put(original_url, image_bytes)  # character generation reads it next
         
         print(f"   ✅ Original uploaded: {original_url}")
         
@@ -94,6 +96,7 @@ async def generate_character_preview(
         gen_blob.upload_from_string(gen_bytes, content_type="image/png")
         gen_blob.make_public()
         generated_url = gen_blob.public_url
+        await get_image_cache().put(generated_url, gen_bytes)  # re-uploaded when the book starts
         
         print(f"   ✅ Generated uploaded: {generated_url}")
         
@@ -130,6 +133,7 @@ async def upload_image(
         blob = bucket.blob(blob_path)
         blob.upload_from_string(content, content_type=file.content_type or "image/jpeg")
         blob.make_public()
+        await get_image_cache().put(blob.public_url, content)
         
         return {"url": blob.public_url}
         
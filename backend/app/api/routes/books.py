@@ -5,26 +5,47 @@ Async Polling Architecture Refactor.
 """
 
 import asyncio
+import contextlib
+import json
 import os
+import tempfile
+import uuid
 from typing import Optional, Literal
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.config import get_settings
 from app.models.book import (
     BookCreateRequest,
     BookResponse,
+    BookListResponse,
     BookStatusResponse,
     BookStatus,
     BookTheme,
     BookPage,
-    PreviewScene
+    PreviewScene,
+    ImageDerivatives,
+    PipelineStage,
 )
 from app.engines.story_engine import StoryEngine
 from app.engines.image_engine import ImageEngineWithRetry
 from app.engines.asset_generator import AssetGenerator
 from app.engines.pdf_engine import PDFEngine
+from app.engines.mockup_compositor import MockupCompositor
 from app.services.firebase import BookRepository, StorageService
+from app.jobs import (
+    enqueue_job,
+    JOB_GENERATE_CHARACTER,
+    JOB_GENERATE_PREVIEW,
+    JOB_SPECULATE_SCENES,
+    JOB_COMPLETE_BOOK,
+    JOB_PRIORITY_LOW,
+)
+from app.jobs.worker import is_final_attempt
+from app.services.rate_limiter import rate_limit_tenant, rate_limit_priority, PRIORITY_LOW
+from app.services.speculation import SpeculativeSceneStore
+from app.services.progress import get_progress_broker, STATUS_MESSAGES, FINAL_STATUSES
+from app.services.pipeline_timing import StageTimings
 
 
 router = APIRouter()
@@ -32,6 +53,53 @@ router = APIRouter()
 # Number of preview images to generate
 PREVIEW_IMAGE_COUNT = 4
 
+# Scenes generated for the preview, and the ones generated after payment
+KEY_SCENES = [0, 1, 7, 13]
+REMAINING_SCENES = [2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+
+
+async def _store_scene(
+    repo: BookRepository,
+    storage: StorageService,
+    book_id: str,
+    scene_number: int,
+    image_url: str,
+) -> str:
+    """
+    Copy a generated scene into Storage (provider URLs expire) and checkpoint it.
+    Returns the stored URL, or the provider URL if the copy failed.
+    """
+    try:
+        stored_url = await storage.upload_from_url(book_id, image_url, f"scene_{scene_number}.jpg")
+    except Exception as e:
+        print(f"   ⚠️ Could not store scene {scene_number}: {e}")
+        return image_url
+    await repo.save_checkpoint(book_id, "scenes", scene_number, stored_url)
+    return stored_url
+
+
+async def _preview_derivatives(
+    storage: StorageService,
+    book_id: str,
+    scene_id: int,
+    image_url: str,
+) -> Optional[ImageDerivatives]:
+    """Responsive sizes of a preview image; None if disabled or they could not be made."""
+    if not get_settings().image_derivatives_enabled:
+        return None
+    try:
+        content = await storage.images.get(image_url)
+        return await storage.upload_derivatives(book_id, content, f"preview_{scene_id}", image_url)
+    except Exception as e:
+        print(f"   ⚠️ No derivatives for preview {scene_id}: {e}")
+        return None
+
+
+async def _gather_stores(stores: dict[int, asyncio.Task]) -> dict[int, str]:
+    """Wait for background _store_scene tasks; returns scene_number -> URL."""
+    urls = await asyncio.gather(*stores.values())
+    return dict(zip(stores, urls))
+
 
 # Use AssetGenerator directly since WithRetry might be legacy/broken for NanoBanana
 # Use AssetGenerator directly since WithRetry might be legacy/broken for NanoBanana
@@ -46,12 +114,14 @@ async def generate_character_task(
     """
     Background Task 1: Generate Character Portrait from Photo.
     """
+    rate_limit_tenant.set(book_id)  # fair share of provider quotas per book
     settings = get_settings()
     repo = BookRepository()
     storage = StorageService()
     
     try:
-        await repo.update_status(book_id, BookStatus.CREATING_CHARACTER, 10)
+        async with repo.unit_of_work(book_id) as work:
+            work.set_status(BookStatus.CREATING_CHARACTER, 10)
         print(f"🚀 [Book {book_id}] Starting Character Generation...")
         print(f"   📝 child_name: {child_name}")
         print(f"   📝 theme: {theme}")
@@ -60,6 +130,9 @@ async def generate_character_task(
         print(f"   📝 approved_character_url: {approved_character_url[:50] if approved_character_url else 'None'}...")
         
         final_char_url = None
+        # Every generation gets its own portrait URL, which keys the preview
+        # job (see approve_book) and never hits a stale cached copy
+        portrait_id = f"{book_id}_{uuid.uuid4().hex[:8]}"
 
         # OPTIMIZED FLOW: Use pre-generated character if available
         if approved_character_url:
@@ -67,18 +140,12 @@ async def generate_character_task(
              
              # Re-upload to books/ folder to ensure consistent public access
              # The previews/ URL might have caching or ACL issues with Replicate
-             import httpx
+             # (usually an image cache hit: the wizard uploaded it on this node)
              try:
-                 async with httpx.AsyncClient(timeout=30.0) as client:
-                     resp = await client.get(approved_character_url)
-                     if resp.status_code == 200:
-                         file_content = resp.content
-                         filename = f"character_portrait_{book_id}.png"
-                         final_char_url = await storage.upload_image(book_id, file_content, filename, content_type="image/png")
-                         print(f"   📤 Re-uploaded to books/ folder: {final_char_url}")
-                     else:
-                         print(f"   ⚠️ Failed to download approved char ({resp.status_code}), using original URL")
-                         final_char_url = approved_character_url
+                 file_content = await storage.images.get(approved_character_url)
+                 filename = f"character_portrait_{portrait_id}.png"
+                 final_char_url = await storage.upload_image(book_id, file_content, filename, content_type="image/png")
+                 print(f"   📤 Re-uploaded to books/ folder: {final_char_url}")
              except Exception as e:
                  print(f"   ⚠️ Re-upload failed: {e}, using original URL")
                  final_char_url = approved_character_url
@@ -109,7 +176,7 @@ async def generate_character_task(
                 with open(local_path, "rb") as f:
                     file_content = f.read()
                     
-                filename = f"character_portrait_{book_id}.jpg"
+                filename = f"character_portrait_{portrait_id}.jpg"
                 final_char_url = await storage.upload_image(book_id, file_content, filename)
                 
                 # Clean up temp file
@@ -130,34 +197,38 @@ async def generate_character_task(
         except Exception as e:
              print(f"   ⚠️ Analysis failed, using fallback: {e}")
 
-        # Update DB with the public URL and the REAL consistency string
-        await repo.update_character_data(book_id, master_url=final_char_url, consistency_str=consistency_str)
-        
-        # Explicitly update character_image_url field for the frontend
-        repo.db.collection("books").document(book_id).update({
-            "character_image_url": final_char_url,
-            "master_character_url": final_char_url
-        })
+        # One write: the public URL, the REAL consistency string, the
+        # character_image_url for the frontend and (manual flow) the new status
+        async with repo.unit_of_work(book_id) as work:
+            work.set_character_data(final_char_url, consistency_str)
+            work.set_character_image(final_char_url)
+            if not approved_character_url:
+                work.set_status(BookStatus.WAITING_FOR_APPROVAL, 50)
 
         if approved_character_url:
             # AUTO-APPROVE if we already had a preview the user liked in the wizard
             print(f"✅ Auto-approving character and starting preview... {final_char_url}")
-            await generate_preview_task(
-                book_id=book_id,
-                child_name=child_name,
-                theme=theme,
-                style=style,
-                approved_portrait_url=final_char_url
+            await enqueue_job(
+                JOB_GENERATE_PREVIEW,
+                {
+                    "book_id": book_id,
+                    "child_name": child_name,
+                    "theme": theme,
+                    "style": style,
+                    "approved_portrait_url": final_char_url,
+                },
+                idempotency_key=f"preview:{book_id}:{final_char_url}",
             )
         else:
-            await repo.update_status(book_id, BookStatus.WAITING_FOR_APPROVAL, 50)
             print(f"✅ Character Ready for Approval (Manual): {final_char_url}")
 
     except Exception as e:
         print(f"❌ Error generating character {book_id}: {e}")
         import traceback
         traceback.print_exc()
-        await repo.update_status(book_id, BookStatus.FAILED, 0)
+        if not is_final_attempt():
+            raise  # the job worker retries with backoff
+        await repo.mark_failed(book_id, PipelineStage.CHARACTER)
 
 
 async def generate_preview_task(
@@ -170,44 +241,51 @@ async def generate_preview_task(
     """
     Background Task 2: Generate Optimized Story Preview (4 Scenes + Mockups).
     """
+    rate_limit_tenant.set(book_id)  # fair share of provider quotas per book
     settings = get_settings()
     repo = BookRepository()
     storage = StorageService()
     
     try:
-        await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 60)
+        async with repo.unit_of_work(book_id) as work:
+            work.set_status(BookStatus.GENERATING_PREVIEW, 60)
         print(f"🚀 [Book {book_id}] Starting Preview Generation (Phase 2)...")
         print(f"   📝 Child: {child_name}, Theme: {theme}, Style: {style}")
         print(f"   📷 Character URL: {approved_portrait_url[:50]}...")
         
-        # 1. Generate Story
-        print(f"   [Step 1/4] Generating Story...")
-        await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 15, message="Erdenke Abenteuer... ✍️")
-        story_engine = StoryEngine(settings)
-        
-        # Fetch book to get consistency string
-        book = await repo.get_book(book_id)
+        # Fetch book to get consistency string and the steps a previous attempt finished
+        book = await repo.get_book(book_id, use_cache=False)
         character_desc_simple = book.consistency_string or f"cute 6 year old child named {child_name}"
+        checkpoints = book.checkpoints
+        story_engine = StoryEngine(settings)
         
-        # Assuming minimal implementation of story generation
-        story = await story_engine.generate_story(
-            name=child_name,
-            theme=theme,
-            age=6, # Default
-            style=style,
-            character_description=character_desc_simple
-        )
-        print(f"   [Step 1/4] ✅ Story generated: {story.title} ({len(story.scenes)} scenes)")
-        await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 30, message="Schreibe die Geschichte... 📖")
-        
-        # Save pages
-        print(f"   [Step 2/4] Saving pages...")
-        pages = story_engine.story_to_compact_pages(story)
-        await repo.update_pages(book_id, pages)
-        print(f"   [Step 2/4] ✅ {len(pages)} pages saved")
+        # 1. Generate Story (checkpoint: book.story)
+        story = StoryEngine.story_from_dict(book.story)
+        if story is not None:
+            print(f"   [Step 1/4] ⏩ Reusing story from previous attempt: {story.title}")
+        else:
+            print(f"   [Step 1/4] Generating Story...")
+            await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 15, message="Erdenke Abenteuer... ✍️")
+            
+            # Assuming minimal implementation of story generation
+            story = await story_engine.generate_story(
+                name=child_name,
+                theme=theme,
+                age=6, # Default
+                style=style,
+                character_description=character_desc_simple
+            )
+            print(f"   [Step 1/4] ✅ Story generated: {story.title} ({len(story.scenes)} scenes)")
+            
+            # Save story + pages (the paid path reuses the stored story)
+            print(f"   [Step 2/4] Saving story and pages...")
+            pages = story_engine.story_to_compact_pages(story)
+            async with repo.unit_of_work(book_id) as work:
+                work.set_story(story_engine.story_to_dict(story), pages)
+                work.set_status(BookStatus.GENERATING_PREVIEW, 30, message="Schreibe die Geschichte... 📖")
+            print(f"   [Step 2/4] ✅ {len(pages)} pages saved ({story.template_version})")
         
-        # 2. Generate Key Scenes
-        KEY_SCENES = [0, 1, 7, 13]
+        # 2. Key Scenes and Mockups
         print(f"   [Step 3/4] Initializing Image Engine...")
         image_engine = ImageEngineWithRetry(settings)
         
@@ -220,142 +298,325 @@ async def generate_preview_task(
         # Use AI-powered mockup engine with detailed prompts
         from app.engines.ai_mockup_engine_v3 import AIMockupEngineV3
         mockup_engine = AIMockupEngineV3(settings)
+        compositor = MockupCompositor(images=storage.images)
         
-        print(f"   [Step 3/4] 🎨 Generating {len(KEY_SCENES)} KEY scenes with FLUX...")
-        await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 35, message="Skizziere Szenen... 🎨")
-        
-        generated_images = await image_engine.generate_scenes_with_character_asset(
-            story=story,
-            character_asset_url=approved_portrait_url,
-            child_name=child_name,
-            theme=theme,
-            scene_numbers=KEY_SCENES,
-            features_description=character_desc_simple,
-        )
-        print(f"   [Step 3/4] ✅ Generated {len(generated_images)} images")
-        await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 45, message="Male Illustrationen... 🖌️")
-        
-        # 3. Create AI-Powered Mockups
-        print(f"   [Step 4/4] 📖 Creating AI-powered mockups...")
-        preview_scenes = []
-        preview_image_urls = []
+        raw_image_map = {n: url for n, url in checkpoints.scene_urls().items() if n in KEY_SCENES}
+        mockup_map = checkpoints.mockup_urls()
+        scene_texts = {s.scene_number: s.narration_text or "" for s in story.scenes}
+        preview_scenes = {
+            i: PreviewScene(scene_id=i, status="generating" if i in KEY_SCENES else "locked")
+            for i in range(14)  # 0 (Cover) + 13 Story Scenes
+        }
         
-        raw_image_map = {img.scene_number: img.image_url for img in generated_images}
+        # Scenes -> mockups as a streaming pipeline: each stored scene is queued
+        # for the mockup workers while the others still generate. The bounded
+        # queue holds generation back when mockups fall behind. With
+        # PREVIEW_STREAMING_ENABLED off, all scenes finish first (barrier flow).
+        streaming = settings.preview_streaming_enabled
+        timings = StageTimings("preview" if streaming else "preview_barrier")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.preview_mockup_queue_size if streaming else 0)
+        mockup_workers = max(1, settings.preview_mockup_workers)
+        landed_lock = asyncio.Lock()
+        landed = 0
         
-        for i in range(14): # 0 (Cover) + 13 Story Scenes
-            is_key = i in KEY_SCENES
-            status = "unlocked" if is_key else "locked"
-            mockup_url = None
+        async def produce_scenes():
+            """Stage 1: queue (scene_number, pending store or None) for every key scene."""
+            timings.begin("scenes")
+            missing_scenes = [n for n in KEY_SCENES if n not in raw_image_map]
+            if len(missing_scenes) < len(KEY_SCENES):
+                print(f"   [Step 3/4] ⏩ Reusing {len(KEY_SCENES) - len(missing_scenes)} scenes from previous attempt")
+            for n in KEY_SCENES:
+                if n in raw_image_map:
+                    await queue.put((n, None))
             
-            if is_key:
-                # 1. Check if raw image exists
-                raw_url = raw_image_map.get(i)
-                if raw_url:
-                    print(f"🔍 DEBUG BOOKS: Creating Mockup for Scene {i}")
-                    
-                    # 2. Get story text (only for internal pages)
-                    scene_text = ""
-                    if i > 0:
-                        scene_data = next((s for s in story.scenes if s.scene_number == i), None)
-                        if scene_data:
-                            scene_text = scene_data.narration_text or ""
-                    
+            if missing_scenes:
+                print(f"   [Step 3/4] 🎨 Generating {len(missing_scenes)} KEY scenes with FLUX...")
+                await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, 35, message="Skizziere Szenen... 🎨")
+                stores = []
+                async for image in image_engine.iter_scenes_with_character_asset(
+                    story=story,
+                    character_asset_url=approved_portrait_url,
+                    child_name=child_name,
+                    theme=theme,
+                    scene_numbers=missing_scenes,
+                    features_description=character_desc_simple,
+                ):
+                    if image.image_url:
+                        timings.mark("first_scene")
+                        # The copy into Storage runs ahead; the mockup worker waits for it
+                        store = asyncio.create_task(_store_scene(
+                            repo, storage, book_id, image.scene_number, image.image_url
+                        ))
+                        stores.append(store)
+                        await queue.put((image.scene_number, store))
+                await asyncio.gather(*stores)
+            timings.end("scenes")
+            for _ in range(mockup_workers):
+                await queue.put(None)
+        
+        async def render_mockup(i: int) -> tuple[str, Optional[ImageDerivatives]]:
+            raw_url = raw_image_map[i]
+            if mockup_map.get(i):
+                mockup_url = mockup_map[i]
+                print(f"   ⏩ Mockup {i} reused from previous attempt")
+            else:
+                mode = settings.preview_mockup_modes.get(i, settings.preview_mockup_mode)
+                print(f"🔍 DEBUG BOOKS: Creating Mockup for Scene {i} ({mode})")
+                mockup_bytes = None
+                if mode == "ai":
                     try:
-                        # 3. Use AI mockup engine
                         mockup_bytes = await mockup_engine.create_mockup(
                             scene_image_url=raw_url,
                             scene_number=i,
                             book_title=story.title if i == 0 else None,
-                            story_text=scene_text if i > 0 else None,
+                            story_text=scene_texts.get(i, "") if i > 0 else None,
                             theme=theme if i == 0 else None,
                             child_name=child_name if i == 0 else None,
                             character_reference_url=approved_portrait_url if i == 0 else None,
                         )
-                        
-                        if mockup_bytes:
-                            filename = f"mockup_scene_{i}.jpg"
-                            mockup_url = await storage.upload_image(book_id, mockup_bytes, filename, content_type="image/jpeg")
-                            print(f"   ✅ Mockup {i} uploaded")
-                        else:
-                            mockup_url = raw_url # Fallback to raw
-                            print(f"   ⚠️ Mockup {i} failed, using raw fallback")
                     except Exception as e:
                         print(f"   ❌ Mockup {i} error: {e}")
-                        mockup_url = raw_url # Fallback to raw
-                else:
-                    print(f"   ⚠️ Raw image MISSING for key scene {i}")
-                    mockup_url = "" # Placeholder to keep index consistent
-                
-                # 4. ALWAYS append for key scenes in order [0, 1, 7, 13]
-                preview_image_urls.append(mockup_url)
+                if not mockup_bytes:
+                    # Local compositor: the fast path, and the fallback for AI mockups
+                    mockup_bytes = await compositor.create_mockup(
+                        raw_url, i, story_text=scene_texts.get(i, "") if i > 0 else None
+                    )
                 
-                # Update progress
-                current_progress = 45 + (len(preview_image_urls) * 12)
-                await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, min(current_progress, 95), message=f"Vorschau {len(preview_image_urls)}/4 bereit... ✨")
-
-            preview_scenes.append(PreviewScene(
-                scene_id=i,
-                status=status,
-                image_url=mockup_url,
-                thumbnail_url=mockup_url 
-            ))
-
-        await repo.update_preview_scenes(
-            book_id=book_id,
-            preview_scenes=[s.dict() for s in preview_scenes],
-            preview_images=preview_image_urls
-        )
+                if mockup_bytes:
+                    mockup_url = await storage.upload_image(book_id, mockup_bytes, f"mockup_scene_{i}.jpg", content_type="image/jpeg")
+                    await repo.save_checkpoint(book_id, "mockups", i, mockup_url)
+                    print(f"   ✅ Mockup {i} uploaded")
+                else:
+                    mockup_url = raw_url # Fallback to raw
+                    print(f"   ⚠️ Mockup {i} failed, using raw fallback")
+            
+            # Thumbnail/medium/full sizes for the preview pages
+            derivatives = await _preview_derivatives(storage, book_id, i, mockup_url) if mockup_url else None
+            return mockup_url, derivatives
+        
+        async def land(i: int, mockup_url: str, derivatives: Optional[ImageDerivatives]):
+            """Show a finished key scene right away (one write per mockup, in order)."""
+            nonlocal landed
+            async with landed_lock:
+                landed += 1
+                preview_scenes[i] = PreviewScene(
+                    scene_id=i,
+                    status="unlocked",
+                    image_url=mockup_url,
+                    thumbnail_url=derivatives.thumb.jpeg if derivatives else mockup_url,
+                    derivatives=derivatives,
+                )
+                # preview_images stays in KEY_SCENES order, "" until a mockup lands
+                preview_image_urls = [preview_scenes[n].image_url or "" for n in KEY_SCENES]
+                async with repo.unit_of_work(book_id) as work:
+                    work.set_preview_scenes([s.model_dump() for s in preview_scenes.values()], preview_image_urls)
+                    if landed == len(KEY_SCENES):
+                        work.set_status(BookStatus.READY_FOR_PURCHASE, 100)
+                    else:
+                        work.set_status(
+                            BookStatus.GENERATING_PREVIEW, min(45 + landed * 12, 95),
+                            message=f"Vorschau {landed}/{len(KEY_SCENES)} bereit... ✨",
+                        )
         
-        await repo.update_status(book_id, BookStatus.READY_FOR_PURCHASE, 100)
+        async def mockup_worker():
+            """Stage 2: mockup, upload and derivatives of each queued scene."""
+            while (item := await queue.get()) is not None:
+                i, store = item
+                if store is not None:
+                    raw_image_map[i] = await store
+                timings.begin("mockups")
+                mockup_url, derivatives = await render_mockup(i)
+                timings.end("mockups")
+                timings.mark("first_mockup")
+                await land(i, mockup_url, derivatives)
+        
+        # Checkpoints: one per stored scene and one per uploaded mockup.
+        # Gemini calls share the provider limiter.
+        print(f"   [Step 3/4] 🎨 Key scenes -> [Step 4/4] 📖 mockups ({'streaming' if streaming else 'barrier'})")
+        tasks = [asyncio.create_task(produce_scenes())]
+        try:
+            if not streaming:
+                await tasks[0]
+            tasks += [asyncio.create_task(mockup_worker()) for _ in range(mockup_workers)]
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        missing_scenes = [n for n in KEY_SCENES if n not in raw_image_map]
+        if missing_scenes and not is_final_attempt():
+            # Finished scenes and mockups are checkpointed for the retry
+            raise Exception(f"Key scenes failed: {missing_scenes}")
+        for n in missing_scenes:
+            print(f"   ⚠️ Raw image MISSING for key scene {n}")
+            await land(n, "", None)  # placeholder keeps preview_images in order
+        timings.finish()
         print(f"🎉 Preview Ready for Purchase!")
         
     except Exception as e:
         print(f"❌ Error generating preview {book_id}: {e}")
         import traceback
         traceback.print_exc()
-        await repo.update_status(book_id, BookStatus.FAILED, 0)
+        if not is_final_attempt():
+            raise  # the job worker retries with backoff
+        await repo.mark_failed(book_id, PipelineStage.PREVIEW)
+        return
+    
+    if settings.speculative_generation_enabled:
+        await enqueue_job(
+            JOB_SPECULATE_SCENES,
+            {"book_id": book_id},
+            priority=JOB_PRIORITY_LOW,
+            idempotency_key=f"speculate:{book_id}",
+        )
+
+
+async def speculate_remaining_scenes_task(book_id: str):
+    """
+    Background Task 2b (opt-in): Generate the remaining scenes at low priority
+    while the user views the preview. complete_book_task reuses them after payment.
+    """
+    settings = get_settings()
+    rate_limit_tenant.set(book_id)
+    priority_token = rate_limit_priority.set(PRIORITY_LOW)
+    repo = BookRepository()
+    store = SpeculativeSceneStore(settings)
+    
+    try:
+        book = await repo.get_book(book_id, use_cache=False)
+        if not book or book.status != BookStatus.READY_FOR_PURCHASE:
+            return
+        story = StoryEngine.story_from_dict(book.story)
+        char_url = book.character_image_url or book.master_character_url
+        if story is None or not char_url:
+            return
+        
+        scenes = [n for n in REMAINING_SCENES if f"scene_{n}" not in book.speculative_scenes]
+        budget_day = store.budget_day()
+        granted = await store.reserve_budget(book.user_id, len(scenes), budget_day)
+        if not granted:
+            print(f"💸 [Book {book_id}] Speculative budget used up for user {book.user_id}")
+            return
+        scenes = scenes[:granted]
+        print(f"🔮 [Book {book_id}] Speculatively generating {len(scenes)} scenes...")
+        
+        image_engine = ImageEngineWithRetry(settings)
+        finished = 0
+        generated = image_engine.iter_scenes_with_character_asset(
+            story=story,
+            character_asset_url=char_url,
+            child_name=book.child_name,
+            theme=book.theme,
+            scene_numbers=scenes,
+            features_description=book.consistency_string,
+            max_in_flight=settings.speculative_max_concurrency,
+        )
+        try:
+            # aclosing: leaving the loop early cancels the scenes still in flight
+            # right away instead of whenever the generator is garbage collected
+            async with contextlib.aclosing(generated):
+                async for image in generated:
+                    finished += 1
+                    stored = None
+                    if image.image_url:
+                        stored = await store.store_scene(book_id, image.scene_number, image.image_url)
+                
+                    # Stop once the book was paid (or abandoned); the paid path takes over
+                    if stored is None:
+                        current = await repo.get_book(book_id, use_cache=False)
+                        if not current or current.status != BookStatus.READY_FOR_PURCHASE:
+                            print(f"   ⏹️ Book {book_id} left preview, stopping speculation")
+                            break
+        finally:
+            # Scenes not generated (finished early, failed or cancelled) go back to the budget
+            await store.release_budget(book.user_id, len(scenes) - finished, budget_day)
+        
+        print(f"🔮 [Book {book_id}] Speculation done ({finished}/{len(scenes)} scenes)")
+    
+    except Exception as e:
+        # Speculation is best effort and must never fail the book
+        print(f"⚠️ Speculative generation for {book_id} failed: {e}")
+    finally:
+        rate_limit_priority.reset(priority_token)
 
 
 async def complete_book_task(book_id: str):
     """
     Background Task 3: Complete Book (Remaining Scenes + PDF).
     """
+    rate_limit_tenant.set(book_id)  # fair share of provider quotas per book
     settings = get_settings()
     repo = BookRepository()
     storage = StorageService()
     
     try:
-        book = await repo.get_book(book_id)
+        book = await repo.get_book(book_id, use_cache=False)
         if not book: return
         
-        await repo.update_status(book_id, BookStatus.PAID_PROCESSING_FULL, 10)
+        # Upload checkpoint: a previous attempt already finished the PDF
+        if book.pdf_url:
+            print(f"   ⏩ PDF already uploaded for {book_id}")
+            async with repo.unit_of_work(book_id) as work:
+                work.set_status(BookStatus.COMPLETED, 100)
+            return
+        
+        async with repo.unit_of_work(book_id) as work:
+            work.set_status(BookStatus.PAID_PROCESSING_FULL, 10)
         
         story_engine = StoryEngine(settings)
         image_engine = ImageEngineWithRetry(settings)
+        pages = book.pages
         
-        # Re-generate story object from engine (or we could store it in DB as JSON)
-        story = await story_engine.generate_story(
-            name=book.child_name, 
-            theme=book.theme, 
-            age=6, 
-            style=book.style,
-            character_description=book.consistency_string or f"child named {book.child_name}"
-        )
+        # Load the story compiled during preview; only books created before
+        # stories were persisted need to regenerate it
+        story = StoryEngine.story_from_dict(book.story)
+        if story is None:
+            print(f"   ⚠️ No stored story for {book_id}, regenerating...")
+            story = await story_engine.generate_story(
+                name=book.child_name, 
+                theme=book.theme, 
+                age=6, 
+                style=book.style,
+                character_description=book.consistency_string or f"child named {book.child_name}"
+            )
+            pages = pages or story_engine.story_to_compact_pages(story)
+            await repo.save_story(book_id, story_engine.story_to_dict(story), pages)
         
-        # Original logic: Sc 0, 1, 7, 13 done.
-        remaining_scenes = [2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
+        # Scenes stored by the preview or a previous attempt are reused, as are
+        # the ones generated speculatively. Only what is still missing is generated.
+        image_map = book.checkpoints.scene_urls()
+        claimed = await SpeculativeSceneStore(settings).claim_scenes(book_id)
+        if claimed:
+            print(f"   ♻️ Reusing {len(claimed)} speculative scenes")
+            async with repo.unit_of_work(book_id) as work:
+                for scene_number, url in claimed.items():
+                    work.save_checkpoint("scenes", scene_number, url)
+            image_map.update(claimed)
+        remaining_scenes = [n for n in REMAINING_SCENES if n not in image_map]
+        if len(remaining_scenes) < len(REMAINING_SCENES):
+            print(f"   ⏩ {len(REMAINING_SCENES) - len(remaining_scenes)}/{len(REMAINING_SCENES)} scenes already done")
         
-        generated_images = await image_engine.generate_scenes_with_character_asset(
-            story=story,
-            character_asset_url=book.character_image_url or book.master_character_url,
-            child_name=book.child_name,
-            theme=book.theme,
-            scene_numbers=remaining_scenes,
-            features_description=book.consistency_string or f"child named {book.child_name}",
-        )
+        if remaining_scenes:
+            stores = {}
+            async for image in image_engine.iter_scenes_with_character_asset(
+                story=story,
+                character_asset_url=book.character_image_url or book.master_character_url,
+                child_name=book.child_name,
+                theme=book.theme,
+                scene_numbers=remaining_scenes,
+                features_description=book.consistency_string or f"child named {book.child_name}",
+            ):
+                if image.image_url:
+                    stores[image.scene_number] = asyncio.create_task(_store_scene(
+                        repo, storage, book_id, image.scene_number, image.image_url
+                    ))
+            image_map.update(await _gather_stores(stores))
         
-        image_map = {img.scene_number: img.image_url for img in generated_images}
-        pages = book.pages
+        missing_scenes = [n for n in REMAINING_SCENES if n not in image_map]
+        if missing_scenes:
+            if not is_final_attempt():
+                raise Exception(f"Scenes failed: {missing_scenes}")
+            print(f"   ⚠️ Finishing without scenes {missing_scenes}")
         
         for page in pages:
             # Simple mapping: Page 1,2 -> Scene 1. Page 3,4 -> Scene 2.
@@ -365,31 +626,32 @@ async def complete_book_task(book_id: str):
         
         await repo.update_pages(book_id, pages)
         
-        # Create PDF
+        # Create PDF (inner pages only, the cover is printed separately).
+        # Rendered to disk and streamed to Storage: it never sits in memory whole
         pdf_engine = PDFEngine()
-        pdf_content = await pdf_engine.generate_inner_pdf(
-            story.scenes, 
-            book.child_name, 
-            story.title
-        )
-        pdf_url = await storage.upload_pdf(book_id, pdf_content)
-        await repo.set_pdf_url(book_id, pdf_url)
-        
-        await repo.update_status(book_id, BookStatus.COMPLETED, 100)
+        with tempfile.TemporaryDirectory(prefix="bookloo-book-") as workdir:
+            pdf_path = await pdf_engine.generate_inner_pdf(
+                [s for s in story.scenes if s.scene_number > 0],
+                book.child_name, 
+                story.title,
+                image_urls=image_map,
+                output_path=os.path.join(workdir, "book.pdf"),
+            )
+            pdf_url = await storage.upload_pdf_file(book_id, pdf_path)
+        await repo.set_pdf_url(book_id, pdf_url)  # also sets COMPLETED
         print(f"✅ Book {book_id} Completed!")
 
     except Exception as e:
         print(f"❌ Error completing book {book_id}: {e}")
-        await repo.update_status(book_id, BookStatus.FAILED, 0)
+        if not is_final_attempt():
+            raise  # the job worker retries with backoff
+        await repo.mark_failed(book_id, PipelineStage.COMPLETE)
 
 
 # ================= API ENDPOINTS =================
 
 @router.post("/init", response_model=BookStatusResponse)
-async def init_book(
-    request: BookCreateRequest,
-    background_tasks: BackgroundTasks,
-):
+async def init_book(request: BookCreateRequest):
     """
     Step 1: Initialize Book & Start Character Generation.
     Takes Photo + Name + Theme.
@@ -406,15 +668,17 @@ async def init_book(
         child_photo_url=request.child_photo_url,
     )
     
-    # Start Background Task 1: Generate Character
-    background_tasks.add_task(
-        generate_character_task,
-        book_id=book_id,
-        child_name=request.child_name,
-        theme=request.theme,
-        style=request.style or "pixar_3d",
-        child_photo_url=request.child_photo_url,
-        approved_character_url=request.approved_character_url, # Pass pre-approved URL
+    # Queue Job 1: Generate Character
+    await enqueue_job(
+        JOB_GENERATE_CHARACTER,
+        {
+            "book_id": book_id,
+            "child_name": request.child_name,
+            "theme": request.theme,
+            "style": request.style or "pixar_3d",
+            "child_photo_url": request.child_photo_url,
+            "approved_character_url": request.approved_character_url, # Pass pre-approved URL
+        },
     )
     
     return BookStatusResponse(
@@ -425,7 +689,7 @@ async def init_book(
     )
 
 @router.post("/{book_id}/approve", response_model=BookStatusResponse)
-async def approve_book(book_id: str, background_tasks: BackgroundTasks):
+async def approve_book(book_id: str):
     """
     Step 2: Approve Character & Start Preview Generation.
     """
@@ -453,13 +717,19 @@ async def approve_book(book_id: str, background_tasks: BackgroundTasks):
     if not char_url:
         raise HTTPException(status_code=500, detail="Character URL missing")
         
-    background_tasks.add_task(
-        generate_preview_task,
-        book_id=book_id,
-        child_name=book.child_name,
-        theme=book.theme,
-        style=book.style,
-        approved_portrait_url=char_url
+    # Keyed on the character so double clicks queue one preview, but a
+    # regenerated character (new portrait file, see generate_character_task)
+    # gets its own
+    await enqueue_job(
+        JOB_GENERATE_PREVIEW,
+        {
+            "book_id": book_id,
+            "child_name": book.child_name,
+            "theme": book.theme,
+            "style": book.style,
+            "approved_portrait_url": char_url,
+        },
+        idempotency_key=f"preview:{book_id}:{char_url}",
     )
     
     return BookStatusResponse(
@@ -470,7 +740,7 @@ async def approve_book(book_id: str, background_tasks: BackgroundTasks):
     )
 
 @router.post("/{book_id}/regenerate", response_model=BookStatusResponse)
-async def regenerate_character(book_id: str, background_tasks: BackgroundTasks):
+async def regenerate_character(book_id: str):
     """
     Step 2 (Alternative): Reject current character and regenerate a new one.
     Resets the book status and starts character generation again.
@@ -488,18 +758,22 @@ async def regenerate_character(book_id: str, background_tasks: BackgroundTasks):
             detail=f"Cannot regenerate character in status: {book.status}"
         )
     
-    # Reset status to creating character
-    await repo.update_status(book_id, BookStatus.CREATING_CHARACTER, 0)
+    # Reset status to creating character; story and scenes belong to the old character
+    async with repo.unit_of_work(book_id) as work:
+        work.clear_checkpoints()
+        work.set_status(BookStatus.CREATING_CHARACTER, 0)
     
     # Start character generation again
-    background_tasks.add_task(
-        generate_character_task,
-        book_id=book_id,
-        child_name=book.child_name,
-        theme=book.theme,
-        style=book.style,
-        child_photo_url=book.child_photo_url if hasattr(book, 'child_photo_url') and book.child_photo_url else "",
-        approved_character_url=None,  # Force regeneration
+    await enqueue_job(
+        JOB_GENERATE_CHARACTER,
+        {
+            "book_id": book_id,
+            "child_name": book.child_name,
+            "theme": book.theme,
+            "style": book.style,
+            "child_photo_url": book.child_photo_url if hasattr(book, 'child_photo_url') and book.child_photo_url else "",
+            "approved_character_url": None,  # Force regeneration
+        },
     )
     
     return BookStatusResponse(
@@ -509,12 +783,81 @@ async def regenerate_character(book_id: str, background_tasks: BackgroundTasks):
         message="Generiere neuen Charakter... ✨"
     )
 
-@router.get("/my-books", response_model=list[BookResponse])
-async def get_my_books(user_id: str):
-    """List all books for a user."""
+@router.post("/{book_id}/retry", response_model=BookStatusResponse)
+async def retry_book(book_id: str):
+    """
+    Retry a failed book from where it stopped.
+    Finished steps (story, scenes, mockups, PDF) are kept and not generated again.
+    """
+    repo = BookRepository()
+    book = await repo.get_book(book_id)
+    
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    if book.status != BookStatus.FAILED:
+        raise HTTPException(status_code=400, detail=f"Only failed books can be retried (status: {book.status})")
+    
+    char_url = book.character_image_url or book.master_character_url
+    stage = book.checkpoints.failed_stage or (PipelineStage.PREVIEW if char_url else PipelineStage.CHARACTER)
+    # Double clicks see the same failure and queue one retry
+    retry_key = f"{book_id}:retry:{int(book.updated_at.timestamp())}"
+    
+    if stage == PipelineStage.COMPLETE:
+        status, message = BookStatus.PAID_PROCESSING_FULL, "Erstelle ganzes Buch... 📖"
+        async with repo.unit_of_work(book_id) as work:
+            work.set_status(status, 0)
+        await enqueue_job(JOB_COMPLETE_BOOK, {"book_id": book_id}, idempotency_key=f"complete:{retry_key}")
+    elif stage == PipelineStage.PREVIEW and char_url:
+        status, message = BookStatus.GENERATING_PREVIEW, "Erstelle Vorschau-Szenen... 📚"
+        async with repo.unit_of_work(book_id) as work:
+            work.set_status(status, 0)
+        await enqueue_job(
+            JOB_GENERATE_PREVIEW,
+            {
+                "book_id": book_id,
+                "child_name": book.child_name,
+                "theme": book.theme,
+                "style": book.style,
+                "approved_portrait_url": char_url,
+            },
+            idempotency_key=f"preview:{retry_key}",
+        )
+    else:
+        status, message = BookStatus.CREATING_CHARACTER, "Zaubere Charakter... ✨"
+        async with repo.unit_of_work(book_id) as work:
+            work.set_status(status, 0)
+        await enqueue_job(
+            JOB_GENERATE_CHARACTER,
+            {
+                "book_id": book_id,
+                "child_name": book.child_name,
+                "theme": book.theme,
+                "style": book.style,
+                "child_photo_url": book.child_photo_url or "",
+                "approved_character_url": None,
+            },
+            idempotency_key=f"character:{retry_key}",
+        )
+    
+    print(f"🔁 [Book {book_id}] Retrying {stage.value} stage")
+    return BookStatusResponse(id=book_id, status=status, progress=0, message=message)
+
+@router.get("/my-books", response_model=BookListResponse)
+async def get_my_books(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    start_after: Optional[str] = None,
+):
+    """
+    List a user's books, newest first, as summaries (full book: GET /{book_id}).
+    Pass `next_cursor` as `start_after` to get the next page.
+    """
     repo = BookRepository()
-    books = await repo.get_user_books(user_id)
-    return books
+    try:
+        books, next_cursor = await repo.list_user_books(user_id, limit=limit, start_after=start_after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return BookListResponse(books=books, next_cursor=next_cursor)
 
 @router.get("/{book_id}/status", response_model=BookStatusResponse)
 async def get_book_status(book_id: str):
@@ -522,30 +865,65 @@ async def get_book_status(book_id: str):
     repo = BookRepository()
     book = await repo.get_book(book_id)
     if not book: raise HTTPException(status_code=404)
+    return _status_response(book)
+
+
+@router.get("/{book_id}/events")
+async def stream_book_events(book_id: str, request: Request):
+    """
+    Server-Sent Events stream of the book's status (same payload as /status).
+    Sends the current state first, then every change; ends when the book is
+    completed or failed. Clients that cannot use SSE keep polling /status.
+    """
+    settings = get_settings()
+    repo = BookRepository()
+    if not await repo.get_book(book_id):
+        raise HTTPException(status_code=404)
     
-    msg_map = {
-        BookStatus.CREATING_CHARACTER: "Zaubere Charakter... ✨",
-        BookStatus.WAITING_FOR_APPROVAL: "Bitte Charakter prüfen! 👀",
-        BookStatus.GENERATING_PREVIEW: "Erstelle Vorschau... 🎨",
-        BookStatus.READY_FOR_PURCHASE: "Vorschau bereit! 🔓",
-        BookStatus.PAID_PROCESSING_FULL: "Erstelle ganzes Buch... 📖",
-        BookStatus.COMPLETED: "Fertig! 🎉",
-        BookStatus.FAILED: "Fehler aufgetreten."
-    }
+    async def events():
+        async with get_progress_broker().subscribe(book_id) as subscription:
+            # Read after subscribing so no update falls in between
+            book = await repo.get_book(book_id)
+            if not book:
+                return
+            state = _status_response(book).model_dump(mode="json")
+            yield _sse(state)
+            
+            while BookStatus(state["status"]) not in FINAL_STATUSES:
+                if await request.is_disconnected():
+                    break
+                update = await subscription.next(timeout=settings.progress_keepalive_seconds)
+                if update is None:
+                    yield ": keepalive\n\n"
+                    continue
+                state.update(update)
+                yield _sse(state)
     
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _status_response(book: BookResponse) -> BookStatusResponse:
     return BookStatusResponse(
-        id=book_id,
+        id=book.id,
         status=book.status,
         progress=book.progress,
-        message=msg_map.get(book.status, "Lade..."),
+        message=STATUS_MESSAGES.get(book.status, "Lade..."),
         character_image_url=book.character_image_url,
         preview_scenes=book.preview_scenes,
         preview_images=book.preview_images,
         pdf_url=book.pdf_url
     )
 
+
+def _sse(state: dict) -> str:
+    return f"event: status\ndata: {json.dumps(state)}\n\n"
+
 @router.post("/{book_id}/purchase")
-async def purchase_book(book_id: str, background_tasks: BackgroundTasks):
+async def purchase_book(book_id: str):
     """Complete purchase."""
     repo = BookRepository()
     book = await repo.get_book(book_id)
@@ -556,7 +934,8 @@ async def purchase_book(book_id: str, background_tasks: BackgroundTasks):
              return {"message": "Bereits fertig."}
          raise HTTPException(400, f"Not ready. Status: {book.status}")
     
-    background_tasks.add_task(complete_book_task, book_id=book_id)
+    # Same key as the Stripe webhook: the book is only completed once
+    await enqueue_job(JOB_COMPLETE_BOOK, {"book_id": book_id}, idempotency_key=f"complete:{book_id}")
     return {"message": "Zahlung erfolgreich. Buch wird generiert."}
     
 @router.get("/{book_id}", response_model=BookResponse)
@@ -566,14 +945,16 @@ async def get_book_details(book_id: str):
     if not book: raise HTTPException(404)
     return book
 
-@router.get("/user/{user_id}", response_model=list[BookResponse])
-async def get_user_books(user_id: str):
+@router.get("/user/{user_id}", response_model=BookListResponse)
+async def get_user_books(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    start_after: Optional[str] = None,
+):
     """
-    Get all books for a specific user.
+    Get a user's books (same as /my-books, paginated summaries).
     """
-    repo = BookRepository()
-    books = await repo.get_user_books(user_id)
-    return books
+    return await get_my_books(user_id, limit=limit, start_after=start_after)
 
 @router.get("/{book_id}/download")
 async def download_book(book_id: str):
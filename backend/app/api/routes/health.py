@@ -4,6 +4,19 @@ Health Check Endpoint
 
 from fastapi import APIRouter
 
+from app.jobs.worker import job_worker_stats
+from app.services.asset_registry import asset_registry_stats
+from app.services.book_cache import book_cache_stats
+from app.services.db_executor import db_executor_stats
+from app.services.gemini import gemini_stats
+from app.services.http_client import http_client_stats
+from app.services.image_cache import image_cache_stats
+from app.services.pipeline_timing import pipeline_timing_stats
+from app.services.progress import progress_stats
+from app.services.status_writer import status_writer_stats
+from app.services.storage_uploads import storage_upload_stats
+from app.services.rate_limiter import rate_limiter_stats
+
 router = APIRouter()
 
 
@@ -15,3 +28,22 @@ async def health_check():
         "service": "storybook-ai-backend",
         "version": "1.0.0"
     }
+
+
+@router.get("/metrics")
+async def metrics():
+    """Runtime metrics for load testing and capacity planning."""
+    return {
+        "rate_limiters": rate_limiter_stats(),
+        "job_workers": job_worker_stats(),
+        "http_client": http_client_stats(),
+        "image_cache": image_cache_stats(),
+        "progress_stream": progress_stats(),
+        "status_writes": status_writer_stats(),
+        "firestore_executor": db_executor_stats(),
+        "book_cache": book_cache_stats(),
+        "storage_uploads": storage_upload_stats(),
+        "pipeline_timings": pipeline_timing_stats(),
+        "asset_registry": asset_registry_stats(),
+        "gemini": gemini_stats(),
+    }
@@ -3,14 +3,14 @@ Storybook.ai - Stripe Webhook Handler
 Processes payment confirmation and triggers full book generation.
 """
 
-from fastapi import APIRouter, Request, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Request, HTTPException
 import stripe
 import logging
 
 from app.config import get_settings
 from app.services.firebase import BookRepository
 from app.models.book import BookStatus
-from app.api.routes.books import complete_book_task
+from app.jobs import enqueue_job, JOB_COMPLETE_BOOK
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,7 +18,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/stripe")
-async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
+async def stripe_webhook(request: Request):
     """
     POST /api/webhook/stripe
     Stripe Webhook handler for checkout.session.completed
@@ -63,22 +63,24 @@ async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
             
             # 4. Status Update (Firestore)
             # Setze status auf paid_processing (PAID_PROCESSING_FULL)
-            await repo.update_status(book_id, BookStatus.PAID_PROCESSING_FULL, 10)
+            # (not for redelivered events of books that are already done)
+            book = await repo.get_book(book_id, use_cache=False)
+            if book and book.status == BookStatus.COMPLETED:
+                logger.info(f"🔁 Book {book_id} already completed, ignoring event {event['id']}")
+                return {"status": "success"}
+            async with repo.unit_of_work(book_id) as work:
+                work.set_status(BookStatus.PAID_PROCESSING_FULL, 10)
             
-            # 5. TRIGGER (Async)
-            # Rufe die Funktion generate_remaining_scenes (complete_book_task) auf
-            background_tasks.add_task(generate_remaining_scenes, book_id)
-            logger.info(f"🚀 Triggered full generation for {book_id}")
+            # 5. TRIGGER (Job Queue)
+            # Stripe retries deliveries (and /purchase may fire too): the
+            # idempotency key makes sure the book is only generated once
+            job = await enqueue_job(
+                JOB_COMPLETE_BOOK,
+                {"book_id": book_id},
+                idempotency_key=f"complete:{book_id}",
+            )
+            logger.info(f"🚀 Queued full generation for {book_id} (event {event['id']}, job {job.id})")
         else:
             logger.warning("⚠️ No book_id found in session metadata")
 
     return {"status": "success"}
-
-
-async def generate_remaining_scenes(book_id: str):
-    """
-    Wrapper for complete_book_task to follow requested naming convention.
-    Generates missing scenes and creates final PDF.
-    """
-    logger.info(f"🛠️ Starting generate_remaining_scenes for {book_id}")
-    await complete_book_task(book_id)
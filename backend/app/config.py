@@ -43,6 +43,106 @@ class Settings(BaseSettings):
     book_pages: int = 32
     image_style: str = "whimsical children's book illustration, watercolor style, warm colors, friendly characters"
     
+    # Scene Scheduling (concurrent Kontext calls)
+    scene_max_concurrency: int = 4
+    
+    # Provider Rate Limits (shared by all engines in the process, 0 = unlimited)
+    replicate_requests_per_minute: int = 60
+    gemini_requests_per_minute: int = 30
+    openai_requests_per_minute: int = 60
+    rate_limit_burst: int = 2
+    
+    # Speculative Generation (remaining scenes rendered while the user views the preview)
+    speculative_generation_enabled: bool = False
+    speculative_max_concurrency: int = 1
+    speculative_ttl_hours: int = 48
+    speculative_scene_cost_cents: int = 4
+    speculative_daily_budget_cents_per_user: int = 80
+    speculative_gc_interval_minutes: int = 60
+
+    # Shared HTTP Client (engine downloads/uploads)
+    http_enable_http2: bool = True
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_max_per_host: int = 16
+    http_timeout_seconds: float = 60.0
+    http_connect_timeout_seconds: float = 10.0
+
+    # Image Cache (scene/mockup/PDF reuse of downloaded images)
+    image_cache_enabled: bool = True
+    image_cache_dir: str = "/tmp/bookloo-image-cache"
+    image_cache_memory_mb: int = 256
+    image_cache_disk_mb: int = 2048
+
+    # Asset Registry (decoded mockup templates/style references, warmed at startup)
+    asset_registry_max_mb: int = 256  # decoded pixels kept in memory, 0 = keep nothing
+    asset_registry_max_edge: int = 1536  # longest side kept, larger assets are downscaled
+
+    # PDF Rendering
+    pdf_image_prefetch_concurrency: int = 8
+    render_pool_workers: int = 2  # processes for image decode / PDF builds
+    render_job_timeout_seconds: int = 120
+
+    # Preview Pipeline (key scenes stream into mockup workers)
+    preview_streaming_enabled: bool = True  # False = all scenes first, then mockups
+    preview_mockup_workers: int = 4
+    preview_mockup_queue_size: int = 2  # stored scenes waiting for a mockup worker
+    # Mockup per key scene: "ai" (Gemini, local compositor if it fails) or
+    # "local" (compositor only, no external call). Overrides per scene number,
+    # e.g. PREVIEW_MOCKUP_MODES='{"1": "local", "7": "local"}'
+    preview_mockup_mode: str = "ai"  # ai | local
+    preview_mockup_modes: dict[int, str] = {}
+
+    # Image Derivatives (thumb/medium/full WebP + JPEG of preview images for clients)
+    image_derivatives_enabled: bool = True
+
+    # Gemini (one shared client, blocking SDK calls run on a dedicated thread pool)
+    gemini_executor_workers: int = 8
+    gemini_retry_base_seconds: float = 2.0  # backoff doubles per attempt, with jitter
+    gemini_retry_max_seconds: float = 20.0
+
+    # Firestore (blocking SDK calls run on a dedicated thread pool)
+    firestore_executor_workers: int = 16
+
+    # Cloud Storage (blocking uploads run on a dedicated thread pool)
+    storage_upload_concurrency: int = 8
+    storage_upload_chunk_mb: int = 8  # resumable upload chunk (PDFs)
+    # True when the bucket is public by IAM policy (uniform bucket-level access):
+    # objects are then uploaded without a publicRead ACL
+    storage_public_bucket: bool = False
+
+    # Book Cache (get_book read-through cache)
+    book_cache_enabled: bool = True
+    book_cache_ttl_seconds: float = 5.0
+    book_cache_max_entries: int = 2000
+    # auto = Firestore listener unless every job runs in this process
+    book_cache_listener: str = "auto"  # auto | always | never
+    book_cache_listener_window_minutes: int = 60
+
+    # Status Writes (progress updates coalesced per book, 0 = write every update)
+    status_flush_interval_ms: int = 1000
+
+    # Progress Stream (SSE /events)
+    # auto = Firestore listener unless every job runs in this process
+    progress_listener: str = "auto"  # auto | always | never
+    progress_keepalive_seconds: float = 15.0
+
+    # Job Queue (book pipelines)
+    # memory = in-process only; sqlite/firestore allow separate worker processes
+    job_backend: str = "memory"  # memory | sqlite | firestore
+    job_sqlite_path: str = "./jobs.db"
+    job_lease_seconds: int = 120
+    job_heartbeat_seconds: int = 30
+    job_max_attempts: int = 3
+    job_retry_base_seconds: int = 30
+    job_retry_max_seconds: int = 600
+
+    # Job Workers
+    worker_concurrency: int = 4
+    worker_poll_seconds: float = 1.0
+    run_embedded_worker: bool = True  # disable when running `python -m app.worker` separately
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -12,10 +12,12 @@ from typing import Optional
 from io import BytesIO
 
 from PIL import Image
-from google import genai
 from google.genai import types
 
 from app.config import Settings, get_settings
+from app.services import gemini
+from app.services.http_client import HttpClientRegistry, get_http_client
+from app.services.image_cache import ImageCache, get_image_cache
 
 
 class AIMockupEngine:
@@ -39,9 +41,18 @@ class AIMockupEngine:
         13: "open_book_clean.png",    # Scene 13 -> clean background
     }
     
-    def __init__(self, settings: Optional[Settings] = None):
+    GEMINI_MODEL = "models/gemini-2.5-flash-image"
+    
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        http: Optional[HttpClientRegistry] = None,
+        images: Optional[ImageCache] = None,
+    ):
         self.settings = settings or get_settings()
         self.api_key = self.settings.gemini_api_key
+        self.http = http or get_http_client()
+        self.images = images or get_image_cache()
         
     async def create_mockup(
         self,
@@ -60,7 +71,6 @@ class AIMockupEngine:
         Returns:
             JPEG bytes of the mockup image, or None if failed
         """
-        import httpx
         import asyncio
         
         # Get template for this scene
@@ -75,12 +85,11 @@ class AIMockupEngine:
         
         try:
             # Download the scene image
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.get(scene_image_url)
-                if resp.status_code != 200:
-                    print(f"   ⚠️ Failed to download scene image: {resp.status_code}")
-                    return None
-                scene_bytes = resp.content
+            try:
+                scene_bytes = await self.images.get(scene_image_url)
+            except Exception as e:
+                print(f"   ⚠️ Failed to download scene image: {e}")
+                return None
                 
             # Load both images
             template_image = Image.open(template_path)
@@ -112,84 +121,75 @@ class AIMockupEngine:
         """
         Use Gemini 2.5 Flash to composite the scene onto the template.
         """
-        import asyncio
-        
-        loop = asyncio.get_event_loop()
-        
-        def run_sync():
-            client = genai.Client(api_key=self.api_key)
-            
-            # Create the prompt based on mockup type
-            if is_cover:
-                prompt = (
-                    f"Edit this image: Take the book illustration from the second image "
-                    f"and place it as the cover artwork on the closed book in the first image. "
-                    f"Make it look like a real printed hardcover book with the illustration as the cover. "
-                    f"Keep the wooden floor background. Make it photorealistic. "
-                    f"The result should look like a professional product photo of a children's book."
-                )
-            else:
-                prompt = (
-                    f"Edit this image: Take the illustration from the second image "
-                    f"and place it on the right page of the open book in the first image. "
-                    f"The left page should remain blank or have subtle text lines. "
-                    f"Make it look like a real printed children's book with the illustration on the page. "
-                    f"Keep the background setting (toys, carpet, etc). Make it photorealistic. "
-                    f"The result should look like a professional product photo."
-                )
-            
-            # Safety settings to allow children's content
-            safety_settings = [
-                types.SafetySetting(
-                    category="HARM_CATEGORY_HARASSMENT",
-                    threshold="BLOCK_ONLY_HIGH"
-                ),
-                types.SafetySetting(
-                    category="HARM_CATEGORY_HATE_SPEECH",
-                    threshold="BLOCK_ONLY_HIGH"
-                ),
-                types.SafetySetting(
-                    category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    threshold="BLOCK_ONLY_HIGH"
-                ),
-                types.SafetySetting(
-                    category="HARM_CATEGORY_DANGEROUS_CONTENT",
-                    threshold="BLOCK_ONLY_HIGH"
-                ),
-            ]
-            
-            print(f"   🎨 Calling Gemini 2.5 Flash for mockup generation...")
-            
-            try:
-                response = client.models.generate_content(
-                    model="models/gemini-2.5-flash-image",
-                    contents=[template_image, scene_image, prompt],
-                    config=types.GenerateContentConfig(
-                        safety_settings=safety_settings,
-                        response_modalities=["image", "text"],
-                    )
+        # Create the prompt based on mockup type
+        if is_cover:
+            prompt = (
+                f"Edit this image: Take the book illustration from the second image "
+                f"and place it as the cover artwork on the closed book in the first image. "
+                f"Make it look like a real printed hardcover book with the illustration as the cover. "
+                f"Keep the wooden floor background. Make it photorealistic. "
+                f"The result should look like a professional product photo of a children's book."
+            )
+        else:
+            prompt = (
+                f"Edit this image: Take the illustration from the second image "
+                f"and place it on the right page of the open book in the first image. "
+                f"The left page should remain blank or have subtle text lines. "
+                f"Make it look like a real printed children's book with the illustration on the page. "
+                f"Keep the background setting (toys, carpet, etc). Make it photorealistic. "
+                f"The result should look like a professional product photo."
+            )
+
+        # Safety settings to allow children's content
+        safety_settings = [
+            types.SafetySetting(
+                category="HARM_CATEGORY_HARASSMENT",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+            types.SafetySetting(
+                category="HARM_CATEGORY_HATE_SPEECH",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+            types.SafetySetting(
+                category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+            types.SafetySetting(
+                category="HARM_CATEGORY_DANGEROUS_CONTENT",
+                threshold="BLOCK_ONLY_HIGH"
+            ),
+        ]
+
+        print(f"   🎨 Calling Gemini 2.5 Flash for mockup generation...")
+
+        try:
+            response = await gemini.generate_content(
+                model=self.GEMINI_MODEL,
+                contents=[template_image, scene_image, prompt],
+                config=types.GenerateContentConfig(
+                    safety_settings=safety_settings,
+                    response_modalities=["image", "text"],
                 )
-                
-                # Extract image from response
-                if response.candidates:
-                    for candidate in response.candidates:
-                        if candidate.content and candidate.content.parts:
-                            for part in candidate.content.parts:
-                                if hasattr(part, 'inline_data') and part.inline_data:
-                                    image_data = part.inline_data.data
-                                    if isinstance(image_data, str):
-                                        image_data = base64.b64decode(image_data)
-                                    print(f"   ✅ Mockup generated successfully!")
-                                    return image_data
-                
-                print(f"   ⚠️ No image in response")
-                return None
-                
-            except Exception as e:
-                print(f"   ❌ Gemini API error: {e}")
-                return None
-        
-        return await loop.run_in_executor(None, run_sync)
+            )
+
+            # Extract image from response
+            if response.candidates:
+                for candidate in response.candidates:
+                    if candidate.content and candidate.content.parts:
+                        for part in candidate.content.parts:
+                            if hasattr(part, 'inline_data') and part.inline_data:
+                                image_data = part.inline_data.data
+                                if isinstance(image_data, str):
+                                    image_data = base64.b64decode(image_data)
+                                print(f"   ✅ Mockup generated successfully!")
+                                return image_data
+
+            print(f"   ⚠️ No image in response")
+            return None
+
+        except Exception as e:
+            print(f"   ❌ Gemini API error: {e}")
+            return None
     
     async def create_all_mockups(
         self,
@@ -10,12 +10,13 @@ from pathlib import Path
 from typing import Optional
 from io import BytesIO
 
-import httpx
 from PIL import Image
-from google import genai
 from google.genai import types
 
 from app.config import Settings, get_settings
+from app.services import gemini
+from app.services.image_cache import ImageCache, get_image_cache
+from app.services.asset_registry import AssetRegistry, get_asset_registry
 
 
 class AIMockupEngineV3:
@@ -53,22 +54,29 @@ class AIMockupEngineV3:
         "clean": "https://storage.googleapis.com/bookloo-assets/style_refs/inside_clean_ref.jpg",
     }
     
-    def __init__(self, settings: Optional[Settings] = None):
+    GEMINI_MODEL = "models/gemini-2.5-flash-image"
+    
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        images: Optional[ImageCache] = None,
+        assets: Optional[AssetRegistry] = None,
+    ):
         self.settings = settings or get_settings()
         self.api_key = self.settings.gemini_api_key
-    
-    def _get_cover_style_ref(self, theme: str = "") -> Optional[Image.Image]:
-        """Load a cover style reference image based on theme."""
-        ref_name = self.COVER_STYLE_REFS.get(theme.lower(), self.COVER_STYLE_REFS["default"])
-        ref_path = self.COVER_REFS_DIR / ref_name
-        if ref_path.exists():
-            return Image.open(ref_path)
-        return None
-        
-    def _get_style_ref_by_name(self, name: str) -> Optional[str]:
-        """Get the URL for an inside page style reference."""
-        return self.INSIDE_STYLE_REFS.get(name)
-    
+        self.images = images or get_image_cache()
+        self.assets = assets or get_asset_registry()
+        self.assets.register(self.asset_sources())
+
+    @classmethod
+    def asset_sources(cls) -> dict[str, str]:
+        """Templates and style references, by asset registry key."""
+        sources = {f"template:{name}": str(cls.ASSETS_DIR / name) for name in cls.TEMPLATES.values()}
+        sources["template:open_book_clean.png"] = str(cls.ASSETS_DIR / "open_book_clean.png")
+        sources.update({f"cover:{name}": str(cls.COVER_REFS_DIR / name) for name in cls.COVER_STYLE_REFS.values()})
+        sources.update({f"style:{name}": url for name, url in cls.INSIDE_STYLE_REFS.items()})
+        return sources
+
     def _get_cover_prompt(self, theme: str = "", book_title: str = "", child_name: str = "") -> str:
         """Professional product photography prompt for CLOSED BOOK with Title and immersive surroundings."""
         title_to_print = book_title or f"{child_name}s Abenteuer" if child_name else "Ein großes Abenteuer"
@@ -219,40 +227,34 @@ TYPOGRAPHY REQUIREMENTS (LEFT PAGE):
         
         # Get template for this scene
         template_name = self.TEMPLATES.get(scene_number, "open_book_clean.png")
-        template_path = self.ASSETS_DIR / template_name
+        # Decoded once per process; shared between mockups, so never modified
+        template_image = await self.assets.get(f"template:{template_name}")
         
-        if not template_path.exists():
-            print(f"   ⚠️ Template not found: {template_path}")
+        if template_image is None:
+            print(f"   ⚠️ Template not found: {self.ASSETS_DIR / template_name}")
             return None
             
         print(f"🔍 DEBUG Mockup Engine: scene_number={scene_number}, template={template_name}")
         
         try:
             # 1. Download Scene/Cover Artwork
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                resp = await client.get(scene_image_url)
-                if resp.status_code != 200:
-                    print(f"   ⚠️ Failed to download scene image: {resp.status_code}")
-                    return None
-                scene_bytes = resp.content
+            try:
+                scene_bytes = await self.images.get(scene_image_url)
+            except Exception as e:
+                print(f"   ⚠️ Failed to download scene image: {e}")
+                return None
                 
             # 2. Load Images
-            template_image = Image.open(template_path)
             scene_image = Image.open(BytesIO(scene_bytes))
             
-            # 3. Handle Style References (Download if URL)
+            # 3. Handle Style References (from the asset registry)
             style_ref_image = None
             if scene_number > 0:
                 style_ref_name = "nursery" if template_name == "open_book_nursery.png" else \
                                  "carpet" if template_name == "open_book_carpet.png" else "clean"
-                style_ref_url = self._get_style_ref_by_name(style_ref_name)
-                
-                if style_ref_url:
-                    print(f"   🎨 Downloading style reference: {style_ref_name}")
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        s_resp = await client.get(style_ref_url)
-                        if s_resp.status_code == 200:
-                            style_ref_image = Image.open(BytesIO(s_resp.content))
+                style_ref_image = await self.assets.get(f"style:{style_ref_name}")
+                if style_ref_image is None:
+                    print(f"   ⚠️ Style reference unavailable: {style_ref_name}")
             
             # 4. Determine Prompt & Style Reference
             if scene_number == 0:
@@ -299,61 +301,49 @@ TYPOGRAPHY REQUIREMENTS (LEFT PAGE):
         """Call Gemini 2.5 Flash to generate the mockup."""
         import asyncio
         
-        loop = asyncio.get_event_loop()
+        # Safety settings - Relaxed to avoid false positives on book covers
+        safety_settings = [
+            types.SafetySetting(category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"),
+            types.SafetySetting(category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"),
+            types.SafetySetting(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="BLOCK_NONE"),
+            types.SafetySetting(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="BLOCK_NONE"),
+        ]
         
-        def run_sync():
-            client = genai.Client(api_key=self.api_key)
-            
-            # Safety settings - Relaxed to avoid false positives on book covers
-            safety_settings = [
-                types.SafetySetting(category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"),
-                types.SafetySetting(category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"),
-                types.SafetySetting(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="BLOCK_NONE"),
-                types.SafetySetting(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="BLOCK_NONE"),
-            ]
-            
-            # Build contents list
-            contents = [template_image, scene_image]
-            if style_ref is not None: contents.append(style_ref)
-            if char_ref is not None: contents.append(char_ref)
-            contents.append(prompt)
-            
-            max_attempts = 3
-            for attempt in range(max_attempts):
-                try:
-                    print(f"   🎨 Calling Gemini 2.5 Flash for mockup [Attempt {attempt+1}/{max_attempts}]...")
-                    response = client.models.generate_content(
-                        model="models/gemini-2.5-flash-image",
-                        contents=contents,
-                        config=types.GenerateContentConfig(
-                            safety_settings=safety_settings,
-                            response_modalities=["image", "text"],
-                        )
+        # Build contents list
+        contents = [template_image, scene_image]
+        if style_ref is not None: contents.append(style_ref)
+        if char_ref is not None: contents.append(char_ref)
+        contents.append(prompt)
+        
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                print(f"   🎨 Calling Gemini 2.5 Flash for mockup [Attempt {attempt+1}/{max_attempts}]...")
+                response = await gemini.generate_content(
+                    model=self.GEMINI_MODEL,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        safety_settings=safety_settings,
+                        response_modalities=["image", "text"],
                     )
+                )
+                
+                if response.candidates:
+                    for candidate in response.candidates:
+                        if candidate.content and candidate.content.parts:
+                            for part in candidate.content.parts:
+                                if hasattr(part, 'inline_data') and part.inline_data:
+                                    image_data = part.inline_data.data
+                                    if isinstance(image_data, str):
+                                        image_data = base64.b64decode(image_data)
+                                    print(f"   ✅ AI Mockup generated successfully!")
+                                    return image_data
+                
+                print(f"   ⚠️ No image in response (Attempt {attempt+1})")
                     
-                    if response.candidates:
-                        for candidate in response.candidates:
-                            if candidate.content and candidate.content.parts:
-                                for part in candidate.content.parts:
-                                    if hasattr(part, 'inline_data') and part.inline_data:
-                                        image_data = part.inline_data.data
-                                        if isinstance(image_data, str):
-                                            image_data = base64.b64decode(image_data)
-                                        print(f"   ✅ AI Mockup generated successfully!")
-                                        return image_data
-                    
-                    print(f"   ⚠️ No image in response (Attempt {attempt+1})")
-                    if attempt < max_attempts - 1:
-                        import time
-                        time.sleep(2 * (attempt + 1))
-                        
-                except Exception as e:
-                    print(f"   ❌ Attempt {attempt+1} failed: {e}")
-                    if attempt < max_attempts - 1:
-                        import time
-                        time.sleep(2 * (attempt + 1))
-                    else:
-                        break
-            return None
-        
-        return await loop.run_in_executor(None, run_sync)
+            except Exception as e:
+                print(f"   ❌ Attempt {attempt+1} failed: {e}")
+            
+            if attempt < max_attempts - 1:
+                await asyncio.sleep(gemini.retry_delay(attempt))
+        return None
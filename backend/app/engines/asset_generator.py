@@ -8,7 +8,6 @@ Step 2: FLUX Kontext → Uses portrait for scene generation (handled in image_en
 
 import asyncio
 import base64
-import httpx
 import tempfile
 import os
 from dataclasses import dataclass
@@ -21,7 +20,9 @@ import pillow_heif
 pillow_heif.register_heif_opener()
 
 from app.config import Settings
-from google import genai
+from app.services import gemini
+from app.services.http_client import HttpClientRegistry, get_http_client
+from app.services.image_cache import ImageCache, get_image_cache
 from google.genai import types
 
 
@@ -51,10 +52,18 @@ class AssetGenerator:
         "Full body front view, clean white background, professional character concept art."
     )
     
-    def __init__(self, settings: Settings):
+    GEMINI_MODEL = "models/gemini-2.5-flash-image"
+    
+    def __init__(
+        self,
+        settings: Settings,
+        http: Optional[HttpClientRegistry] = None,
+        images: Optional[ImageCache] = None,
+    ):
         self.settings = settings
         self.api_key = settings.gemini_api_key
-        self.client = genai.Client(api_key=self.api_key)
+        self.http = http or get_http_client()
+        self.images = images or get_image_cache()
     
     async def generate_character_asset(
         self,
@@ -113,10 +122,7 @@ class AssetGenerator:
     
     async def _download_image(self, url: str) -> bytes:
         """Download an image from URL."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()
-            return response.content
+        return await self.images.get(url)
     
     async def _run_nano_banana(self, image_bytes: bytes, prompt: str) -> Optional[str]:
         """
@@ -133,23 +139,13 @@ class AssetGenerator:
                 if max(input_image.size) > 1024:
                     input_image.thumbnail((1024, 1024), Image.LANCZOS)
                 
-                # Gemini call (Sync) -> but we'll run it in executor to avoid blocking
-                def call_gemini(current_prompt):
-                    # Use BLOCK_NONE to avoid safety false positives
-                    safety_settings = [
-                        types.SafetySetting(category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"),
-                        types.SafetySetting(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="BLOCK_NONE"),
-                        types.SafetySetting(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="BLOCK_NONE"),
-                        types.SafetySetting(category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"),
-                    ]
-                    
-                    return self.client.models.generate_content(
-                        model="models/gemini-2.5-flash-image",
-                        contents=[input_image, current_prompt],
-                        config=types.GenerateContentConfig(
-                            safety_settings=safety_settings
-                        )
-                    )
+                # Use BLOCK_NONE to avoid safety false positives
+                safety_settings = [
+                    types.SafetySetting(category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"),
+                    types.SafetySetting(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="BLOCK_NONE"),
+                    types.SafetySetting(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="BLOCK_NONE"),
+                    types.SafetySetting(category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"),
+                ]
 
                 # Fallback Prompt Logic: If first attempt fails, try a softer prompt
                 current_prompt = prompt
@@ -164,7 +160,11 @@ class AssetGenerator:
                     )
 
                 print(f"   📸 Attempt {attempt+1}/{max_attempts} with prompt: {current_prompt[:50]}...")
-                response = await asyncio.get_event_loop().run_in_executor(None, lambda: call_gemini(current_prompt))
+                response = await gemini.generate_content(
+                    model=self.GEMINI_MODEL,
+                    contents=[input_image, current_prompt],
+                    config=types.GenerateContentConfig(safety_settings=safety_settings),
+                )
                 
                 # Extract image
                 if response.candidates:
@@ -192,12 +192,12 @@ class AssetGenerator:
                      print(f"   🛑 Finish Reason: {reason}")
                 
                 if attempt < max_attempts - 1:
-                    await asyncio.sleep(2 * (attempt + 1))
+                    await asyncio.sleep(gemini.retry_delay(attempt))
                     
             except Exception as e:
                 print(f"   ❌ Attempt {attempt+1} failed: {e}")
                 if attempt < max_attempts - 1:
-                    await asyncio.sleep(2 * (attempt + 1))
+                    await asyncio.sleep(gemini.retry_delay(attempt))
                 else:
                     return None
                     
@@ -9,6 +9,7 @@ from pydantic import BaseModel, Field
 from openai import AsyncOpenAI
 
 from app.config import Settings
+from app.services.rate_limiter import get_rate_limiter
 
 
 class CharacterTraits(BaseModel):
@@ -53,6 +54,8 @@ class CharacterAnalyzer:
     Analyzes uploaded child photos using GPT-4o Vision with Structured Outputs.
     """
     
+    MODEL = "gpt-4o"
+    
     def __init__(self, settings: Settings):
         self.settings = settings
         self.client = None
@@ -69,8 +72,9 @@ class CharacterAnalyzer:
             if not self.client:
                 self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
             
+            await get_rate_limiter("openai", self.MODEL).acquire()
             response = await self.client.chat.completions.create(
-                model="gpt-4o",
+                model=self.MODEL,
                 messages=[
                     {
                         "role": "user",
@@ -9,12 +9,14 @@ Optimized for:
 """
 
 import asyncio
-from typing import Optional, Literal, TYPE_CHECKING
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Optional, Literal, TYPE_CHECKING
 from dataclasses import dataclass
 import replicate
 
 from app.config import Settings
 from app.engines.story_engine import StoryOutput, Scene
+from app.services.rate_limiter import get_rate_limiter
 
 if TYPE_CHECKING:
     from app.engines.character_analyzer import CharacterSheet
@@ -28,6 +30,60 @@ class GeneratedImage:
     prompt_used: str
 
 
+@dataclass
+class SceneJob:
+    """A pending scene generation. `run` creates the provider call lazily."""
+    scene_number: int
+    prompt: str
+    run: Callable[[], Awaitable[str]]
+
+
+class SceneScheduler:
+    """
+    Runs scene generations concurrently.
+    
+    - At most `max_in_flight` calls run at the same time.
+    - Provider request budgets are enforced by the shared rate limiter inside
+      each engine call, so concurrent books share one quota.
+    - Results are yielded as they complete; a failed scene yields an empty image_url.
+    """
+    
+    def __init__(self, max_in_flight: int = 4):
+        self.max_in_flight = max(1, max_in_flight)
+    
+    async def _run_job(self, job: SceneJob, semaphore: asyncio.Semaphore) -> GeneratedImage:
+        async with semaphore:
+            print(f"   ⏳ Starting scene {job.scene_number}...")
+            try:
+                image_url = await job.run()
+                print(f"   ✅ Scene {job.scene_number} done!")
+                return GeneratedImage(
+                    scene_number=job.scene_number,
+                    image_url=image_url,
+                    prompt_used=job.prompt,
+                )
+            except Exception as e:
+                print(f"   ❌ Scene {job.scene_number} failed: {e}")
+                return GeneratedImage(
+                    scene_number=job.scene_number,
+                    image_url="",
+                    prompt_used=f"Failed: {e}",
+                )
+    
+    async def run(self, jobs: list[SceneJob]) -> AsyncIterator[GeneratedImage]:
+        """Run all jobs and yield their results in completion order."""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = [asyncio.create_task(self._run_job(job, semaphore)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer stopped early (or was cancelled): don't leave calls running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
 class ImageEngine:
     """
     Generates children's book illustrations using FLUX Kontext Pro.
@@ -92,25 +148,51 @@ class ImageEngine:
         theme: str,
         scene_numbers: Optional[list[int]] = None,
         features_description: Optional[str] = None,
+        max_in_flight: Optional[int] = None,
     ) -> list[GeneratedImage]:
         """
         Generate scene variations using Character Asset as reference.
         
         Uses FLUX Kontext for each scene, keeping the character consistent.
         Uses the story's scene image_prompt for detailed, theme-specific prompts.
+        Failed scenes are returned with an empty image_url.
+        """
+        images = [
+            image async for image in self.iter_scenes_with_character_asset(
+                story=story,
+                character_asset_url=character_asset_url,
+                child_name=child_name,
+                theme=theme,
+                scene_numbers=scene_numbers,
+                features_description=features_description,
+                max_in_flight=max_in_flight,
+            )
+        ]
+        return sorted(images, key=lambda x: x.scene_number)
+    
+    async def iter_scenes_with_character_asset(
+        self,
+        story: StoryOutput,
+        character_asset_url: str,
+        child_name: str,
+        theme: str,
+        scene_numbers: Optional[list[int]] = None,
+        features_description: Optional[str] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> AsyncIterator[GeneratedImage]:
+        """
+        Same as generate_scenes_with_character_asset, but yields each scene
+        as soon as it completes (completion order, not scene order).
         """
         scenes_to_generate = scene_numbers or [1, 2, 3, 4]
         
         # Build a map of scene_number -> image_prompt from the story
         scene_prompts = {s.scene_number: s.image_prompt for s in story.scenes}
         
-        print(f"🎬 Generating {len(scenes_to_generate)} scenes using FLUX Kontext Dev...")
+        print(f"🎬 Generating {len(scenes_to_generate)} scenes using FLUX Kontext...")
         print(f"   Character Asset: {character_asset_url[:50]}...")
         
-        images = []
-        
-        # Prepare tasks
-        tasks = []
+        jobs = []
         for scene_num in scenes_to_generate:
             # Get the image prompt from the story template
             prompt = scene_prompts.get(scene_num, f"3D Pixar style, {child_name} on an adventure.")
@@ -119,66 +201,16 @@ class ImageEngine:
             
             if scene_num == 0:
                 # Use specialized high-quality cover generation for Scene 0
-                tasks.append(
-                    self.generate_cover_image(
-                        character_asset_url=character_asset_url,
-                        cover_prompt=prompt
-                    )
-                )
+                run = partial(self.generate_cover_image, character_asset_url=character_asset_url, cover_prompt=prompt)
             else:
-                tasks.append(
-                    self._run_kontext(
-                        image_url=character_asset_url, 
-                        prompt=prompt
-                    )
-                )
-
-        print(f"   🚀 Running {len(tasks)} scene generations SEQUENTIALLY (Rate Limit Safe)...")
+                run = partial(self._run_kontext, image_url=character_asset_url, prompt=prompt)
+            jobs.append(SceneJob(scene_number=scene_num, prompt=prompt, run=run))
         
-        # Run sequentially
-        for i, task_coro in enumerate(tasks):
-            scene_num = scenes_to_generate[i]
-            try:
-                print(f"   ⏳ Starting scene {scene_num}...")
-                res = await task_coro
-                images.append(GeneratedImage(
-                    scene_number=scene_num,
-                    image_url=res,
-                    prompt_used="sequential_gen",
-                ))
-                print(f"   ✅ Scene {scene_num} done!")
-                if i < len(tasks) - 1:
-                    await asyncio.sleep(2)
-            except Exception as e:
-                 print(f"   ❌ Scene {scene_num} failed: {e}")
-                 images.append(GeneratedImage(
-                    scene_number=scene_num,
-                    image_url="",
-                    prompt_used=f"Failed: {e}",
-                ))
-
-        # results no longer needed
-        results = []
-            
-        # Process results
-        for i, res in enumerate(results):
-            scene_num = scenes_to_generate[i]
-            if isinstance(res, Exception):
-                print(f"   ❌ Scene {scene_num} failed: {res}")
-                images.append(GeneratedImage(
-                    scene_number=scene_num,
-                    image_url="",
-                    prompt_used=f"Failed: {res}",
-                ))
-            elif res:
-                images.append(GeneratedImage(
-                    scene_number=scene_num,
-                    image_url=res,
-                    prompt_used="parallel_gen",
-                ))
-                print(f"   ✅ Scene {scene_num} done!")
+        scheduler = SceneScheduler(max_in_flight=max_in_flight or self.settings.scene_max_concurrency)
+        print(f"   🚀 Running {len(jobs)} scene generations (max {scheduler.max_in_flight} in flight)...")
         
-        return sorted(images, key=lambda x: x.scene_number)
+        async for image in scheduler.run(jobs):
+            yield image
     
     async def _run_kontext(self, image_url: str, prompt: str) -> str:
         """Run FLUX for image-to-image generation with character preservation."""
@@ -189,6 +221,8 @@ class ImageEngine:
             print(f"   ❌ Invalid image URL for Flux: {image_url}")
             raise ValueError(f"Invalid image URL: {image_url}")
         
+        await get_rate_limiter("replicate", self.MODEL_KONTEXT).acquire()
+        
         def run_sync():
             print(f"   📸 Calling FLUX Kontext Fast...")
             print(f"   📝 Prompt: {prompt[:100]}...")
@@ -249,6 +283,7 @@ class ImageEngine:
         print(f"   🖼️ Character Asset: {character_asset_url[:80]}...")
         
         loop = asyncio.get_event_loop()
+        await get_rate_limiter("replicate", self.MODEL_KONTEXT).acquire()
         
         def run_sync():
             try:
@@ -317,15 +352,13 @@ class ImageEngine:
                     image_url="",
                     prompt_used=f"Failed: {e}",
                 ))
-            
-            if i < len(scenes_to_generate) - 1:
-                await asyncio.sleep(5)
         
         return sorted(images, key=lambda x: x.scene_number)
     
     async def _run_flux(self, prompt: str) -> str:
         """Run Flux Pro for text-to-image."""
         loop = asyncio.get_event_loop()
+        await get_rate_limiter("replicate", self.MODEL_FLUX).acquire()
         
         def run_sync():
             output = self.client.run(
@@ -378,9 +411,10 @@ class ImageEngineWithRetry(ImageEngine):
                 print(f"   ⚠️ Attempt {attempt + 1} failed: {error_str[:50]}")
                 
                 if "429" in error_str:
+                    # Pause every Kontext caller, not just this one
                     wait_time = self.RETRY_DELAY * (attempt + 2)
-                    print(f"   ⏳ Rate limited, waiting {wait_time}s...")
-                    await asyncio.sleep(wait_time)
+                    print(f"   ⏳ Rate limited, pausing Kontext calls for {wait_time}s...")
+                    get_rate_limiter("replicate", self.MODEL_KONTEXT).penalize(wait_time)
                 elif attempt < self.MAX_RETRIES - 1:
                     await asyncio.sleep(self.RETRY_DELAY)
         
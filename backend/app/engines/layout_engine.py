@@ -11,11 +11,9 @@ Specifications:
   - Final Page: "Erstellt mit Storybook.ai"
 """
 
-import io
-from typing import Optional
+import tempfile
+from typing import Optional, Union, BinaryIO
 from pathlib import Path
-import httpx
-from PIL import Image as PILImage
 
 from reportlab.lib.units import mm, cm
 from reportlab.lib.colors import HexColor, white, black
@@ -37,6 +35,9 @@ from reportlab.pdfbase.ttfonts import TTFont
 
 from app.config import Settings
 from app.models.book import BookPage
+from app.services.http_client import HttpClientRegistry, get_http_client
+from app.services.image_cache import ImageCache, get_image_cache
+from app.services.render_pool import prepare_print_images, render_pdf
 
 
 # ============== Page Dimensions ==============
@@ -62,11 +63,16 @@ ACCENT_COLOR = HexColor("#6C5CE7")
 CREAM_BG = HexColor("#FDF6E3")
 
 
-class LayoutEngine:
-    """Creates print-ready PDF children's books."""
+class LayoutRenderer:
+    """
+    Builds the book PDF from a layout description. Synchronous and free of
+    I/O besides reading prepared image files, so it runs in the render pool.
+
+    Layout: {"title", "child_name", "cover_image_path",
+             "scenes": [{"text", "image_path"}]}
+    """
     
-    def __init__(self, settings: Settings):
-        self.settings = settings
+    def __init__(self):
         self._register_fonts()
     
     def _register_fonts(self):
@@ -139,28 +145,11 @@ class LayoutEngine:
             ),
         }
     
-    async def create_pdf(
-        self,
-        pages: list[BookPage],
-        child_name: str,
-        book_title: Optional[str] = None,
-    ) -> bytes:
-        """
-        Create a complete print-ready PDF book.
-        
-        Args:
-            pages: List of BookPage objects (20 pages from 10 scenes)
-            child_name: Name of the child (for dedication)
-            book_title: Title of the book
-        
-        Returns:
-            PDF file as bytes
-        """
-        buffer = io.BytesIO()
-        
+    def build(self, layout: dict, output: Union[str, BinaryIO]) -> None:
+        """Render the complete print-ready PDF book into `output` (path or file object)."""
         # Create custom document
         doc = BaseDocTemplate(
-            buffer,
+            output,
             pagesize=(PAGE_WIDTH, PAGE_HEIGHT),
             leftMargin=0,
             rightMargin=0,
@@ -172,32 +161,20 @@ class LayoutEngine:
         story_elements = []
         
         # ====== Page 1: Cover ======
-        cover_elements = await self._create_cover_page(
-            title=book_title or f"{child_name}s Abenteuer",
-            child_name=child_name,
-            cover_image_url=pages[0].image_url if pages else None,
+        cover_elements = self._create_cover_page(
+            title=layout["title"],
+            child_name=layout["child_name"],
+            cover_image_path=layout["cover_image_path"],
             styles=styles,
         )
         story_elements.extend(cover_elements)
         story_elements.append(PageBreak())
         
         # ====== Pages 2-21: Story Pages ======
-        # We have 10 scenes, each with 2 pages (left=text, right=image)
-        # Get unique scenes (every other page has the image)
-        scenes = []
-        for i in range(0, len(pages), 2):
-            if i + 1 < len(pages):
-                # Combine text from both pages of scene
-                text = pages[i].text or pages[i + 1].text or ""
-                image_url = pages[i].image_url or pages[i + 1].image_url
-                scenes.append((text, image_url))
-            elif pages[i].text or pages[i].image_url:
-                scenes.append((pages[i].text or "", pages[i].image_url))
-        
-        for scene_num, (text, image_url) in enumerate(scenes, 1):
+        for scene_num, scene in enumerate(layout["scenes"], 1):
             # Left page: Text
-            text_page = await self._create_text_page(
-                text=text,
+            text_page = self._create_text_page(
+                text=scene["text"],
                 page_number=scene_num * 2,
                 styles=styles,
             )
@@ -205,15 +182,15 @@ class LayoutEngine:
             story_elements.append(PageBreak())
             
             # Right page: Full bleed image
-            image_page = await self._create_image_page(
-                image_url=image_url,
+            image_page = self._create_image_page(
+                image_path=scene["image_path"],
                 page_number=scene_num * 2 + 1,
             )
             story_elements.extend(image_page)
             story_elements.append(PageBreak())
         
         # ====== Final Page: Credits ======
-        credits_page = self._create_credits_page(child_name, styles)
+        credits_page = self._create_credits_page(layout["child_name"], styles)
         story_elements.extend(credits_page)
         
         # Build PDF with custom page template
@@ -226,15 +203,12 @@ class LayoutEngine:
         doc.addPageTemplates([template])
         
         doc.build(story_elements)
-        
-        buffer.seek(0)
-        return buffer.getvalue()
     
-    async def _create_cover_page(
+    def _create_cover_page(
         self,
         title: str,
         child_name: str,
-        cover_image_url: Optional[str],
+        cover_image_path: Optional[str],
         styles: dict,
     ) -> list:
         """Create the cover page."""
@@ -248,17 +222,12 @@ class LayoutEngine:
         elements.append(Spacer(1, 20 * mm))
         
         # Cover image (centered, not full bleed)
-        if cover_image_url:
-            try:
-                img_buffer = await self._load_image(cover_image_url)
-                if img_buffer:
-                    # Size image to fit with margins
-                    img_size = 140 * mm  # Leave margins
-                    img = Image(img_buffer, width=img_size, height=img_size)
-                    img.hAlign = 'CENTER'
-                    elements.append(img)
-            except Exception as e:
-                print(f"Error loading cover image: {e}")
+        if cover_image_path:
+            # Size image to fit with margins
+            img_size = 140 * mm  # Leave margins
+            img = Image(cover_image_path, width=img_size, height=img_size)
+            img.hAlign = 'CENTER'
+            elements.append(img)
         
         elements.append(Spacer(1, 20 * mm))
         
@@ -267,7 +236,7 @@ class LayoutEngine:
         
         return elements
     
-    async def _create_text_page(
+    def _create_text_page(
         self,
         text: str,
         page_number: int,
@@ -302,30 +271,23 @@ class LayoutEngine:
         
         return elements
     
-    async def _create_image_page(
+    def _create_image_page(
         self,
-        image_url: Optional[str],
+        image_path: Optional[str],
         page_number: int,
     ) -> list:
         """Create a full-bleed image page (right side of spread)."""
         elements = []
         
-        if image_url:
-            try:
-                img_buffer = await self._load_image(image_url)
-                if img_buffer:
-                    # Full bleed - image fills entire page including bleed area
-                    img = Image(
-                        img_buffer,
-                        width=PAGE_WIDTH,
-                        height=PAGE_HEIGHT,
-                    )
-                    img.hAlign = 'CENTER'
-                    elements.append(img)
-            except Exception as e:
-                print(f"Error loading image for page {page_number}: {e}")
-                # Add placeholder
-                elements.append(Spacer(1, PAGE_HEIGHT))
+        if image_path:
+            # Full bleed - image fills entire page including bleed area
+            img = Image(
+                image_path,
+                width=PAGE_WIDTH,
+                height=PAGE_HEIGHT,
+            )
+            img.hAlign = 'CENTER'
+            elements.append(img)
         else:
             # Empty page placeholder
             elements.append(Spacer(1, PAGE_HEIGHT))
@@ -370,98 +332,42 @@ class LayoutEngine:
         ))
         
         return elements
-    
-    async def _load_image(self, url: str) -> Optional[io.BytesIO]:
-        """
-        Download and prepare image for PDF insertion.
-        Optimizes for 300 DPI output.
-        """
-        if not url:
-            return None
-            
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url)
-            if response.status_code == 200:
-                img_buffer = io.BytesIO(response.content)
-                
-                # Open and optimize image
-                img = PILImage.open(img_buffer)
-                img = img.convert("RGB")
-                
-                # Calculate target size for 300 DPI
-                # Full bleed page is 216mm x 216mm
-                # At 300 DPI: 216mm = 8.5 inches = 2551 pixels
-                target_pixels = int(216 / 25.4 * TARGET_DPI)  # ~2551
-                
-                # Resize if image is smaller (upscale for quality)
-                # or much larger (downscale to save space)
-                current_max = max(img.size)
-                if current_max < target_pixels * 0.8 or current_max > target_pixels * 1.5:
-                    # Calculate new size maintaining aspect ratio
-                    ratio = target_pixels / current_max
-                    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-                    img = img.resize(new_size, PILImage.Resampling.LANCZOS)
-                
-                # Set DPI metadata
-                output = io.BytesIO()
-                img.save(output, format="JPEG", quality=95, dpi=(TARGET_DPI, TARGET_DPI))
-                output.seek(0)
-                
-                return output
-        
-        return None
 
 
-class LayoutEngineAdvanced(LayoutEngine):
+class AdvancedLayoutRenderer(LayoutRenderer):
     """
-    Advanced layout engine with custom canvas drawing.
+    Advanced renderer with custom canvas drawing.
     Provides more control over backgrounds and visual elements.
     """
     
-    async def create_pdf(
-        self,
-        pages: list[BookPage],
-        child_name: str,
-        book_title: Optional[str] = None,
-    ) -> bytes:
-        """Create PDF with custom canvas backgrounds."""
-        buffer = io.BytesIO()
-        
-        c = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    def build(self, layout: dict, output: Union[str, BinaryIO]) -> None:
+        """Render the PDF with custom canvas backgrounds."""
+        c = canvas.Canvas(output, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
         styles = self._get_styles()
         
         # ====== Page 1: Cover ======
-        await self._draw_cover(c, book_title or f"{child_name}s Abenteuer", 
-                               child_name, pages[0].image_url if pages else None, styles)
+        self._draw_cover(c, layout["title"], layout["child_name"],
+                         layout["cover_image_path"], styles)
         c.showPage()
         
         # ====== Story Pages ======
-        scenes = []
-        for i in range(0, len(pages), 2):
-            if i + 1 < len(pages):
-                text = pages[i].text or pages[i + 1].text or ""
-                image_url = pages[i].image_url or pages[i + 1].image_url
-                scenes.append((text, image_url))
-        
-        for scene_num, (text, image_url) in enumerate(scenes, 1):
+        for scene_num, scene in enumerate(layout["scenes"], 1):
             # Left page (text)
-            await self._draw_text_page(c, text, scene_num * 2, styles)
+            self._draw_text_page(c, scene["text"], scene_num * 2, styles)
             c.showPage()
             
             # Right page (image)
-            await self._draw_image_page(c, image_url)
+            self._draw_image_page(c, scene["image_path"])
             c.showPage()
         
         # ====== Credits Page ======
-        self._draw_credits(c, child_name, styles)
+        self._draw_credits(c, layout["child_name"], styles)
         c.showPage()
         
         c.save()
-        buffer.seek(0)
-        return buffer.getvalue()
     
-    async def _draw_cover(self, c: canvas.Canvas, title: str, child_name: str,
-                          image_url: Optional[str], styles: dict):
+    def _draw_cover(self, c: canvas.Canvas, title: str, child_name: str,
+                    image_path: Optional[str], styles: dict):
         """Draw cover page with custom canvas."""
         # Cream background
         c.setFillColor(CREAM_BG)
@@ -478,20 +384,15 @@ class LayoutEngineAdvanced(LayoutEngine):
         c.drawString(x, title_y, title)
         
         # Cover image
-        if image_url:
-            try:
-                img_buffer = await self._load_image(image_url)
-                if img_buffer:
-                    img_size = 130 * mm
-                    img_x = (PAGE_WIDTH - img_size) / 2
-                    img_y = (PAGE_HEIGHT - img_size) / 2 - 10 * mm
-                    c.drawImage(
-                        img_buffer, img_x, img_y,
-                        width=img_size, height=img_size,
-                        preserveAspectRatio=True,
-                    )
-            except Exception as e:
-                print(f"Cover image error: {e}")
+        if image_path:
+            img_size = 130 * mm
+            img_x = (PAGE_WIDTH - img_size) / 2
+            img_y = (PAGE_HEIGHT - img_size) / 2 - 10 * mm
+            c.drawImage(
+                image_path, img_x, img_y,
+                width=img_size, height=img_size,
+                preserveAspectRatio=True,
+            )
         
         # Dedication
         c.setFont(self.main_font, 22)
@@ -500,8 +401,8 @@ class LayoutEngineAdvanced(LayoutEngine):
         dec_width = c.stringWidth(dedication, self.main_font, 22)
         c.drawString((PAGE_WIDTH - dec_width) / 2, 35 * mm, dedication)
     
-    async def _draw_text_page(self, c: canvas.Canvas, text: str, 
-                               page_num: int, styles: dict):
+    def _draw_text_page(self, c: canvas.Canvas, text: str, 
+                        page_num: int, styles: dict):
         """Draw text page with warm background."""
         # Warm background
         c.setFillColor(CREAM_BG)
@@ -544,23 +445,15 @@ class LayoutEngineAdvanced(LayoutEngine):
         pn_width = c.stringWidth(pn, self.main_font, 12)
         c.drawString((PAGE_WIDTH - pn_width) / 2, SAFE_MARGIN + 10 * mm, pn)
     
-    async def _draw_image_page(self, c: canvas.Canvas, image_url: Optional[str]):
+    def _draw_image_page(self, c: canvas.Canvas, image_path: Optional[str]):
         """Draw full-bleed image page."""
-        if image_url:
-            try:
-                img_buffer = await self._load_image(image_url)
-                if img_buffer:
-                    # Full bleed - cover entire page
-                    c.drawImage(
-                        img_buffer, 0, 0,
-                        width=PAGE_WIDTH, height=PAGE_HEIGHT,
-                        preserveAspectRatio=False,  # Fill entire page
-                    )
-            except Exception as e:
-                print(f"Image page error: {e}")
-                # White fallback
-                c.setFillColor(white)
-                c.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, fill=True)
+        if image_path:
+            # Full bleed - cover entire page
+            c.drawImage(
+                image_path, 0, 0,
+                width=PAGE_WIDTH, height=PAGE_HEIGHT,
+                preserveAspectRatio=False,  # Fill entire page
+            )
         else:
             c.setFillColor(white)
             c.rect(0, 0, PAGE_WIDTH, PAGE_HEIGHT, fill=True)
@@ -588,3 +481,104 @@ class LayoutEngineAdvanced(LayoutEngine):
         
         c.setFont(self.main_font, 14)
         c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT / 2 - 60 * mm, "Wo jedes Kind zum Helden wird.")
+
+
+def build_layout_pdf(layout: dict, output: Union[str, BinaryIO]) -> None:
+    """Render pool entry point for LayoutEngine."""
+    LayoutRenderer().build(layout, output)
+
+
+def build_layout_pdf_advanced(layout: dict, output: Union[str, BinaryIO]) -> None:
+    """Render pool entry point for LayoutEngineAdvanced."""
+    AdvancedLayoutRenderer().build(layout, output)
+
+
+class LayoutEngine:
+    """Creates print-ready PDF children's books."""
+    
+    RENDER_KIND = "layout_book"
+    
+    def __init__(
+        self,
+        settings: Settings,
+        http: Optional[HttpClientRegistry] = None,
+        images: Optional[ImageCache] = None,
+    ):
+        self.settings = settings
+        self.http = http or get_http_client()
+        self.images = images or get_image_cache()
+    
+    async def create_pdf(
+        self,
+        pages: list[BookPage],
+        child_name: str,
+        book_title: Optional[str] = None,
+    ) -> bytes:
+        """
+        Create a complete print-ready PDF book.
+        
+        Images are fetched and prepared here; the document is built in the
+        render pool from a layout description.
+        
+        Args:
+            pages: List of BookPage objects (20 pages from 10 scenes)
+            child_name: Name of the child (for dedication)
+            book_title: Title of the book
+        
+        Returns:
+            PDF file as bytes
+        """
+        scenes = self._group_scenes(pages)
+        cover_image_url = pages[0].image_url if pages else None
+        
+        with tempfile.TemporaryDirectory(prefix="bookloo-layout-") as workdir:
+            cover_image_path, *image_paths = await prepare_print_images(
+                [cover_image_url] + [image_url for _, image_url in scenes],
+                workdir,
+                images=self.images,
+                concurrency=self.settings.pdf_image_prefetch_concurrency,
+            )
+            layout = {
+                "title": book_title or f"{child_name}s Abenteuer",
+                "child_name": child_name,
+                "cover_image_path": cover_image_path,
+                "scenes": [
+                    {"text": text, "image_path": path}
+                    for (text, _), path in zip(scenes, image_paths)
+                ],
+            }
+            return await render_pdf(self.RENDER_KIND, layout)
+    
+    def _group_scenes(self, pages: list[BookPage]) -> list[tuple[str, Optional[str]]]:
+        """
+        We have 10 scenes, each with 2 pages (left=text, right=image).
+        Get unique scenes (every other page has the image).
+        """
+        scenes = []
+        for i in range(0, len(pages), 2):
+            if i + 1 < len(pages):
+                # Combine text from both pages of scene
+                text = pages[i].text or pages[i + 1].text or ""
+                image_url = pages[i].image_url or pages[i + 1].image_url
+                scenes.append((text, image_url))
+            elif pages[i].text or pages[i].image_url:
+                scenes.append((pages[i].text or "", pages[i].image_url))
+        return scenes
+
+
+class LayoutEngineAdvanced(LayoutEngine):
+    """
+    Advanced layout engine with custom canvas drawing.
+    Provides more control over backgrounds and visual elements.
+    """
+    
+    RENDER_KIND = "layout_book_advanced"
+    
+    def _group_scenes(self, pages: list[BookPage]) -> list[tuple[str, Optional[str]]]:
+        scenes = []
+        for i in range(0, len(pages), 2):
+            if i + 1 < len(pages):
+                text = pages[i].text or pages[i + 1].text or ""
+                image_url = pages[i].image_url or pages[i + 1].image_url
+                scenes.append((text, image_url))
+        return scenes
@@ -0,0 +1,177 @@
+"""
+bookloo - Mockup Compositor
+Deterministic local book mockups: the scene is warped onto the page of a
+template photo and composited, without any external service.
+
+Everything that does not depend on the scene is prepared once per process
+and cached per template:
+- the decoded template
+- the page quad (from MockupEngineV2.PLACEMENTS) and its homography
+- the anti-aliased page mask
+Per mockup only decode, warp, paste, text and JPEG encode remain (tens of
+milliseconds). Compositing runs in the render pool.
+"""
+
+import textwrap
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from app.engines.mockup_engine_v2 import MockupEngineV2
+from app.services.image_cache import ImageCache, get_image_cache
+from app.services.render_pool import run_in_render_pool
+
+
+ASSETS_DIR = MockupEngineV2.ASSETS_DIR
+FONT_PATH = Path(__file__).parent.parent.parent / "assets" / "fonts" / "Andika-Regular.ttf"
+
+# Preview key scene -> template (same settings as the AI mockups)
+TEMPLATES = {
+    0: "cover_template.jpg",
+    1: "open_book_nursery.png",
+    7: "open_book_carpet.png",
+    13: "open_book_clean.png",
+}
+DEFAULT_TEMPLATE = "open_book_clean.png"
+
+# Text color for a "printed" look
+TEXT_COLOR = (34, 34, 34)
+MASK_SUPERSAMPLING = 4
+
+
+def perspective_coeffs(quad: list[tuple[float, float]], width: int, height: int) -> tuple:
+    """
+    PIL PERSPECTIVE coefficients mapping points of `quad` (top-left,
+    bottom-left, bottom-right, top-right) back onto a width x height image.
+    """
+    corners = [(0, 0), (0, height), (width, height), (width, 0)]
+    rows, values = [], []
+    for (x, y), (u, v) in zip(quad, corners):
+        rows.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        rows.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+        values += [u, v]
+    return tuple(np.linalg.solve(np.array(rows, dtype=float), np.array(values, dtype=float)))
+
+
+def _rect_quad(x: float, y: float, w: float, h: float) -> list[tuple[float, float]]:
+    return [(x, y), (x, y + h), (x + w, y + h), (x + w, y)]
+
+
+class CompositorTemplate:
+    """A template with its page geometry precomputed."""
+
+    def __init__(self, name: str):
+        placement = MockupEngineV2.PLACEMENTS[name]
+        self.name = name
+        self.image = Image.open(ASSETS_DIR / name).convert("RGB")
+
+        # A placement may give an explicit (perspective) "quad" for the page
+        if placement["type"] == "cover":
+            quad = placement.get("quad") or _rect_quad(placement["x"], placement["y"], placement["width"], placement["height"])
+            self.text_box = None
+        else:
+            quad = placement.get("quad") or _rect_quad(
+                placement["right_x"], placement["right_y"], placement["right_w"], placement["right_h"]
+            )
+            self.text_box = (placement["left_x"], placement["left_y"], placement["left_w"], placement["left_h"])
+
+        # The scene is warped into the quad's bounding box only
+        xs, ys = [p[0] for p in quad], [p[1] for p in quad]
+        self.origin = (int(min(xs)), int(min(ys)))
+        self.box_size = (int(np.ceil(max(xs))) - self.origin[0], int(np.ceil(max(ys))) - self.origin[1])
+        local_quad = [(x - self.origin[0], y - self.origin[1]) for x, y in quad]
+        # Scene is fitted to the page's own size, so the warp samples ~1:1
+        self.scene_size = (max(1, int(max(xs) - min(xs))), max(1, int(max(ys) - min(ys))))
+        self.coeffs = perspective_coeffs(local_quad, *self.scene_size)
+        self.mask = self._page_mask(local_quad)
+
+    def _page_mask(self, quad: list[tuple[float, float]]) -> Image.Image:
+        """Anti-aliased page mask over the bounding box."""
+        s = MASK_SUPERSAMPLING
+        mask = Image.new("L", (self.box_size[0] * s, self.box_size[1] * s), 0)
+        ImageDraw.Draw(mask).polygon([(x * s, y * s) for x, y in quad], fill=255)
+        return mask.resize(self.box_size, Image.Resampling.BOX)
+
+
+_templates: dict[str, CompositorTemplate] = {}
+
+
+def get_template(name: str) -> CompositorTemplate:
+    """Load and precompute a template once per process."""
+    template = _templates.get(name)
+    if template is None:
+        template = _templates[name] = CompositorTemplate(name)
+    return template
+
+
+@lru_cache(maxsize=8)
+def _font(size: int):
+    try:
+        return ImageFont.truetype(str(FONT_PATH), size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _draw_text(image: Image.Image, text: str, box: tuple) -> None:
+    """Story text on the left page, wrapped to its width."""
+    x, y, w, h = box
+    size = max(12, h // 22)
+    font = _font(size)
+    chars_per_line = max(10, int(w / (size * 0.55)))
+    line_height = int(size * 1.3)
+    max_lines = max(1, int(h * 0.8) // line_height)
+    draw = ImageDraw.Draw(image)
+    top = y + h // 10
+    for n, line in enumerate(textwrap.wrap(text, width=chars_per_line)[:max_lines]):
+        draw.text((x + w // 10, top + n * line_height), line, font=font, fill=TEXT_COLOR)
+
+
+def compose_mockup(scene_bytes: bytes, scene_number: int, story_text: Optional[str] = None) -> bytes:
+    """Composite a scene onto its template; JPEG bytes. Runs inside a pool process."""
+    template = get_template(TEMPLATES.get(scene_number, DEFAULT_TEMPLATE))
+
+    scene = Image.open(BytesIO(scene_bytes))
+    scene.draft("RGB", template.scene_size)  # JPEG: decode at reduced scale
+    scene = ImageOps.fit(scene.convert("RGB"), template.scene_size, Image.Resampling.BILINEAR)
+    warped = scene.transform(template.box_size, Image.Transform.PERSPECTIVE, template.coeffs, Image.Resampling.BICUBIC)
+
+    result = template.image.copy()
+    result.paste(warped, template.origin, template.mask)
+    if story_text and template.text_box:
+        _draw_text(result, story_text, template.text_box)
+
+    output = BytesIO()
+    result.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+class MockupCompositor:
+    """Async front for compose_mockup (same call shape as the AI mockup engines)."""
+
+    def __init__(self, images: Optional[ImageCache] = None):
+        self.images = images or get_image_cache()
+
+    async def create_mockup(
+        self,
+        scene_image_url: str,
+        scene_number: int,
+        story_text: Optional[str] = None,
+    ) -> Optional[bytes]:
+        """
+        Returns:
+            JPEG bytes of the mockup image, or None if failed
+        """
+        template_name = TEMPLATES.get(scene_number, DEFAULT_TEMPLATE)
+        if not (ASSETS_DIR / template_name).exists():
+            print(f"   ⚠️ Template not found: {ASSETS_DIR / template_name}")
+            return None
+        try:
+            scene_bytes = await self.images.get(scene_image_url)
+            return await run_in_render_pool(compose_mockup, scene_bytes, scene_number, story_text)
+        except Exception as e:
+            print(f"   ❌ Local mockup for scene {scene_number} failed: {e}")
+            return None
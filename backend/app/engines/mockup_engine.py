@@ -12,15 +12,20 @@ import os
 from io import BytesIO
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance, ImageFilter
-import httpx
+from typing import Optional
+
 from app.config import get_settings
+from app.services.http_client import HttpClientRegistry, get_http_client
+from app.services.image_cache import ImageCache, get_image_cache
 
 # Text color for realistic "printed" look
 TEXT_COLOR = (34, 34, 34, 230)  # #222222 with 90% opacity
 
 class MockupEngine:
-    def __init__(self):
+    def __init__(self, http: Optional[HttpClientRegistry] = None, images: Optional[ImageCache] = None):
         self.settings = get_settings()
+        self.http = http or get_http_client()
+        self.images = images or get_image_cache()
         self.assets_dir = os.path.join(os.getcwd(), "assets")
         self.font_path = os.path.join(os.getcwd(), "assets", "fonts", "Andika-Regular.ttf")
         
@@ -29,10 +34,10 @@ class MockupEngine:
         for s, t in zip(source_coords, target_coords):
             matrix.append([t[0], t[1], 1, 0, 0, 0, -s[0]*t[0], -s[0]*t[1]])
             matrix.append([0, 0, 0, t[0], t[1], 1, -s[1]*t[0], -s[1]*t[1]])
-        A = np.matrix(matrix, dtype=float)
-        B = np.array(source_coords).reshape(8)
-        res = np.dot(np.linalg.inv(A.T * A) * A.T, B)
-        return np.array(res).reshape(8)
+        # Exactly determined (4 point pairs): solve directly
+        A = np.array(matrix, dtype=float)
+        B = np.array(source_coords, dtype=float).reshape(8)
+        return np.linalg.solve(A, B)
 
     async def create_open_book_mockup(self, scene_image_url: str, story_text: str) -> bytes:
         """
@@ -43,9 +48,7 @@ class MockupEngine:
         template_path = os.path.join(self.assets_dir, "mockup_open.png")
         if not os.path.exists(template_path):
              print(f"⚠️ Mockup template not found at {template_path}")
-             async with httpx.AsyncClient() as client:
-                resp = await client.get(scene_image_url)
-                return resp.content
+             return await self.images.get(scene_image_url)
 
         template_orig = Image.open(template_path).convert("RGBA")
         orig_width, orig_height = template_orig.size
@@ -56,9 +59,7 @@ class MockupEngine:
         template = template_orig.resize((width, height), Image.LANCZOS)
         
         # 2. Load Scene Image
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(scene_image_url)
-            scene_img = Image.open(BytesIO(resp.content)).convert("RGBA")
+        scene_img = Image.open(BytesIO(await self.images.get(scene_image_url))).convert("RGBA")
             
         # 3. Apply Perspective Transform for Right Page
         right_page_coeffs = [
@@ -131,9 +132,7 @@ class MockupEngine:
              template_path = os.path.join(self.assets_dir, "mockup_cover.png")
              
         if not os.path.exists(template_path):
-             async with httpx.AsyncClient() as client:
-                resp = await client.get(cover_image_url)
-                return resp.content
+             return await self.images.get(cover_image_url)
         
         template_orig = Image.open(template_path).convert("RGBA")
         orig_width, orig_height = template_orig.size
@@ -143,9 +142,7 @@ class MockupEngine:
         width, height = orig_width * scale, orig_height * scale
         template = template_orig.resize((width, height), Image.LANCZOS)
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(cover_image_url)
-            cover_img = Image.open(BytesIO(resp.content)).convert("RGBA")
+        cover_img = Image.open(BytesIO(await self.images.get(cover_image_url))).convert("RGBA")
             
         # Cover area coordinates (Center book) - scaled to 2x
         cover_coeffs = [
@@ -202,9 +199,8 @@ class MockupEngine:
             matrix.append([s[0], s[1], 1, 0, 0, 0, -s[0]*d[0], -s[0]*d[1]])
             matrix.append([0, 0, 0, s[0], s[1], 1, -s[1]*d[0], -s[1]*d[1]])
 
-        A = np.matrix(matrix, dtype=float)
-        B = np.array(dst).reshape(8)
+        A = np.array(matrix, dtype=float)
+        B = np.array(dst, dtype=float).reshape(8)
         
-        # Solve
-        res = np.dot(np.linalg.inv(A.T * A) * A.T, B)
-        return np.array(res).reshape(8).tolist()
+        # Solve (exactly determined, no normal equations needed)
+        return np.linalg.solve(A, B).tolist()
@@ -10,10 +10,11 @@ from pathlib import Path
 from typing import Optional
 from io import BytesIO
 
-import httpx
 from PIL import Image
 
 from app.config import Settings, get_settings
+from app.services.http_client import HttpClientRegistry, get_http_client
+from app.services.image_cache import ImageCache, get_image_cache
 
 
 class MockupEngineV2:
@@ -67,8 +68,15 @@ class MockupEngineV2:
         },
     }
     
-    def __init__(self, settings: Optional[Settings] = None):
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        http: Optional[HttpClientRegistry] = None,
+        images: Optional[ImageCache] = None,
+    ):
         self.settings = settings or get_settings()
+        self.http = http or get_http_client()
+        self.images = images or get_image_cache()
         
     async def create_mockup(
         self,
@@ -99,12 +107,11 @@ class MockupEngineV2:
         
         try:
             # Download the scene image
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.get(scene_image_url)
-                if resp.status_code != 200:
-                    print(f"   ⚠️ Failed to download scene image: {resp.status_code}")
-                    return None
-                scene_bytes = resp.content
+            try:
+                scene_bytes = await self.images.get(scene_image_url)
+            except Exception as e:
+                print(f"   ⚠️ Failed to download scene image: {e}")
+                return None
                 
             # Load both images
             template = Image.open(template_path).convert("RGBA")
@@ -6,9 +6,10 @@ Uses OpenAI GPT-4o or Claude API with strict prompting for consistent JSON outpu
 NEW: Also supports loading predefined story templates for faster generation.
 """
 
+import hashlib
 import json
-from typing import Optional, Literal
-from dataclasses import dataclass
+from typing import Any, Optional, Literal
+from dataclasses import asdict, dataclass, is_dataclass
 from openai import AsyncOpenAI
 
 from app.config import Settings
@@ -29,6 +30,19 @@ class StoryOutput:
     """Complete story output with 10 scenes."""
     title: str
     scenes: list[Scene]
+    template_version: str = ""
+
+
+# Version of the compact format written by StoryEngine.story_to_dict
+STORY_FORMAT_VERSION = 1
+
+
+def _template_version(template: Any) -> str:
+    """Short content hash of a story template, stored alongside the compiled story."""
+    data = asdict(template) if is_dataclass(template) else template
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    theme_id = data.get("theme_id", "unknown")
+    return f"{theme_id}@{digest.hexdigest()[:8]}"
 
 
 # Strict system prompt for consistent output
@@ -115,7 +129,8 @@ class StoryEngine:
                 
             return StoryOutput(
                 title=compiled["title_pattern"],
-                scenes=scenes
+                scenes=scenes,
+                template_version=_template_version(SPACE_TEMPLATE),
             )
         
         # Dino Explorer Theme (V2)
@@ -136,7 +151,8 @@ class StoryEngine:
                 
             return StoryOutput(
                 title=compiled["title_pattern"],
-                scenes=scenes
+                scenes=scenes,
+                template_version=_template_version(DINO_THEME),
             )
 
         # Pirate Adventure Theme (V2)
@@ -157,7 +173,8 @@ class StoryEngine:
                 
             return StoryOutput(
                 title=compiled["title_pattern"],
-                scenes=scenes
+                scenes=scenes,
+                template_version=_template_version(PIRATE_THEME),
             )
 
         # Princess Kingdom Theme (V2)
@@ -178,7 +195,8 @@ class StoryEngine:
                 
             return StoryOutput(
                 title=compiled["title_pattern"],
-                scenes=scenes
+                scenes=scenes,
+                template_version=_template_version(PRINCESS_THEME),
             )
 
         # Magic Forest Theme (V2) - also handles "magic" and "fantasy" aliases
@@ -199,7 +217,8 @@ class StoryEngine:
                 
             return StoryOutput(
                 title=compiled["title_pattern"],
-                scenes=scenes
+                scenes=scenes,
+                template_version=_template_version(FOREST_THEME),
             )
 
         # Underwater Magic Theme (V2)
@@ -220,7 +239,8 @@ class StoryEngine:
                 
             return StoryOutput(
                 title=compiled["title_pattern"],
-                scenes=scenes
+                scenes=scenes,
+                template_version=_template_version(UNDERWATER_THEME),
             )
 
         # Fallback for other themes (using old template system for now)
@@ -268,6 +288,38 @@ class StoryEngine:
         return StoryOutput(
             title=personalized.title,
             scenes=scenes,
+            template_version=f"legacy:{_template_version(template)}",
+        )
+    
+    @staticmethod
+    def story_to_dict(story: StoryOutput) -> dict:
+        """
+        Serialize a compiled story into the compact form stored with the book.
+        
+        Scenes are stored as {n: scene_number, t: narration_text, p: image_prompt}.
+        """
+        return {
+            "format": STORY_FORMAT_VERSION,
+            "title": story.title,
+            "template_version": story.template_version,
+            "scenes": [
+                {"n": s.scene_number, "t": s.narration_text, "p": s.image_prompt}
+                for s in story.scenes
+            ],
+        }
+    
+    @staticmethod
+    def story_from_dict(data: dict) -> Optional[StoryOutput]:
+        """Rebuild a StoryOutput stored by story_to_dict. Returns None for unknown formats."""
+        if not data or data.get("format") != STORY_FORMAT_VERSION:
+            return None
+        return StoryOutput(
+            title=data["title"],
+            scenes=[
+                Scene(scene_number=s["n"], narration_text=s["t"], image_prompt=s["p"])
+                for s in data.get("scenes", [])
+            ],
+            template_version=data.get("template_version", ""),
         )
     
     def story_to_pages(self, story: StoryOutput) -> list[BookPage]:
@@ -0,0 +1,3 @@
+# Storybook.ai Background Jobs
+from app.jobs.queue import Job, JobStatus, JobBackend, JOB_PRIORITY_NORMAL, JOB_PRIORITY_LOW, get_job_backend, enqueue_job
+from app.jobs.handlers import JOB_GENERATE_CHARACTER, JOB_GENERATE_PREVIEW, JOB_SPECULATE_SCENES, JOB_COMPLETE_BOOK
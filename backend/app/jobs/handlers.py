@@ -0,0 +1,32 @@
+"""
+bookloo - Job Handlers
+Maps job names to the pipeline functions that run them.
+
+Handlers are referenced by import path so that the routes can enqueue jobs
+without importing the worker (and vice versa).
+"""
+
+import importlib
+from typing import Awaitable, Callable
+
+
+JOB_GENERATE_CHARACTER = "generate_character"
+JOB_GENERATE_PREVIEW = "generate_preview"
+JOB_SPECULATE_SCENES = "speculate_scenes"
+JOB_COMPLETE_BOOK = "complete_book"
+
+HANDLERS: dict[str, str] = {
+    JOB_GENERATE_CHARACTER: "app.api.routes.books:generate_character_task",
+    JOB_GENERATE_PREVIEW: "app.api.routes.books:generate_preview_task",
+    JOB_SPECULATE_SCENES: "app.api.routes.books:speculate_remaining_scenes_task",
+    JOB_COMPLETE_BOOK: "app.api.routes.books:complete_book_task",
+}
+
+
+def resolve_handler(name: str) -> Callable[..., Awaitable[None]]:
+    """Import the coroutine function registered for a job name."""
+    path = HANDLERS.get(name)
+    if path is None:
+        raise KeyError(f"No handler registered for job '{name}'")
+    module_name, func_name = path.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
@@ -0,0 +1,545 @@
+"""
+bookloo - Job Queue
+Durable queue for the multi-minute book pipelines (character, preview, full book).
+
+Backends:
+- memory:    in-process, for tests and single-process development
+- sqlite:    local file, survives restarts on a single machine
+- firestore: production, shared by all API nodes and workers
+
+Jobs are leased by workers for a limited time and kept alive with heartbeats.
+A job whose lease expires (worker crashed) becomes available again, unless
+it has used up its attempts: then it is marked dead, so a job that keeps
+killing its worker is not leased forever.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.services.db_executor import run_db
+
+
+class JobStatus(str, Enum):
+    """Job lifecycle status."""
+    QUEUED = "queued"
+    LEASED = "leased"
+    SUCCEEDED = "succeeded"
+    DEAD = "dead"  # failed permanently (attempts exhausted)
+
+
+# Lower value = served first
+JOB_PRIORITY_NORMAL = 0
+JOB_PRIORITY_LOW = 10
+JOB_PRIORITIES = (JOB_PRIORITY_NORMAL, JOB_PRIORITY_LOW)
+
+
+@dataclass
+class Job:
+    """A unit of background work."""
+    name: str
+    payload: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = JobStatus.QUEUED.value
+    priority: int = JOB_PRIORITY_NORMAL
+    attempts: int = 0
+    max_attempts: int = 3
+    idempotency_key: Optional[str] = None
+    available_at: float = field(default_factory=time.time)
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    last_error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        known = {f for f in cls.__dataclass_fields__}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def lease_expired(self, now: float) -> bool:
+        return self.status == JobStatus.LEASED.value and (self.lease_expires_at or 0) < now
+
+    def is_exhausted(self, now: float) -> bool:
+        """Lease expired on the final attempt: the worker died, the job must not run again."""
+        return self.lease_expired(now) and self.attempts >= self.max_attempts
+
+    def is_leasable(self, now: float) -> bool:
+        if self.status == JobStatus.QUEUED.value:
+            return self.available_at <= now
+        return self.lease_expired(now) and self.attempts < self.max_attempts
+
+
+class JobBackend(ABC):
+    """Storage interface for jobs. All methods are safe to call from the event loop."""
+
+    @abstractmethod
+    async def enqueue(self, job: Job) -> tuple[Job, bool]:
+        """
+        Store a job. If a live job with the same idempotency key exists, return it
+        instead. The flag tells whether `job` was stored (False for a duplicate).
+        """
+        ...
+
+    @abstractmethod
+    async def lease(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        """Take the next available job (highest priority, oldest first)."""
+        ...
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """Extend a lease. Returns False if the worker no longer owns the job."""
+        ...
+
+    @abstractmethod
+    async def complete(self, job_id: str, worker_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_at: Optional[float]) -> None:
+        """Record a failed attempt. Requeue at `retry_at`, or mark dead if None."""
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+
+def _lease(job: Job, worker_id: str, lease_seconds: int, now: float) -> None:
+    job.status = JobStatus.LEASED.value
+    job.lease_owner = worker_id
+    job.lease_expires_at = now + lease_seconds
+    job.attempts += 1
+    job.updated_at = now
+
+
+def _bury(job: Job, now: float) -> None:
+    """Mark a job dead whose worker died on its final attempt."""
+    _fail(job, f"lease expired on attempt {job.attempts}/{job.max_attempts} (worker lost)", None, now)
+    print(f"💀 Job {job.name} ({job.id}) lost its worker on the final attempt, marked dead")
+
+
+def _fail(job: Job, error: str, retry_at: Optional[float], now: float) -> None:
+    job.last_error = error[:2000]
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.updated_at = now
+    if retry_at is None:
+        job.status = JobStatus.DEAD.value
+    else:
+        job.status = JobStatus.QUEUED.value
+        job.available_at = retry_at
+
+
+class InMemoryJobBackend(JobBackend):
+    """Process-local backend. Jobs are lost on restart."""
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._keys: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    async def enqueue(self, job: Job) -> tuple[Job, bool]:
+        with self._lock:
+            if job.idempotency_key:
+                existing = self._jobs.get(self._keys.get(job.idempotency_key, ""))
+                if existing and existing.status != JobStatus.DEAD.value:
+                    return existing, False
+                self._keys[job.idempotency_key] = job.id
+            self._jobs[job.id] = job
+            return job, True
+
+    async def lease(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            for job in self._jobs.values():
+                if job.is_exhausted(now):
+                    _bury(job, now)
+            ready = [j for j in self._jobs.values() if j.is_leasable(now)]
+            if not ready:
+                return None
+            job = min(ready, key=lambda j: (j.priority, j.available_at))
+            _lease(job, worker_id, lease_seconds, now)
+            return Job.from_dict(job.to_dict())
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.lease_owner != worker_id:
+                return False
+            job.lease_expires_at = time.time() + lease_seconds
+            return True
+
+    async def complete(self, job_id: str, worker_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job.lease_owner == worker_id:
+                job.status = JobStatus.SUCCEEDED.value
+                job.lease_owner = None
+                job.updated_at = time.time()
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_at: Optional[float]) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and job.lease_owner == worker_id:
+                _fail(job, error, retry_at, time.time())
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return Job.from_dict(job.to_dict()) if job else None
+
+
+class SQLiteJobBackend(JobBackend):
+    """Single-machine backend backed by a SQLite file (API and worker may be separate processes)."""
+
+    COLUMNS = [
+        "id", "name", "payload", "status", "priority", "attempts", "max_attempts",
+        "idempotency_key", "available_at", "lease_owner", "lease_expires_at",
+        "last_error", "created_at", "updated_at",
+    ]
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                attempts INTEGER NOT NULL,
+                max_attempts INTEGER NOT NULL,
+                idempotency_key TEXT,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires_at REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, available_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (idempotency_key)")
+        self._lock = threading.Lock()
+
+    def _row_to_job(self, row) -> Job:
+        data = dict(zip(self.COLUMNS, row))
+        data["payload"] = json.loads(data["payload"])
+        return Job.from_dict(data)
+
+    def _save(self, job: Job) -> None:
+        data = job.to_dict()
+        data["payload"] = json.dumps(job.payload)
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+            [data[c] for c in self.COLUMNS],
+        )
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        row = self._conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def enqueue(self, job: Job) -> tuple[Job, bool]:
+        def run():
+            if job.idempotency_key:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM jobs "
+                    "WHERE idempotency_key = ? AND status != ? ORDER BY created_at DESC LIMIT 1",
+                    (job.idempotency_key, JobStatus.DEAD.value),
+                ).fetchone()
+                if row:
+                    return self._row_to_job(row), False
+            self._save(job)
+            return job, True
+        return await asyncio.to_thread(self._transaction, run)
+
+    async def lease(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        def run():
+            now = time.time()
+            exhausted = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs "
+                "WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+                (JobStatus.LEASED.value, now),
+            ).fetchall()
+            for row in exhausted:
+                job = self._row_to_job(row)
+                _bury(job, now)
+                self._save(job)
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY priority, available_at LIMIT 1",
+                (JobStatus.QUEUED.value, now, JobStatus.LEASED.value, now),
+            ).fetchone()
+            if not row:
+                return None
+            job = self._row_to_job(row)
+            _lease(job, worker_id, lease_seconds, now)
+            self._save(job)
+            return job
+        return await asyncio.to_thread(self._transaction, run)
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int) -> bool:
+        def run():
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+        return await asyncio.to_thread(self._transaction, run)
+
+    async def complete(self, job_id: str, worker_id: str) -> None:
+        def run():
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (JobStatus.SUCCEEDED.value, time.time(), job_id, worker_id),
+            )
+        await asyncio.to_thread(self._transaction, run)
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_at: Optional[float]) -> None:
+        def run():
+            job = self._get(job_id)
+            if job and job.lease_owner == worker_id:
+                _fail(job, error, retry_at, time.time())
+                self._save(job)
+        await asyncio.to_thread(self._transaction, run)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(lambda: self._transaction(lambda: self._get(job_id)))
+
+
+class FirestoreJobBackend(JobBackend):
+    """
+    Production backend: jobs live in the `jobs` collection and are leased in transactions.
+
+    Queued jobs are looked up per priority level (JOB_PRIORITIES), which needs
+    the composite index jobs(status, priority, available_at); see
+    firestore.indexes.json.
+    """
+
+    COLLECTION = "jobs"
+    LEASE_CANDIDATES = 10
+
+    def __init__(self):
+        from app.services.firebase import get_db
+        self.db = get_db()
+        self.collection = self.db.collection(self.COLLECTION)
+
+    @staticmethod
+    def _key_doc_id(idempotency_key: str) -> str:
+        return "key_" + hashlib.sha1(idempotency_key.encode("utf-8")).hexdigest()
+
+    def _enqueue_sync(self, job: Job) -> tuple[Job, bool]:
+        from firebase_admin import firestore
+
+        if not job.idempotency_key:
+            self.collection.document(job.id).set(job.to_dict())
+            return job, True
+
+        # The idempotency key determines the document id, so duplicates collide
+        job.id = self._key_doc_id(job.idempotency_key)
+        ref = self.collection.document(job.id)
+
+        @firestore.transactional
+        def run(transaction) -> tuple[Job, bool]:
+            snapshot = ref.get(transaction=transaction)
+            if snapshot.exists:
+                existing = Job.from_dict(snapshot.to_dict())
+                if existing.status != JobStatus.DEAD.value:
+                    return existing, False
+            transaction.set(ref, job.to_dict())
+            return job, True
+
+        return run(self.db.transaction())
+
+    def _try_lease_sync(self, ref, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        from firebase_admin import firestore
+
+        @firestore.transactional
+        def run(transaction) -> Optional[Job]:
+            snapshot = ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            job = Job.from_dict(snapshot.to_dict())
+            now = time.time()
+            if job.is_exhausted(now):
+                _bury(job, now)
+                transaction.set(ref, job.to_dict())
+                return None
+            if not job.is_leasable(now):
+                return None  # someone else got it
+            _lease(job, worker_id, lease_seconds, now)
+            transaction.update(ref, {
+                "status": job.status,
+                "lease_owner": job.lease_owner,
+                "lease_expires_at": job.lease_expires_at,
+                "attempts": job.attempts,
+                "updated_at": job.updated_at,
+            })
+            return job
+
+        return run(self.db.transaction())
+
+    def _lease_sync(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        now = time.time()
+        expired = [
+            (Job.from_dict(doc.to_dict()), doc.reference)
+            for doc in (
+                self.collection
+                .where("status", "==", JobStatus.LEASED.value)
+                .where("lease_expires_at", "<", now)
+                .order_by("lease_expires_at")
+                .limit(self.LEASE_CANDIDATES)
+                .stream()
+            )
+        ]
+        # Exhausted jobs are buried by the lease transaction
+        for job, ref in expired:
+            if job.is_exhausted(now):
+                self._try_lease_sync(ref, worker_id, lease_seconds)
+
+        # One query per priority level: the oldest low-priority jobs must not
+        # crowd higher priorities out of the candidate window
+        for priority in JOB_PRIORITIES:
+            queued = (
+                self.collection
+                .where("status", "==", JobStatus.QUEUED.value)
+                .where("priority", "==", priority)
+                .where("available_at", "<=", now)
+                .order_by("available_at")
+                .limit(self.LEASE_CANDIDATES)
+                .stream()
+            )
+            candidates = [(Job.from_dict(doc.to_dict()), doc.reference) for doc in queued]
+            candidates += [c for c in expired if c[0].priority == priority and not c[0].is_exhausted(now)]
+            candidates.sort(key=lambda c: c[0].available_at)
+
+            for _, ref in candidates:
+                job = self._try_lease_sync(ref, worker_id, lease_seconds)
+                if job:
+                    return job
+        return None
+
+    def _update_if_owner_sync(self, job_id: str, worker_id: str, mutate) -> bool:
+        from firebase_admin import firestore
+
+        ref = self.collection.document(job_id)
+
+        @firestore.transactional
+        def run(transaction) -> bool:
+            snapshot = ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            job = Job.from_dict(snapshot.to_dict())
+            if job.lease_owner != worker_id:
+                return False
+            mutate(job)
+            transaction.set(ref, job.to_dict())
+            return True
+
+        return run(self.db.transaction())
+
+    async def enqueue(self, job: Job) -> tuple[Job, bool]:
+        return await run_db(self._enqueue_sync, job)
+
+    async def lease(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        return await run_db(self._lease_sync, worker_id, lease_seconds)
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int) -> bool:
+        def extend(job: Job):
+            job.lease_expires_at = time.time() + lease_seconds
+        return await run_db(self._update_if_owner_sync, job_id, worker_id, extend)
+
+    async def complete(self, job_id: str, worker_id: str) -> None:
+        def succeed(job: Job):
+            job.status = JobStatus.SUCCEEDED.value
+            job.lease_owner = None
+            job.updated_at = time.time()
+        await run_db(self._update_if_owner_sync, job_id, worker_id, succeed)
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_at: Optional[float]) -> None:
+        await run_db(
+            self._update_if_owner_sync, job_id, worker_id,
+            lambda job: _fail(job, error, retry_at, time.time()),
+        )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        snapshot = await run_db(self.collection.document(job_id).get)
+        return Job.from_dict(snapshot.to_dict()) if snapshot.exists else None
+
+
+_backend: Optional[JobBackend] = None
+
+
+def create_job_backend(settings: Settings) -> JobBackend:
+    """Create the backend configured by JOB_BACKEND."""
+    if settings.job_backend == "sqlite":
+        return SQLiteJobBackend(settings.job_sqlite_path)
+    if settings.job_backend == "firestore":
+        return FirestoreJobBackend()
+    return InMemoryJobBackend()
+
+
+def get_job_backend() -> JobBackend:
+    """Get the process-wide job backend."""
+    global _backend
+    if _backend is None:
+        _backend = create_job_backend(get_settings())
+    return _backend
+
+
+async def enqueue_job(
+    name: str,
+    payload: dict,
+    *,
+    priority: int = JOB_PRIORITY_NORMAL,
+    idempotency_key: Optional[str] = None,
+) -> Job:
+    """
+    Queue a pipeline job.
+
+    Args:
+        name: Registered handler name (see app.jobs.handlers)
+        payload: Keyword arguments for the handler (JSON-serialisable)
+        priority: JOB_PRIORITY_NORMAL or JOB_PRIORITY_LOW
+        idempotency_key: Jobs with the same key are only queued once (unless the first one died)
+    """
+    job = Job(
+        name=name,
+        payload=payload,
+        priority=priority,
+        max_attempts=get_settings().job_max_attempts,
+        idempotency_key=idempotency_key,
+    )
+    stored, created = await get_job_backend().enqueue(job)
+    if not created:
+        print(f"🔁 Job {name} already queued for key {idempotency_key} ({stored.id})")
+    return stored
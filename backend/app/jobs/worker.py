@@ -0,0 +1,174 @@
+"""
+bookloo - Job Worker
+Leases jobs from the queue and runs their handlers.
+
+- Up to `worker_concurrency` jobs run at once per worker
+- A heartbeat keeps each lease alive while the job runs
+- Failed jobs are retried with exponential backoff, then marked dead
+"""
+
+import asyncio
+import os
+import socket
+import time
+import traceback
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.jobs.handlers import resolve_handler
+from app.jobs.queue import Job, JobBackend, get_job_backend
+
+
+# The job the current pipeline runs in (None when called directly)
+current_job: ContextVar[Optional[Job]] = ContextVar("current_job", default=None)
+
+
+def is_final_attempt() -> bool:
+    """
+    Whether a failure now is permanent.
+
+    Pipelines only mark their book FAILED on the final attempt; earlier
+    failures are re-raised so the worker can retry the job.
+    """
+    job = current_job.get()
+    return job is None or job.attempts >= job.max_attempts
+
+
+class JobWorker:
+    """Polls the job backend and runs leased jobs concurrently."""
+
+    def __init__(self, settings: Optional[Settings] = None, backend: Optional[JobBackend] = None):
+        self.settings = settings or get_settings()
+        self.backend = backend or get_job_backend()
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = max(1, self.settings.worker_concurrency)
+        self._running: dict[str, asyncio.Task] = {}
+        self._lost_leases: set[str] = set()
+        self._stopping = asyncio.Event()
+
+        # Metrics
+        self.succeeded = 0
+        self.retried = 0
+        self.dead = 0
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = self.settings.job_retry_base_seconds * (2 ** max(0, attempts - 1))
+        return min(delay, self.settings.job_retry_max_seconds)
+
+    async def run(self) -> None:
+        """Run until stop() is called."""
+        print(f"👷 Job worker {self.worker_id} started ({self.concurrency} slots)")
+        while not self._stopping.is_set():
+            job = None
+            if len(self._running) < self.concurrency:
+                try:
+                    job = await self.backend.lease(self.worker_id, self.settings.job_lease_seconds)
+                except Exception as e:
+                    print(f"⚠️ Job lease failed: {e}")
+
+            if job:
+                self._running[job.id] = asyncio.create_task(self._execute(job))
+                continue  # look for more work right away
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.settings.worker_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        """Stop leasing and hand running jobs back to the queue."""
+        self._stopping.set()
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"👷 Job worker {self.worker_id} stopped")
+
+    async def _heartbeat(self, job: Job, task: asyncio.Task) -> None:
+        interval = max(1, self.settings.job_heartbeat_seconds)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                owned = await self.backend.heartbeat(job.id, self.worker_id, self.settings.job_lease_seconds)
+            except Exception as e:
+                print(f"⚠️ Heartbeat for job {job.id} failed: {e}")
+                continue
+            if not owned:
+                # Lease expired and another worker took over: stop duplicating the work
+                print(f"⚠️ Lost lease on job {job.id} ({job.name}), cancelling")
+                self._lost_leases.add(job.id)
+                task.cancel()
+                return
+
+    async def _execute(self, job: Job) -> None:
+        task = asyncio.current_task()
+        heartbeat = asyncio.create_task(self._heartbeat(job, task))
+        current_job.set(job)
+        started = time.monotonic()
+        print(f"▶️ Job {job.name} ({job.id}) attempt {job.attempts}/{job.max_attempts}")
+
+        try:
+            handler = resolve_handler(job.name)
+            await handler(**job.payload)
+            await self.backend.complete(job.id, self.worker_id)
+            self.succeeded += 1
+            print(f"✅ Job {job.name} ({job.id}) done in {time.monotonic() - started:.1f}s")
+
+        except asyncio.CancelledError:
+            if self._stopping.is_set():
+                # Shutdown: requeue now so another worker picks it up
+                await asyncio.shield(self.backend.fail(job.id, self.worker_id, "worker shutdown", time.time()))
+            elif job.id not in self._lost_leases:
+                # Not cancelled by us: something the handler awaited was
+                # cancelled (e.g. a terminated render). Count it as a failure
+                # instead of leaving the job leased until the lease expires.
+                traceback.print_exc()
+                await asyncio.shield(self._fail(job, "cancelled"))
+
+        except Exception as e:
+            traceback.print_exc()
+            await self._fail(job, str(e))
+
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job.id, None)
+            self._lost_leases.discard(job.id)
+
+    async def _fail(self, job: Job, error: str) -> None:
+        """Retry the job with backoff, or mark it dead after its last attempt."""
+        if job.attempts >= job.max_attempts:
+            await self.backend.fail(job.id, self.worker_id, error, None)
+            self.dead += 1
+            print(f"💀 Job {job.name} ({job.id}) failed permanently: {error}")
+        else:
+            delay = self._retry_delay(job.attempts)
+            await self.backend.fail(job.id, self.worker_id, error, time.time() + delay)
+            self.retried += 1
+            print(f"🔁 Job {job.name} ({job.id}) failed, retrying in {delay:.0f}s: {error}")
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+
+_workers: list[JobWorker] = []
+
+
+def start_worker(settings: Optional[Settings] = None) -> tuple[JobWorker, asyncio.Task]:
+    """Create a worker and run it as a task on the current loop."""
+    worker = JobWorker(settings)
+    _workers.append(worker)
+    return worker, asyncio.create_task(worker.run())
+
+
+def job_worker_stats() -> list[dict]:
+    """Snapshot of the workers in this process, for the metrics endpoint."""
+    return [worker.stats() for worker in _workers]
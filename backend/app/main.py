@@ -3,6 +3,7 @@ bookloo - FastAPI Application Entry Point
 Personalized children's book generator
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +11,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
 from app.api.routes import books, health, assets, payment, webhook
 from app.services.firebase import initialize_firebase
+from app.services.http_client import init_http_client, close_http_client
+from app.services.render_pool import shutdown_render_pool
+from app.services.status_writer import flush_status_writes
+from app.services.db_executor import shutdown_db_executor
+from app.services.storage_uploads import shutdown_storage_executor
+from app.services.gemini import shutdown_gemini
+from app.services.speculation import run_speculation_gc_loop
+from app.services.book_cache import start_book_cache_listener
+from app.services.asset_registry import install_reload_handler, remove_reload_handler, warm_asset_registry
+from app.jobs.worker import start_worker
 import pillow_heif
 
 # Register HEIF opener for Pillow (to support mobile iPhone uploads)
@@ -22,11 +33,44 @@ async def lifespan(app: FastAPI):
     # Startup
     settings = get_settings()
     initialize_firebase(settings)
+    init_http_client(settings)
     print(f"{settings.app_name} starting up...")
     
-    yield
+    speculation_gc = None
+    if settings.speculative_generation_enabled:
+        speculation_gc = asyncio.create_task(run_speculation_gc_loop(settings))
     
+    # Drop cached books written by other nodes
+    book_cache_listener = start_book_cache_listener(settings)
+
+    # Run book pipelines in this process unless dedicated workers are deployed
+    worker = worker_task = asset_warmup = None
+    if settings.run_embedded_worker:
+        worker, worker_task = start_worker(settings)
+        # Mockup templates/style references decode in the background;
+        # SIGHUP reloads them
+        asset_warmup = asyncio.create_task(warm_asset_registry())
+        install_reload_handler()
+
+    yield
+
     # Shutdown
+    if worker:
+        await worker.stop()
+        await worker_task
+    if speculation_gc:
+        speculation_gc.cancel()
+    if asset_warmup:
+        asset_warmup.cancel()
+        remove_reload_handler()
+    if book_cache_listener:
+        book_cache_listener.cancel()
+    await flush_status_writes()
+    await close_http_client()
+    shutdown_render_pool()
+    shutdown_db_executor()
+    shutdown_storage_executor()
+    shutdown_gemini()
     print(f"{settings.app_name} shutting down...")
 
 
@@ -20,6 +20,13 @@ class BookStatus(str, Enum):
     FAILED = "failed"
 
 
+class PipelineStage(str, Enum):
+    """Pipeline a book was in when it failed (decides what /retry runs)."""
+    CHARACTER = "character"
+    PREVIEW = "preview"
+    COMPLETE = "complete"
+
+
 class BookTheme(str, Enum):
     """Available book themes."""
     ADVENTURE = "adventure"
@@ -52,12 +59,48 @@ class BookCreateRequest(BaseModel):
     style: Optional[str] = "pixar_3d"
 
 
+class ImageVariant(BaseModel):
+    """One derivative size of an image."""
+    width: int
+    webp: str
+    jpeg: str  # fallback for clients without WebP
+
+
+class ImageDerivatives(BaseModel):
+    """Responsive sizes of a stored image (thumbnail for tiles, medium for galleries)."""
+    thumb: ImageVariant
+    medium: ImageVariant
+    full: ImageVariant
+
+
 class PreviewScene(BaseModel):
     """A single preview scene (mockup or locked)."""
     scene_id: int
     status: Literal["locked", "unlocked", "generating"]
     image_url: Optional[str] = None
-    thumbnail_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None  # derivatives.thumb.jpeg, else image_url
+    derivatives: Optional[ImageDerivatives] = None
+
+
+class PipelineCheckpoints(BaseModel):
+    """
+    Finished pipeline steps of a book (internal).
+    Retries and crash recovery only redo what is missing here.
+    The story checkpoint is BookResponse.story, the upload checkpoint is pdf_url.
+    """
+    scenes: dict[str, str] = {}  # scene_<n> -> stored scene image URL
+    mockups: dict[str, str] = {}  # scene_<n> -> stored mockup URL
+    failed_stage: Optional[PipelineStage] = None
+
+    @staticmethod
+    def _by_scene_number(urls: dict[str, str]) -> dict[int, str]:
+        return {int(key.removeprefix("scene_")): url for key, url in urls.items() if url}
+
+    def scene_urls(self) -> dict[int, str]:
+        return self._by_scene_number(self.scenes)
+
+    def mockup_urls(self) -> dict[int, str]:
+        return self._by_scene_number(self.mockups)
 
 
 class BookResponse(BaseModel):
@@ -84,10 +127,37 @@ class BookResponse(BaseModel):
     preview_scenes: list[PreviewScene] = [] 
     
     consistency_string: Optional[str] = None
+    
+    # Compiled story (StoryEngine.story_to_dict) - internal, never sent to clients
+    story: Optional[dict] = Field(default=None, exclude=True)
+    # Privately stored speculative scenes (scene_<n> -> blob path) - internal
+    speculative_scenes: dict[str, str] = Field(default_factory=dict, exclude=True)
+    # Finished pipeline steps - internal
+    checkpoints: PipelineCheckpoints = Field(default_factory=PipelineCheckpoints, exclude=True)
+    
+    created_at: datetime
+    updated_at: datetime
+
+
+
+class BookSummary(BaseModel):
+    """Lightweight book for list views (no pages, story or scenes)."""
+    id: str
+    child_name: str
+    theme: str
+    status: BookStatus
+    progress: int = 0
+    cover_image_url: Optional[str] = None # Cover, or the first preview image
+    pdf_url: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
 
+class BookListResponse(BaseModel):
+    """One page of a user's books, newest first."""
+    books: list[BookSummary]
+    next_cursor: Optional[str] = None # Pass as start_after for the next page; None on the last page
+
 
 class BookStatusResponse(BaseModel):
     """Minimal status response for polling."""
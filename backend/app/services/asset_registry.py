@@ -0,0 +1,179 @@
+"""
+bookloo - Asset Registry
+Decoded mockup templates and style references, held in memory per process
+so mockups neither re-read, re-download nor re-decode them.
+
+- Engines register their assets (registry key -> file path or URL); the
+  registry is warmed at startup and loads anything else on first use
+- Images are kept decoded, converted (RGB, or RGBA with transparency) and
+  downscaled to ASSET_REGISTRY_MAX_EDGE, the size the Gemini mockups need
+- Decoded pixels are bounded by ASSET_REGISTRY_MAX_MB; assets beyond it are
+  served but not kept
+- URL sources are fetched with the shared HTTP client, not through the
+  image cache: the cache treats URLs as immutable, but a style reference may
+  be replaced in place
+- reload() drops everything and warms again; processes running the job
+  worker do it on SIGHUP (see install_reload_handler)
+
+Registered images are shared between concurrent mockups: treat them as
+read-only.
+"""
+
+import asyncio
+import signal
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.services.http_client import HttpClientRegistry, get_http_client
+
+
+class AssetRegistry:
+    """Registry key -> decoded PIL image, with the source to (re)load it from."""
+
+    def __init__(self, settings: Optional[Settings] = None, http: Optional[HttpClientRegistry] = None):
+        self.settings = settings or get_settings()
+        self.http = http or get_http_client()
+        self.max_edge = self.settings.asset_registry_max_edge
+        self.budget = self.settings.asset_registry_max_mb * 1024 * 1024
+
+        self._sources: dict[str, str] = {}
+        self._assets: dict = {}  # key -> PIL image
+        self._sizes: dict[str, int] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self.hits = 0
+        self.loads = 0
+        self.failures = 0
+        self.over_budget = 0
+
+    def register(self, sources: dict[str, str]) -> None:
+        """Add assets (key -> file path or http(s) URL); existing keys keep their image."""
+        self._sources.update(sources)
+
+    async def get(self, key: str):
+        """The decoded image, or None if the key is unknown or its source cannot be read."""
+        image = self._assets.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        if key not in self._sources:
+            return None
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.create_task(self._load(key))
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def warm(self) -> None:
+        """Load every registered asset now."""
+        await asyncio.gather(*(self.get(key) for key in list(self._sources)))
+        print(f"🖼️ Asset registry warm: {len(self._assets)}/{len(self._sources)} assets, "
+              f"{sum(self._sizes.values()) / 1024 / 1024:.0f} MB")
+
+    async def reload(self) -> None:
+        """Forget all decoded images and load them again from their sources."""
+        self._assets.clear()
+        self._sizes.clear()
+        await self.warm()
+
+    def stats(self) -> dict:
+        return {
+            "assets": len(self._assets),
+            "registered": len(self._sources),
+            "bytes": sum(self._sizes.values()),
+            "hits": self.hits,
+            "loads": self.loads,
+            "failures": self.failures,
+            "over_budget": self.over_budget,
+        }
+
+    # ---------- internals ----------
+
+    async def _load(self, key: str):
+        source = self._sources[key]
+        try:
+            if source.startswith(("http://", "https://")):
+                data = await self.http.download(source)
+            else:
+                path = Path(source)
+                if not path.exists():
+                    raise FileNotFoundError(source)
+                data = await asyncio.to_thread(path.read_bytes)
+            image = await asyncio.to_thread(self._decode, data)
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Asset {key} could not be loaded: {e}")
+            return None
+
+        self.loads += 1
+        size = image.width * image.height * len(image.getbands())
+        if sum(self._sizes.values()) + size > self.budget:
+            self.over_budget += 1
+            print(f"⚠️ Asset {key} exceeds the registry budget, not kept")
+            return image
+        self._assets[key] = image
+        self._sizes[key] = size
+        return image
+
+    def _decode(self, data: bytes):
+        from PIL import Image
+
+        image = Image.open(BytesIO(data))
+        transparent = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+        if max(image.size) > self.max_edge:
+            image.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+        image.load()
+        return image
+
+
+_registry: Optional[AssetRegistry] = None
+
+
+def get_asset_registry() -> AssetRegistry:
+    """Get the process-wide asset registry."""
+    global _registry
+    if _registry is None:
+        _registry = AssetRegistry(get_settings())
+    return _registry
+
+
+async def warm_asset_registry() -> None:
+    """Register the mockup engines' assets and load them (called on startup)."""
+    from app.engines.ai_mockup_engine_v3 import AIMockupEngineV3
+
+    registry = get_asset_registry()
+    registry.register(AIMockupEngineV3.asset_sources())
+    if registry.budget <= 0:
+        return
+    try:
+        await registry.warm()
+    except Exception as e:
+        print(f"⚠️ Asset registry warm-up failed, loading on demand: {e}")
+
+
+_reloads: set[asyncio.Task] = set()
+
+
+def install_reload_handler() -> None:
+    """Reload the registry on SIGHUP (replaced templates/style references, no restart)."""
+    loop = asyncio.get_running_loop()
+
+    def reload_assets():
+        task = loop.create_task(get_asset_registry().reload())
+        _reloads.add(task)
+        task.add_done_callback(_reloads.discard)
+
+    loop.add_signal_handler(signal.SIGHUP, reload_assets)
+
+
+def remove_reload_handler() -> None:
+    asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+
+
+def asset_registry_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    return _registry.stats() if _registry else {}
@@ -0,0 +1,166 @@
+"""
+bookloo - Book Cache
+Per-process read-through cache for BookRepository.get_book.
+
+- TTL + LRU bounded by entry count
+- BookRepository writes invalidate (or, for status updates, patch) entries
+- Across nodes, a Firestore query listener on recently updated books
+  invalidates entries written elsewhere; the TTL bounds staleness if it lags
+- Reads that raced a write are not cached (per-book version counter)
+
+Pipelines that decide on a book's state (job tasks, webhooks) read with
+`use_cache=False`.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.models.book import BookResponse
+
+
+class BookCache:
+    """TTL/LRU map of book_id -> BookResponse (callers get copies)."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.enabled = self.settings.book_cache_enabled
+        self.ttl = self.settings.book_cache_ttl_seconds
+        self.max_entries = self.settings.book_cache_max_entries
+
+        self._entries: "OrderedDict[str, tuple[float, BookResponse]]" = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.listener_invalidations = 0
+
+    @property
+    def use_listener(self) -> bool:
+        mode = self.settings.book_cache_listener
+        if mode == "auto":
+            # Writes only happen in this process when it also runs every job
+            return not (self.settings.run_embedded_worker and self.settings.job_backend == "memory")
+        return mode == "always"
+
+    def get(self, book_id: str) -> Optional[BookResponse]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(book_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(book_id, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(book_id)
+        self.hits += 1
+        return entry[1].model_copy(deep=True)
+
+    def version(self, book_id: str) -> int:
+        """Take before reading Firestore; pass to put()."""
+        return self._versions.get(book_id, 0)
+
+    def put(self, book_id: str, book: BookResponse, version: int) -> None:
+        if not self.enabled or self._versions.get(book_id, 0) != version:
+            return  # a write happened while we were reading
+        self._entries[book_id] = (time.monotonic() + self.ttl, book.model_copy(deep=True))
+        self._entries.move_to_end(book_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, book_id: str) -> None:
+        self._bump(book_id)
+        if self._entries.pop(book_id, None) is not None:
+            self.invalidations += 1
+
+    def patch(self, book_id: str, **fields) -> None:
+        """Apply a write to the cached copy instead of dropping it."""
+        self._bump(book_id)
+        entry = self._entries.get(book_id)
+        if entry is not None:
+            for name, value in fields.items():
+                setattr(entry[1], name, value)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "listener_invalidations": self.listener_invalidations,
+        }
+
+    def _bump(self, book_id: str) -> None:
+        self._versions[book_id] = self._versions.get(book_id, 0) + 1
+        if len(self._versions) > self.max_entries * 4:
+            # Versions only matter for reads in flight; keep the cached ones
+            self._versions = {k: v for k, v in self._versions.items() if k in self._entries}
+
+    # ---------- Firestore listener ----------
+
+    def start_listener(self):
+        """Watch books updated from now on; returns the watch (unsubscribe to stop)."""
+        from app.services.firebase import BookRepository, get_db
+
+        loop = asyncio.get_running_loop()
+        since = datetime.utcnow() - timedelta(seconds=self.ttl)
+
+        def on_snapshot(docs, changes, read_time):
+            # Runs on the listener's thread
+            for change in changes:
+                loop.call_soon_threadsafe(self._on_remote_change, change.document.id)
+
+        query = get_db().collection(BookRepository.COLLECTION).where("updated_at", ">=", since)
+        return query.on_snapshot(on_snapshot)
+
+    def _on_remote_change(self, book_id: str) -> None:
+        if book_id in self._entries:
+            self.listener_invalidations += 1
+        self.invalidate(book_id)
+
+
+_cache: Optional[BookCache] = None
+
+
+def get_book_cache() -> BookCache:
+    """Get the process-wide book cache."""
+    global _cache
+    if _cache is None:
+        _cache = BookCache(get_settings())
+    return _cache
+
+
+async def run_book_cache_listener(settings: Settings) -> None:
+    """
+    Keep the cross-node invalidation listener running. The watched query only
+    grows, so it is re-created every BOOK_CACHE_LISTENER_WINDOW_MINUTES.
+    """
+    cache = get_book_cache()
+    while True:
+        try:
+            watch = cache.start_listener()
+        except Exception as e:
+            print(f"⚠️ Book cache listener failed to start: {e}")
+            await asyncio.sleep(60)
+            continue
+        try:
+            await asyncio.sleep(settings.book_cache_listener_window_minutes * 60)
+        finally:
+            watch.unsubscribe()
+
+
+def start_book_cache_listener(settings: Settings) -> Optional[asyncio.Task]:
+    """Start the listener loop if this process needs it (see BookCache.use_listener)."""
+    cache = get_book_cache()
+    if not cache.enabled or not cache.use_listener:
+        return None
+    return asyncio.create_task(run_book_cache_listener(settings))
+
+
+def book_cache_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    return _cache.stats() if _cache else {}
@@ -0,0 +1,54 @@
+"""
+bookloo - Firestore Executor
+The Firebase Admin SDK's Firestore client is synchronous. Every call goes
+through a dedicated, bounded thread pool so it neither blocks the event loop
+nor competes with `asyncio.to_thread` users for the default executor.
+
+One Firestore client per process (see firebase.get_db) is shared by all
+threads; it is thread-safe and multiplexes requests over its gRPC channel.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import get_settings
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Get the process-wide Firestore executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, get_settings().firestore_executor_workers),
+            thread_name_prefix="firestore",
+        )
+    return _executor
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking Firestore call on the Firestore executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_db_executor() -> None:
+    """Let queued calls finish, then stop the threads (called on shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def db_executor_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    if _executor is None:
+        return {}
+    return {
+        "workers": _executor._max_workers,
+        "queued": _executor._work_queue.qsize(),
+    }
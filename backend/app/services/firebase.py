@@ -3,7 +3,10 @@ Storybook.ai - Firebase Service
 Handles Firestore database and Cloud Storage operations.
 """
 
+import asyncio
+import hashlib
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 from pathlib import Path
@@ -11,8 +14,19 @@ from pathlib import Path
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
 
-from app.config import Settings
-from app.models.book import BookResponse, BookStatus, BookPage
+from app.config import Settings, get_settings
+from app.models.book import (
+    BookResponse, BookSummary, BookStatus, BookPage, ImageDerivatives, ImageVariant,
+    PipelineCheckpoints, PipelineStage,
+)
+from app.services.http_client import HttpClientRegistry, get_http_client
+from app.services.image_cache import ImageCache, get_image_cache
+from app.services.book_cache import get_book_cache
+from app.services.db_executor import run_db
+from app.services.progress import publish_progress, status_event
+from app.services.render_pool import make_image_derivatives, run_in_render_pool
+from app.services.status_writer import get_status_writer
+from app.services.storage_uploads import run_storage, upload_blob, upload_blob_file
 
 
 # Global Firebase app instance
@@ -76,14 +90,56 @@ def get_bucket():
 
 
 class BookRepository:
-    """Repository for book CRUD operations in Firestore."""
+    """
+    Repository for book CRUD operations in Firestore.
+    
+    Storage layout (layout_version 2): `books/{id}` holds status and small
+    fields only; heavy data lives in `books/{id}/content/{pages,preview,story}`.
+    Books written before still carry these fields inline and are read as-is
+    (see migrate_book_content.py).
+    """
     
     COLLECTION = "books"
+    CONTENT_COLLECTION = "content"
+    LAYOUT_VERSION = 2
+    # Content document -> fields it holds
+    CONTENT_FIELDS = {
+        "pages": ["pages"],
+        "preview": ["preview_scenes", "preview_images"],
+        "story": ["story"],
+    }
     
     def __init__(self):
         self.db = get_db()
         self.collection = self.db.collection(self.COLLECTION)
     
+    def content_ref(self, book_id: str, name: str):
+        return self.collection.document(book_id).collection(self.CONTENT_COLLECTION).document(name)
+    
+    async def _read_content(self, book_id: str, data: dict) -> dict:
+        """Read shim: merge the content documents over legacy inline fields."""
+        if data.get("layout_version", 1) < self.LAYOUT_VERSION:
+            return data
+        refs = [self.content_ref(book_id, name) for name in self.CONTENT_FIELDS]
+        for snapshot in await run_db(lambda: list(self.db.get_all(refs))):
+            if snapshot.exists:
+                data.update(snapshot.to_dict())
+        return data
+    
+    @asynccontextmanager
+    async def unit_of_work(self, book_id: str):
+        """
+        Gather changes to one book and commit them in a single batch when the
+        block exits without an error (nothing is written otherwise).
+        
+            async with repo.unit_of_work(book_id) as work:
+                work.set_character_data(url, consistency_str)
+                work.set_status(BookStatus.WAITING_FOR_APPROVAL, 50)
+        """
+        work = BookUnitOfWork(self, book_id)
+        yield work
+        await work.commit()
+    
     async def create_book(
         self,
         child_name: str,
@@ -101,7 +157,7 @@ class BookRepository:
         now = datetime.utcnow()
         
         doc_ref = self.collection.document()
-        doc_ref.set({
+        await run_db(doc_ref.set, {
             "child_name": child_name,
             "theme": theme,
             "style": style,
@@ -109,27 +165,39 @@ class BookRepository:
             "child_photo_url": child_photo_url,
             "status": BookStatus.CREATING_CHARACTER.value,
             "progress": 0,
-            "pages": [],
             "pdf_url": None,
             "cover_image_url": None,
             "character_image_url": None, # Will be set by init task
-            "preview_images": [], 
+            "preview_cover_url": None, # First preview image (list views)
+            "layout_version": self.LAYOUT_VERSION,
             "created_at": now,
             "updated_at": now,
         })
         
         return doc_ref.id
     
-    async def get_book(self, book_id: str) -> Optional[BookResponse]:
-        """Get a book by ID."""
-        doc = self.collection.document(book_id).get()
+    async def get_book(self, book_id: str, use_cache: bool = True) -> Optional[BookResponse]:
+        """
+        Get a book by ID.
+        
+        Args:
+            use_cache: False for reads that decide what a pipeline does next
+        """
+        cache = get_book_cache()
+        if use_cache:
+            book = cache.get(book_id)
+            if book is not None:
+                return book
+        
+        version = cache.version(book_id)
+        doc = await run_db(self.collection.document(book_id).get)
         
         if not doc.exists:
             return None
         
-        data = doc.to_dict()
+        data = await self._read_content(book_id, doc.to_dict())
         
-        return BookResponse(
+        book = BookResponse(
             id=doc.id,
             user_id=data.get("user_id", "unknown"),
             child_name=data["child_name"],
@@ -146,50 +214,83 @@ class BookRepository:
             preview_scenes=data.get("preview_scenes", []),
             master_character_url=data.get("master_character_url"),
             consistency_string=data.get("consistency_string"),
+            story=data.get("story"),
+            speculative_scenes=data.get("speculative_scenes", {}),
+            checkpoints=PipelineCheckpoints(**data.get("checkpoints", {})),
             created_at=data["created_at"],
             updated_at=data["updated_at"],
         )
+        cache.put(book_id, book, version)
+        return book
 
-    async def get_user_books(self, user_id: str) -> list[BookResponse]:
-        """Get all books for a specific user."""
+    # Fields the dashboard needs; `pages`, `story` etc. stay on the server
+    SUMMARY_FIELDS = [
+        "child_name", "theme", "status", "progress", "cover_image_url",
+        "preview_cover_url", "preview_images", "pdf_url", "created_at", "updated_at",
+    ]
+    
+    async def list_user_books(
+        self,
+        user_id: str,
+        limit: int = 20,
+        start_after: Optional[str] = None,
+    ) -> tuple[list[BookSummary], Optional[str]]:
+        """
+        Get one page of a user's books, newest first, as summaries.
+        
+        Args:
+            limit: Page size
+            start_after: Cursor from the previous page (the last book's ID)
+        
+        Returns:
+            (books, cursor for the next page or None)
+        
+        Raises:
+            ValueError: If the cursor does not name an existing book
+        """
         # Query by user_id and sort by created_at desc
         query = (
             self.collection
             .where("user_id", "==", user_id)
             .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .select(self.SUMMARY_FIELDS)
+            .limit(limit)
         )
-        docs = query.stream()
+        if start_after:
+            cursor = await run_db(self.collection.document(start_after).get, field_paths=["created_at"])
+            if not cursor.exists:
+                raise ValueError(f"Unknown cursor: {start_after}")
+            query = query.start_after(cursor)
+        docs = await run_db(lambda: list(query.stream()))
         
         books = []
         for doc in docs:
             data = doc.to_dict()
-            # Safely create BookResponse (handling potential schema evolution issues if needed)
+            # Skip malformed documents instead of failing the whole page
             try:
-                books.append(BookResponse(
+                # preview_images is only inline on books not yet migrated
+                preview_images = data.get("preview_images") or []
+                books.append(BookSummary(
                     id=doc.id,
-                    user_id=data.get("user_id", user_id),
                     child_name=data["child_name"],
                     theme=data["theme"],
-                    style=data.get("style", "pixar_3d"),
                     status=BookStatus(data["status"]),
                     progress=data.get("progress", 0),
-                    pages=[BookPage(**p) for p in data.get("pages", [])],
+                    cover_image_url=(
+                        data.get("cover_image_url")
+                        or data.get("preview_cover_url")
+                        or (preview_images[0] if preview_images else None)
+                    ),
                     pdf_url=data.get("pdf_url"),
-                    cover_image_url=data.get("cover_image_url"),
-                    child_photo_url=data.get("child_photo_url"),
-                    character_image_url=data.get("character_image_url"),
-                    preview_images=data.get("preview_images", []),
-                    preview_scenes=data.get("preview_scenes", []),
-                    master_character_url=data.get("master_character_url"),
-                    consistency_string=data.get("consistency_string"),
                     created_at=data["created_at"],
                     updated_at=data["updated_at"],
                 ))
             except Exception as e:
                 print(f"Skipping malformed book {doc.id}: {e}")
                 continue
-                
-        return books
+        
+        next_cursor = docs[-1].id if len(docs) == limit else None
+        return books, next_cursor
     
     async def update_character_data(
         self,
@@ -198,11 +299,13 @@ class BookRepository:
         consistency_str: str,
     ) -> None:
         """Update character reference data."""
-        self.collection.document(book_id).update({
-            "master_character_url": master_url,
-            "consistency_string": consistency_str,
-            "updated_at": datetime.utcnow(),
-        })
+        async with self.unit_of_work(book_id) as work:
+            work.set_character_data(master_url, consistency_str)
+    
+    async def set_character_image(self, book_id: str, character_url: str) -> None:
+        """Publish the approved-ready character portrait for the frontend."""
+        async with self.unit_of_work(book_id) as work:
+            work.set_character_image(character_url)
     
     async def update_status(
         self,
@@ -211,15 +314,45 @@ class BookRepository:
         progress: int = 0,
         message: Optional[str] = None,
     ) -> None:
-        """Update book generation status."""
+        """
+        Update book generation progress. Progress-only changes are coalesced
+        (see StatusWriter); terminal states are written immediately.
+        Stream subscribers always get every update.
+        
+        Stage transitions that change other fields too go through
+        unit_of_work instead.
+        """
         update_data = {
             "status": status.value,
             "progress": progress,
+            "status_message": message,  # cleared with each status change
             "updated_at": datetime.utcnow(),
         }
-        if message:
-            update_data["status_message"] = message
-        self.collection.document(book_id).update(update_data)
+        await get_status_writer().update(self.collection.document(book_id), book_id, status, update_data)
+        # Patched rather than dropped: the write itself may still be buffered
+        get_book_cache().patch(book_id, status=status, progress=progress, updated_at=update_data["updated_at"])
+        publish_progress(book_id, status_event(status, progress, message))
+    
+    async def mark_failed(self, book_id: str, stage: PipelineStage) -> None:
+        """Set FAILED and remember which pipeline failed, so /retry can resume it."""
+        async with self.unit_of_work(book_id) as work:
+            work.mark_failed(stage)
+    
+    async def save_checkpoint(
+        self,
+        book_id: str,
+        step: str,
+        scene_number: int,
+        url: str,
+    ) -> None:
+        """Record a finished per-scene step ("scenes" or "mockups")."""
+        async with self.unit_of_work(book_id) as work:
+            work.save_checkpoint(step, scene_number, url)
+    
+    async def clear_checkpoints(self, book_id: str) -> None:
+        """Forget the story and all finished steps (e.g. after a new character)."""
+        async with self.unit_of_work(book_id) as work:
+            work.clear_checkpoints()
     
     async def update_pages(
         self,
@@ -227,10 +360,18 @@ class BookRepository:
         pages: list[BookPage],
     ) -> None:
         """Update book pages."""
-        self.collection.document(book_id).update({
-            "pages": [p.model_dump() for p in pages],
-            "updated_at": datetime.utcnow(),
-        })
+        async with self.unit_of_work(book_id) as work:
+            work.set_pages(pages)
+    
+    async def save_story(
+        self,
+        book_id: str,
+        story: dict,
+        pages: list[BookPage],
+    ) -> None:
+        """Store the compiled story (compact form) together with its pages."""
+        async with self.unit_of_work(book_id) as work:
+            work.set_story(story, pages)
     
     async def update_preview_images(
         self,
@@ -238,10 +379,8 @@ class BookRepository:
         preview_images: list[str],
     ) -> None:
         """Update preview image URLs."""
-        self.collection.document(book_id).update({
-            "preview_images": preview_images,
-            "updated_at": datetime.utcnow(),
-        })
+        async with self.unit_of_work(book_id) as work:
+            work.set_preview_images(preview_images)
 
     async def update_preview_scenes(
         self,
@@ -250,27 +389,148 @@ class BookRepository:
         preview_images: list[str],
     ) -> None:
         """Update preview scenes structure and images list."""
-        self.collection.document(book_id).update({
-            "preview_scenes": preview_scenes,
-            "preview_images": preview_images,
-            "updated_at": datetime.utcnow(),
-        })
+        async with self.unit_of_work(book_id) as work:
+            work.set_preview_scenes(preview_scenes, preview_images)
     
     async def set_pdf_url(self, book_id: str, pdf_url: str) -> None:
         """Set the completed PDF URL."""
-        self.collection.document(book_id).update({
-            "pdf_url": pdf_url,
-            "status": BookStatus.COMPLETED.value,
-            "progress": 100,
-            "updated_at": datetime.utcnow(),
+        async with self.unit_of_work(book_id) as work:
+            work.set_pdf_url(pdf_url)
+
+
+class BookUnitOfWork:
+    """
+    Changes to one book, gathered by BookRepository.unit_of_work and written
+    as one Firestore batch: the book document update plus its content
+    documents. Cache invalidation and progress events follow the commit.
+    """
+    
+    def __init__(self, repo: BookRepository, book_id: str):
+        self.repo = repo
+        self.book_id = book_id
+        self.fields: dict = {}  # book document update (dotted paths allowed)
+        self.content: dict[str, dict] = {}  # content document -> fields to replace
+        self.deleted_content: set[str] = set()
+        self.event: dict = {}  # progress event published after the commit
+        self.status_changed = False
+    
+    def set_status(self, status: BookStatus, progress: int = 0, message: Optional[str] = None) -> None:
+        """Stage transition: written with the batch, replacing any buffered progress."""
+        self.fields.update({
+            "status": status.value,
+            "progress": progress,
+            "status_message": message,
+        })
+        self.event.update(status_event(status, progress, message))
+        self.status_changed = True
+    
+    def set_character_data(self, master_url: str, consistency_str: str) -> None:
+        self.fields.update({
+            "master_character_url": master_url,
+            "consistency_string": consistency_str,
         })
+    
+    def set_character_image(self, character_url: str) -> None:
+        self.fields.update({
+            "character_image_url": character_url,
+            "master_character_url": character_url,
+        })
+        self.event["character_image_url"] = character_url
+    
+    def mark_failed(self, stage: PipelineStage) -> None:
+        self.set_status(BookStatus.FAILED, 0)
+        self.fields["checkpoints.failed_stage"] = stage.value
+    
+    def save_checkpoint(self, step: str, scene_number: int, url: str) -> None:
+        self.fields[f"checkpoints.{step}.scene_{scene_number}"] = url
+    
+    def clear_checkpoints(self) -> None:
+        """Forget the story and all finished steps; call before setting new ones."""
+        # A path and its parent cannot be in the same update
+        self.fields = {k: v for k, v in self.fields.items() if not k.startswith("checkpoints.")}
+        self.fields["checkpoints"] = firestore.DELETE_FIELD
+        self.fields["story"] = firestore.DELETE_FIELD  # legacy inline copy
+        self.content.pop("story", None)
+        self.deleted_content.add("story")
+    
+    def set_pages(self, pages: list[BookPage]) -> None:
+        self._set_content("pages", {"pages": [p.model_dump() for p in pages]})
+    
+    def set_story(self, story: dict, pages: list[BookPage]) -> None:
+        self._set_content("story", {"story": story})
+        self.set_pages(pages)
+    
+    def set_preview_images(self, preview_images: list[str]) -> None:
+        self._set_content("preview", {"preview_images": preview_images})
+        self.fields["preview_cover_url"] = preview_images[0] if preview_images else None
+        self.event["preview_images"] = preview_images
+    
+    def set_preview_scenes(self, preview_scenes: list, preview_images: list[str]) -> None:
+        self.set_preview_images(preview_images)
+        derivatives = preview_scenes[0].get("derivatives") if preview_scenes else None
+        if derivatives:
+            # List views only need the medium size of the cover
+            self.fields["preview_cover_url"] = derivatives["medium"]["jpeg"]
+        self._set_content("preview", {"preview_scenes": preview_scenes})
+        self.event["preview_scenes"] = preview_scenes
+    
+    def set_pdf_url(self, pdf_url: str) -> None:
+        self.fields["pdf_url"] = pdf_url
+        self.set_status(BookStatus.COMPLETED, 100)
+        self.event["pdf_url"] = pdf_url
+    
+    async def commit(self) -> None:
+        if not (self.fields or self.content or self.deleted_content):
+            return
+        if self.status_changed:
+            # A buffered progress update must not land after this one
+            await get_status_writer().discard(self.book_id)
+        
+        batch = self.repo.db.batch()
+        for name in self.deleted_content:
+            batch.delete(self.repo.content_ref(self.book_id, name))
+        for name, values in self.content.items():
+            # Replaces the given fields whole and leaves the document's others
+            batch.set(self.repo.content_ref(self.book_id, name), values, merge=list(values))
+        fields = {**self.fields, "updated_at": datetime.utcnow()}
+        if self.content:
+            fields["layout_version"] = self.repo.LAYOUT_VERSION
+        batch.update(self.repo.collection.document(self.book_id), fields)
+        await run_db(batch.commit)
+        
+        get_book_cache().invalidate(self.book_id)
+        if self.event:
+            publish_progress(self.book_id, self.event)
+    
+    def _set_content(self, name: str, values: dict) -> None:
+        self.deleted_content.discard(name)
+        self.content.setdefault(name, {}).update(values)
+
+
+def _versioned(filename: str, content: bytes) -> str:
+    """
+    File name with a content hash: `scene_3.jpg` -> `scene_3_<hash>.jpg`.
+
+    Regenerated images (scenes after a regenerate, mockups, portraits) get a
+    new URL instead of overwriting the old object, so every node's image
+    cache and every CDN copy of a URL stay valid.
+    """
+    stem, dot, suffix = filename.rpartition(".")
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return f"{stem}_{digest}.{suffix}" if dot else f"{filename}_{digest}"
 
 
 class StorageService:
-    """Service for Firebase Cloud Storage operations."""
+    """
+    Service for Firebase Cloud Storage operations.
+    Blob calls run off the event loop (see storage_uploads).
+    Image file names are versioned by content (see _versioned).
+    """
     
-    def __init__(self):
+    def __init__(self, http: Optional[HttpClientRegistry] = None, images: Optional[ImageCache] = None):
         self.bucket = get_bucket()
+        self.http = http or get_http_client()
+        self.images = images or get_image_cache()
     
     async def upload_child_photo(
         self,
@@ -284,7 +544,7 @@ class StorageService:
         Returns:
             Public URL of the uploaded image
         """
-        blob_path = f"books/{book_id}/child_photo/{filename}"
+        blob_path = f"books/{book_id}/child_photo/{_versioned(filename, file_content)}"
         blob = self.bucket.blob(blob_path)
         
         # Determine content type
@@ -294,8 +554,8 @@ class StorageService:
         elif filename.lower().endswith(".webp"):
             content_type = "image/webp"
         
-        blob.upload_from_string(file_content, content_type=content_type)
-        blob.make_public()
+        await upload_blob(blob, file_content, content_type, public=True)
+        await self.images.put(blob.public_url, file_content)
         
         return blob.public_url
 
@@ -305,16 +565,116 @@ class StorageService:
         file_content: bytes,
         filename: str,
         content_type: str = "image/jpeg",
+        cache: bool = True,
     ) -> str:
         """
         Generic image upload for generated content/mockups.
         """
-        blob_path = f"books/{book_id}/images/{filename}"
+        blob_path = f"books/{book_id}/images/{_versioned(filename, file_content)}"
+        blob = self.bucket.blob(blob_path)
+        await upload_blob(blob, file_content, content_type, public=True)
+        if cache:
+            # Mockups and the PDF read this image next
+            await self.images.put(blob.public_url, file_content)
+        return blob.public_url
+    
+    async def upload_many(
+        self,
+        book_id: str,
+        files: list[tuple[bytes, str, str]],
+        cache: bool = True,
+    ) -> list[str]:
+        """
+        Upload several images at once (bounded by STORAGE_UPLOAD_CONCURRENCY).
+        
+        Args:
+            files: (content, filename, content_type) per image
+        
+        Returns:
+            Public URLs in the order of `files`
+        """
+        return list(await asyncio.gather(*(
+            self.upload_image(book_id, content, filename, content_type=content_type, cache=cache)
+            for content, filename, content_type in files
+        )))
+    
+    async def upload_derivatives(
+        self,
+        book_id: str,
+        file_content: bytes,
+        name: str,
+        full_url: str,
+    ) -> ImageDerivatives:
+        """
+        Create and upload the responsive sizes of an already stored image.
+        
+        Args:
+            name: Base file name of the derivatives (e.g. "preview_1")
+            full_url: URL of the stored original (the full-size JPEG fallback)
+        """
+        derived = await run_in_render_pool(make_image_derivatives, file_content)
+        files = []
+        for size, variant in derived.items():
+            files.append((variant["webp"], f"{name}_{size}.webp", "image/webp"))
+            if variant["jpeg"]:
+                files.append((variant["jpeg"], f"{name}_{size}.jpg", "image/jpeg"))
+        urls = iter(await self.upload_many(book_id, files, cache=False))
+        
+        variants = {}
+        for size, variant in derived.items():
+            webp = next(urls)
+            jpeg = next(urls) if variant["jpeg"] else full_url
+            variants[size] = ImageVariant(width=variant["width"], webp=webp, jpeg=jpeg)
+        return ImageDerivatives(**variants)
+    
+    async def upload_from_url(
+        self,
+        book_id: str,
+        url: str,
+        filename: str,
+        content_type: str = "image/jpeg",
+    ) -> str:
+        """
+        Copy a remote image (e.g. a provider result, which expires) into Storage.
+        
+        Returns:
+            Public URL of the stored copy
+        """
+        content = await self.images.get(url)
+        return await self.upload_image(book_id, content, filename, content_type=content_type)
+    
+    async def upload_private_image(
+        self,
+        book_id: str,
+        file_content: bytes,
+        filename: str,
+        content_type: str = "image/jpeg",
+    ) -> str:
+        """
+        Upload an image WITHOUT making it public (e.g. speculative scenes).
+        
+        Returns:
+            The blob path, to be published or deleted later
+        """
+        blob_path = f"books/{book_id}/private/{_versioned(filename, file_content)}"
+        blob = self.bucket.blob(blob_path)
+        await upload_blob(blob, file_content, content_type)
+        return blob_path
+    
+    async def publish_blob(self, blob_path: str) -> str:
+        """Make an existing blob public and return its URL."""
         blob = self.bucket.blob(blob_path)
-        blob.upload_from_string(file_content, content_type=content_type)
-        blob.make_public()
+        if not get_settings().storage_public_bucket:
+            await run_storage(blob.make_public)
         return blob.public_url
     
+    async def delete_blob(self, blob_path: str) -> None:
+        """Delete a blob, ignoring blobs that are already gone."""
+        try:
+            await run_storage(self.bucket.blob(blob_path).delete)
+        except Exception as e:
+            print(f"   ⚠️ Could not delete {blob_path}: {e}")
+    
     async def upload_pdf(
         self,
         book_id: str,
@@ -329,7 +689,21 @@ class StorageService:
         blob_path = f"books/{book_id}/book.pdf"
         blob = self.bucket.blob(blob_path)
         
-        blob.upload_from_string(pdf_content, content_type="application/pdf")
-        blob.make_public()
+        await upload_blob(blob, pdf_content, "application/pdf", public=True)
+        
+        return blob.public_url
+    
+    async def upload_pdf_file(
+        self,
+        book_id: str,
+        pdf_path: str,
+    ) -> str:
+        """
+        Upload the generated PDF from disk (streamed in chunks, resumable).
         
+        Returns:
+            Public URL of the PDF
+        """
+        blob = self.bucket.blob(f"books/{book_id}/book.pdf")
+        await upload_blob_file(blob, pdf_path, "application/pdf", public=True)
         return blob.public_url
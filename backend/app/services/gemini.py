@@ -0,0 +1,125 @@
+"""
+bookloo - Gemini Client
+One google-genai client per process, shared by every engine that calls
+Gemini (character assets, AI mockups). The client is thread-safe and keeps
+its HTTP connection pool alive between calls, so requests no longer pay for
+a new client and new connections each time.
+
+- The SDK is synchronous: calls run on a dedicated, bounded thread pool
+  (GEMINI_EXECUTOR_WORKERS), so slow image generations cannot starve the
+  default executor used by `asyncio.to_thread`
+- The shared Gemini rate limiter is acquired on the event loop before the
+  call is handed to a thread
+- Retries wait with `retry_delay` (exponential backoff with jitter) via
+  `asyncio.sleep`, never by sleeping in an executor thread
+"""
+
+import asyncio
+import functools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from google import genai
+
+from app.config import get_settings
+from app.services.rate_limiter import get_rate_limiter
+
+
+_client: Optional[genai.Client] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class GeminiStats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_ms": round(self.seconds / self.calls * 1000, 1) if self.calls else 0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+_stats = GeminiStats()
+
+
+def get_gemini_client() -> genai.Client:
+    """Get the process-wide Gemini client (created on first use)."""
+    global _client
+    if _client is None:
+        _client = genai.Client(api_key=get_settings().gemini_api_key)
+    return _client
+
+
+def get_gemini_executor() -> ThreadPoolExecutor:
+    """Get the process-wide Gemini executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, get_settings().gemini_executor_workers),
+            thread_name_prefix="gemini",
+        )
+    return _executor
+
+
+async def run_gemini(func, *args, **kwargs):
+    """Run a blocking Gemini SDK call on the Gemini executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_gemini_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def generate_content(model: str, contents: list, config=None):
+    """
+    One rate-limited `generate_content` call on the shared client.
+    Waits for the model's Gemini quota (tenant/priority from the caller's
+    context) before the request is sent; errors propagate to the caller.
+    """
+    await get_rate_limiter("gemini", model).acquire()
+    client = get_gemini_client()
+    start = time.perf_counter()
+    try:
+        response = await run_gemini(client.models.generate_content, model=model, contents=contents, config=config)
+    except Exception:
+        _stats.failures += 1
+        raise
+    _stats.record(time.perf_counter() - start)
+    return response
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait before retry `attempt + 1`: exponential backoff with jitter."""
+    settings = get_settings()
+    delay = min(settings.gemini_retry_max_seconds, settings.gemini_retry_base_seconds * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def shutdown_gemini() -> None:
+    """Let queued calls finish, then stop the threads and drop the client (called on shutdown)."""
+    global _client, _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    _client = None
+
+
+def gemini_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    if _executor is None:
+        return {}
+    return {
+        **_stats.snapshot(),
+        "workers": _executor._max_workers,
+        "queued": _executor._work_queue.qsize(),
+    }
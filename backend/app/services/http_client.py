@@ -0,0 +1,129 @@
+"""
+bookloo - Shared HTTP Client
+One pooled httpx client per process for all engine downloads and uploads.
+
+Connections (and TLS sessions) to storage.googleapis.com, replicate.delivery etc.
+are kept alive and reused instead of being opened per request. Requests per host
+are capped so one book cannot exhaust the pool.
+"""
+
+import asyncio
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import Settings, get_settings
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (installed via httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+class HttpClientRegistry:
+    """Pooled async HTTP client with per-host concurrency caps."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+
+        http2 = self.settings.http_enable_http2 and _http2_available()
+        if self.settings.http_enable_http2 and not http2:
+            print("⚠️ h2 not installed, shared HTTP client falls back to HTTP/1.1")
+
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.settings.http_max_connections,
+                max_keepalive_connections=self.settings.http_max_keepalive_connections,
+                keepalive_expiry=self.settings.http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                self.settings.http_timeout_seconds,
+                connect=self.settings.http_connect_timeout_seconds,
+            ),
+        )
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._in_flight: dict[str, int] = {}
+
+        # Metrics
+        self.requests = 0
+        self.errors = 0
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.settings.http_max_per_host)
+            self._host_limits[host] = semaphore
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool (waits for a free per-host slot)."""
+        host = urlsplit(url).netloc
+        async with self._host_limit(host):
+            self.requests += 1
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            try:
+                return await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+            finally:
+                self._in_flight[host] -= 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def download(self, url: str, **kwargs) -> bytes:
+        """GET a URL and return its body. Raises on non-2xx responses."""
+        resp = await self.get(url, **kwargs)
+        resp.raise_for_status()
+        return resp.content
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight_per_host": {host: n for host, n in self._in_flight.items() if n},
+        }
+
+
+_registry: Optional[HttpClientRegistry] = None
+
+
+def init_http_client(settings: Settings) -> HttpClientRegistry:
+    """Create the process-wide client (called from the lifespan / worker startup)."""
+    global _registry
+    if _registry is None:
+        _registry = HttpClientRegistry(settings)
+    return _registry
+
+
+def get_http_client() -> HttpClientRegistry:
+    """Get the shared client. Auto-initializes outside the app (scripts, tests)."""
+    if _registry is None:
+        return init_http_client(get_settings())
+    return _registry
+
+
+async def close_http_client() -> None:
+    """Close the shared client's connections (called on shutdown)."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+
+
+def http_client_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    return _registry.stats() if _registry else {}
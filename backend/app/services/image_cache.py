@@ -0,0 +1,227 @@
+"""
+bookloo - Image Cache
+Two-tier, content-addressed cache for images that are read more than once
+during a book's life (scene -> mockup -> PDF, character portrait re-upload).
+
+- Memory tier: LRU bounded by total bytes
+- Disk tier: one file per content hash, evicted oldest-first by total size
+- URL index: url -> content hash, so the provider URL and the Storage copy of
+  the same image share one entry; in memory, URLs go with their evicted
+  content (the disk index restores them), index files with their evicted blob
+
+Entries are never revalidated: every URL cached here is immutable. Provider
+results get a fresh URL per generation, and StorageService versions the
+file names of everything it stores by content hash, so an image that is
+regenerated (scenes, mockups, portraits) lands at a new URL.
+
+Engines call `await get_image_cache().get(url)` instead of downloading, and
+uploads seed the cache with the public URL of what they just stored.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.services.http_client import HttpClientRegistry, get_http_client
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageCache:
+    """Memory LRU + disk store for image bytes, keyed by URL and content hash."""
+
+    def __init__(self, settings: Optional[Settings] = None, http: Optional[HttpClientRegistry] = None):
+        self.settings = settings or get_settings()
+        self._http = http
+        self.enabled = self.settings.image_cache_enabled
+
+        self.memory_budget = self.settings.image_cache_memory_mb * 1024 * 1024
+        self.disk_budget = self.settings.image_cache_disk_mb * 1024 * 1024
+
+        self._urls: dict[str, str] = {}  # url -> content hash, only for hashes in memory
+        self._hash_urls: dict[str, set[str]] = {}  # content hash -> its urls in _urls
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()  # content hash -> bytes
+        self._memory_bytes = 0
+        self._inflight: dict[str, asyncio.Future] = {}  # url -> pending download
+
+        self.root = Path(self.settings.image_cache_dir)
+        self.blob_dir = self.root / "blobs"
+        self.url_dir = self.root / "urls"
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if self.enabled:
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            self.url_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(f.stat().st_size for f in self.blob_dir.iterdir() if f.is_file())
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---------- public API ----------
+
+    async def get(self, url: str) -> bytes:
+        """
+        Return the bytes behind `url`, downloading only on a cache miss.
+        Concurrent requests for the same URL share one download.
+        """
+        http = self._http or get_http_client()
+        if not self.enabled:
+            return await http.download(url)
+
+        content = await self._lookup(url)
+        if content is not None:
+            return content
+
+        pending = self._inflight.get(url)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            self.misses += 1
+            content = await http.download(url)
+            await self.put(url, content)
+            future.set_result(content)
+            return content
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else waits
+            raise
+        finally:
+            self._inflight.pop(url, None)
+
+    async def put(self, url: str, content: bytes) -> str:
+        """Store bytes for a URL (e.g. right after uploading them). Returns the content hash."""
+        content_hash = _sha256(content)
+        if not self.enabled:
+            return content_hash
+
+        self._remember(url, content_hash, content)
+        await asyncio.to_thread(self._write_disk, url, content_hash, content)
+        return content_hash
+
+    def stats(self) -> dict:
+        return {
+            "memory_bytes": self._memory_bytes,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    # ---------- memory tier ----------
+
+    def _remember(self, url: str, content_hash: str, content: bytes) -> None:
+        if len(content) > self.memory_budget:
+            return
+        previous = self._urls.get(url)
+        if previous and previous != content_hash:
+            self._hash_urls[previous].discard(url)
+        self._urls[url] = content_hash
+        self._hash_urls.setdefault(content_hash, set()).add(url)
+        if content_hash in self._memory:
+            self._memory.move_to_end(content_hash)
+            return
+        self._memory[content_hash] = content
+        self._memory_bytes += len(content)
+        while self._memory_bytes > self.memory_budget:
+            evicted_hash, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            for evicted_url in self._hash_urls.pop(evicted_hash, ()):
+                self._urls.pop(evicted_url, None)
+
+    # ---------- disk tier ----------
+
+    def _url_path(self, url: str) -> Path:
+        return self.url_dir / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _read_disk(self, url: str) -> tuple[Optional[str], Optional[bytes]]:
+        index = self._url_path(url)
+        try:
+            content_hash = index.read_text().strip()
+            blob = self.blob_dir / content_hash
+            content = blob.read_bytes()
+            os.utime(blob)  # recently used: evicted last
+            return content_hash, content
+        except FileNotFoundError:
+            # Unknown URL, or its blob was evicted
+            index.unlink(missing_ok=True)
+            return None, None
+
+    def _write_disk(self, url: str, content_hash: str, content: bytes) -> None:
+        blob = self.blob_dir / content_hash
+        with self._disk_lock:
+            if not blob.exists():
+                tmp = blob.with_suffix(".tmp")
+                tmp.write_bytes(content)
+                os.replace(tmp, blob)
+                self._disk_bytes += len(content)
+            self._url_path(url).write_text(content_hash)
+            if self._disk_bytes > self.disk_budget:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        blobs = sorted(
+            (f for f in self.blob_dir.iterdir() if f.is_file() and f.suffix != ".tmp"),
+            key=lambda f: f.stat().st_mtime,
+        )
+        evicted = set()
+        for blob in blobs:
+            if self._disk_bytes <= self.disk_budget * 0.9:
+                break
+            size = blob.stat().st_size
+            blob.unlink(missing_ok=True)
+            self._disk_bytes -= size
+            evicted.add(blob.name)
+
+        # URL index entries pointing at evicted blobs
+        for index in self.url_dir.iterdir():
+            try:
+                if index.read_text().strip() in evicted:
+                    index.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+
+    async def _lookup(self, url: str) -> Optional[bytes]:
+        content_hash = self._urls.get(url)
+        if content_hash and content_hash in self._memory:
+            self._memory.move_to_end(content_hash)
+            self.memory_hits += 1
+            return self._memory[content_hash]
+
+        content_hash, content = await asyncio.to_thread(self._read_disk, url)
+        if content is None:
+            return None
+        self.disk_hits += 1
+        self._remember(url, content_hash, content)
+        return content
+
+
+_cache: Optional[ImageCache] = None
+
+
+def get_image_cache() -> ImageCache:
+    """Get the process-wide image cache."""
+    global _cache
+    if _cache is None:
+        _cache = ImageCache(get_settings())
+    return _cache
+
+
+def image_cache_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    return _cache.stats() if _cache else {}
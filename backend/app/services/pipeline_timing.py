@@ -0,0 +1,87 @@
+"""
+bookloo - Pipeline Timings
+Wall-clock timings of pipeline stages, per run and aggregated per pipeline
+for the metrics endpoint.
+
+Stages may overlap (a streaming pipeline starts mockups while scenes are
+still generating), so each stage is recorded as a span from its first begin
+to its last end, relative to the start of the run.
+"""
+
+import time
+from typing import Optional
+
+
+class StageTimings:
+    """Stage spans and one-off marks (e.g. first result) of one pipeline run."""
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started = time.monotonic()
+        self.spans: dict[str, list[float]] = {}  # stage -> [start, end] in seconds
+        self.marks: dict[str, float] = {}
+
+    def begin(self, stage: str) -> None:
+        now = self._now()
+        self.spans.setdefault(stage, [now, now])
+
+    def end(self, stage: str) -> None:
+        now = self._now()
+        span = self.spans.setdefault(stage, [now, now])
+        span[1] = max(span[1], now)
+
+    def mark(self, name: str) -> None:
+        """Record when something first happened (later calls are ignored)."""
+        self.marks.setdefault(name, self._now())
+
+    def finish(self) -> dict:
+        """Summarise the run (seconds), add it to the pipeline's stats and log it."""
+        result = {"total": self._now()}
+        for stage, (start, end) in self.spans.items():
+            result[stage] = end - start
+            result[f"{stage}_start"] = start
+        result.update(self.marks)
+        _stats.record(self.pipeline, result)
+        print(f"   ⏱️ {self.pipeline}: " + ", ".join(f"{k} {v:.1f}s" for k, v in result.items()))
+        return result
+
+    def _now(self) -> float:
+        return time.monotonic() - self.started
+
+
+class PipelineStats:
+    """Average and last timings per pipeline."""
+
+    def __init__(self):
+        self._runs: dict[str, int] = {}
+        self._sums: dict[str, dict[str, float]] = {}
+        self._counts: dict[str, dict[str, int]] = {}  # runs that timed each step
+        self._last: dict[str, dict] = {}
+
+    def record(self, pipeline: str, timings: dict) -> None:
+        self._runs[pipeline] = self._runs.get(pipeline, 0) + 1
+        sums = self._sums.setdefault(pipeline, {})
+        counts = self._counts.setdefault(pipeline, {})
+        for key, value in timings.items():
+            sums[key] = sums.get(key, 0.0) + value
+            counts[key] = counts.get(key, 0) + 1
+        self._last[pipeline] = timings
+
+    def snapshot(self) -> dict:
+        return {
+            pipeline: {
+                "runs": runs,
+                "avg_seconds": {k: round(v / self._counts[pipeline][k], 2) for k, v in self._sums[pipeline].items()},
+                "last_seconds": {k: round(v, 2) for k, v in self._last[pipeline].items()},
+            }
+            for pipeline, runs in self._runs.items()
+        }
+
+
+_stats = PipelineStats()
+
+
+def pipeline_timing_stats(pipeline: Optional[str] = None) -> dict:
+    """Snapshot for the metrics endpoint."""
+    snapshot = _stats.snapshot()
+    return snapshot.get(pipeline, {}) if pipeline else snapshot
@@ -0,0 +1,190 @@
+"""
+bookloo - Progress Stream
+Pushes book progress to subscribed clients (SSE) instead of having them poll
+/status.
+
+- In-process pub/sub: BookRepository publishes every status/preview/PDF write
+- Firestore listener: when pipelines may run in another process or node,
+  watches on each subscribed book (and its preview content) feed the same
+  subscribers
+
+Events are partial book states (status, progress, message, preview data);
+subscribers merge them, so a slow client only ever sees the latest state.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.models.book import BookStatus
+
+
+STATUS_MESSAGES = {
+    BookStatus.CREATING_CHARACTER: "Zaubere Charakter... ✨",
+    BookStatus.WAITING_FOR_APPROVAL: "Bitte Charakter prüfen! 👀",
+    BookStatus.GENERATING_PREVIEW: "Erstelle Vorschau... 🎨",
+    BookStatus.READY_FOR_PURCHASE: "Vorschau bereit! 🔓",
+    BookStatus.PAID_PROCESSING_FULL: "Erstelle ganzes Buch... 📖",
+    BookStatus.COMPLETED: "Fertig! 🎉",
+    BookStatus.FAILED: "Fehler aufgetreten."
+}
+
+# Streams end once a book reaches one of these
+FINAL_STATUSES = {BookStatus.COMPLETED, BookStatus.FAILED}
+
+
+def status_event(status: BookStatus, progress: int, message: Optional[str] = None) -> dict:
+    return {
+        "status": status.value,
+        "progress": progress,
+        "message": message or STATUS_MESSAGES.get(status, "Lade..."),
+    }
+
+
+PREVIEW_FIELDS = ("preview_scenes", "preview_images")
+
+
+def snapshot_event(data: dict) -> dict:
+    """Event for a book document or its preview content document (Firestore listener)."""
+    if "status" not in data:
+        return {field: data[field] for field in PREVIEW_FIELDS if field in data}
+    event = status_event(BookStatus(data["status"]), data.get("progress", 0), data.get("status_message"))
+    event.update({
+        "character_image_url": data.get("character_image_url"),
+        "pdf_url": data.get("pdf_url"),
+    })
+    # Only inline on books written before the content split
+    event.update({field: data[field] for field in PREVIEW_FIELDS if field in data})
+    return event
+
+
+class Subscription:
+    """One client's view of a book: pending updates merged until consumed."""
+
+    def __init__(self):
+        self._pending: dict = {}
+        self._ready = asyncio.Event()
+
+    def push(self, event: dict) -> None:
+        self._pending.update(event)
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Wait for the merged pending update; None on timeout (send a keepalive)."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        event, self._pending = self._pending, {}
+        return event
+
+
+class ProgressBroker:
+    """Per-book fan-out of progress events to subscriptions in this process."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._watches: dict[str, list] = {}  # book_id -> Firestore watches
+
+        # Metrics
+        self.published = 0
+        self.listener_events = 0
+
+    @property
+    def use_listener(self) -> bool:
+        mode = self.settings.progress_listener
+        if mode == "auto":
+            # Writes only happen in this process when it also runs every job
+            return not (self.settings.run_embedded_worker and self.settings.job_backend == "memory")
+        return mode == "always"
+
+    def publish(self, book_id: str, event: dict) -> None:
+        """Deliver an event to this process's subscribers of the book (no-op without any)."""
+        subscribers = self._subscribers.get(book_id)
+        if not subscribers:
+            return
+        self.published += 1
+        for subscription in subscribers:
+            subscription.push(event)
+
+    @asynccontextmanager
+    async def subscribe(self, book_id: str):
+        subscription = Subscription()
+        subscribers = self._subscribers.setdefault(book_id, set())
+        subscribers.add(subscription)
+        if len(subscribers) == 1 and self.use_listener:
+            self._start_watch(book_id)
+        try:
+            yield subscription
+        finally:
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(book_id, None)
+                self._stop_watch(book_id)
+
+    def stats(self) -> dict:
+        return {
+            "books": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "listeners": len(self._watches),
+            "published": self.published,
+            "listener_events": self.listener_events,
+        }
+
+    # ---------- Firestore listener ----------
+
+    def _start_watch(self, book_id: str) -> None:
+        from app.services.firebase import BookRepository
+
+        loop = asyncio.get_running_loop()
+
+        def on_snapshot(docs, changes, read_time):
+            # Runs on the listener's thread
+            for doc in docs:
+                if doc.exists:
+                    loop.call_soon_threadsafe(self._on_listener_event, book_id, snapshot_event(doc.to_dict()))
+
+        try:
+            repo = BookRepository()
+            self._watches[book_id] = [
+                repo.collection.document(book_id).on_snapshot(on_snapshot),
+                repo.content_ref(book_id, "preview").on_snapshot(on_snapshot),
+            ]
+        except Exception as e:
+            print(f"⚠️ Progress listener for {book_id} failed, local events only: {e}")
+
+    def _on_listener_event(self, book_id: str, event: dict) -> None:
+        self.listener_events += 1
+        self.publish(book_id, event)
+
+    def _stop_watch(self, book_id: str) -> None:
+        for watch in self._watches.pop(book_id, []):
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"⚠️ Progress listener for {book_id} did not stop cleanly: {e}")
+
+
+_broker: Optional[ProgressBroker] = None
+
+
+def get_progress_broker() -> ProgressBroker:
+    """Get the process-wide progress broker."""
+    global _broker
+    if _broker is None:
+        _broker = ProgressBroker(get_settings())
+    return _broker
+
+
+def publish_progress(book_id: str, event: dict) -> None:
+    """Publish to local subscribers, if any (called by BookRepository writes)."""
+    if _broker is not None:
+        _broker.publish(book_id, event)
+
+
+def progress_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    return _broker.stats() if _broker else {}
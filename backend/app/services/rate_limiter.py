@@ -0,0 +1,195 @@
+"""
+bookloo - Provider Rate Limiter
+Process-wide token buckets shared by every engine that calls Replicate, Gemini or OpenAI.
+
+One limiter exists per (provider, model). Callers `await limiter.acquire()` before each
+request. When tokens run out, waiters are served round-robin per tenant (book), so one
+large book cannot starve the others. Low-priority work (speculative generation) is only
+served when no normal-priority caller is waiting.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Optional
+
+from app.config import get_settings
+
+
+# The book the current pipeline works on. Set at the start of each background task;
+# asyncio tasks spawned from there inherit it.
+rate_limit_tenant: ContextVar[Optional[str]] = ContextVar("rate_limit_tenant", default=None)
+
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = 1
+
+# Priority of the current pipeline's provider calls
+rate_limit_priority: ContextVar[int] = ContextVar("rate_limit_priority", default=PRIORITY_NORMAL)
+
+DEFAULT_TENANT = "_default"
+
+
+class TokenBucketLimiter:
+    """Token bucket with per-tenant fair queueing."""
+
+    def __init__(self, name: str, requests_per_minute: int, burst: int = 1):
+        self.name = name
+        self.rate = requests_per_minute / 60.0  # tokens per second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        # One round-robin queue per priority level
+        self._waiters: dict[int, "OrderedDict[str, deque[asyncio.Future]]"] = {
+            PRIORITY_NORMAL: OrderedDict(),
+            PRIORITY_LOW: OrderedDict(),
+        }
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.granted = 0
+        self.throttled = 0
+        self.penalties = 0
+        self.total_wait_seconds = 0.0
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _depth(self, priority: int) -> int:
+        return sum(1 for queue in self._waiters[priority].values() for fut in queue if not fut.done())
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers currently waiting for a token."""
+        return sum(self._depth(priority) for priority in self._waiters)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _can_grant(self) -> bool:
+        if time.monotonic() < self._blocked_until:
+            return False
+        self._refill()
+        return self._tokens >= 1
+
+    async def acquire(self, tenant: Optional[str] = None, priority: Optional[int] = None) -> None:
+        """Wait for a request token."""
+        if self.unlimited:
+            self.granted += 1
+            return
+
+        tenant = tenant or rate_limit_tenant.get() or DEFAULT_TENANT
+        priority = rate_limit_priority.get() if priority is None else priority
+
+        # Fast path: nobody queued and a token is available
+        if not self.queue_depth and self._can_grant():
+            self._tokens -= 1
+            self.granted += 1
+            return
+
+        started = time.monotonic()
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters[priority].setdefault(tenant, deque()).append(fut)
+        self.throttled += 1
+        self._ensure_dispatcher()
+
+        await fut  # cancelled futures are skipped by the dispatcher
+        self.total_wait_seconds += time.monotonic() - started
+
+    def penalize(self, seconds: float) -> None:
+        """Pause all callers, e.g. after the provider answered 429."""
+        self.penalties += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = min(self._tokens, 0.0)
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Pop the next pending waiter, highest priority first, rotating through tenants."""
+        for priority in (PRIORITY_NORMAL, PRIORITY_LOW):
+            waiters = self._waiters[priority]
+            while waiters:
+                tenant, queue = waiters.popitem(last=False)
+                fut = None
+                while queue:
+                    candidate = queue.popleft()
+                    if not candidate.done():
+                        fut = candidate
+                        break
+                if queue:
+                    # Tenant still has waiters: back of the line
+                    waiters[tenant] = queue
+                if fut is not None:
+                    return fut
+        return None
+
+    async def _dispatch(self) -> None:
+        while self.queue_depth:
+            if not self._can_grant():
+                delay = max(
+                    self._blocked_until - time.monotonic(),
+                    (1 - self._tokens) / self.rate,
+                )
+                await asyncio.sleep(max(delay, 0.01))
+                continue
+            fut = self._next_waiter()
+            if fut is None:
+                break
+            self._tokens -= 1
+            self.granted += 1
+            fut.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "requests_per_minute": round(self.rate * 60, 2),
+            "burst": self.capacity,
+            "queue_depth": self.queue_depth,
+            "queue_depth_low_priority": self._depth(PRIORITY_LOW),
+            "waiting_tenants": len({
+                tenant
+                for waiters in self._waiters.values()
+                for tenant, queue in waiters.items()
+                if any(not f.done() for f in queue)
+            }),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "penalties": self.penalties,
+            "total_wait_seconds": round(self.total_wait_seconds, 2),
+        }
+
+
+_limiters: dict[tuple[str, str], TokenBucketLimiter] = {}
+
+
+def _provider_rpm(provider: str) -> int:
+    settings = get_settings()
+    return {
+        "replicate": settings.replicate_requests_per_minute,
+        "gemini": settings.gemini_requests_per_minute,
+        "openai": settings.openai_requests_per_minute,
+    }.get(provider, 0)
+
+
+def get_rate_limiter(provider: str, model: str) -> TokenBucketLimiter:
+    """Get the shared limiter for a provider/model pair."""
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = TokenBucketLimiter(
+            name=f"{provider}:{model}",
+            requests_per_minute=_provider_rpm(provider),
+            burst=get_settings().rate_limit_burst,
+        )
+        _limiters[key] = limiter
+    return limiter
+
+
+def rate_limiter_stats() -> dict:
+    """Snapshot of every limiter, for the metrics endpoint."""
+    return {limiter.name: limiter.stats() for limiter in _limiters.values()}
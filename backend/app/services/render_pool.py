@@ -0,0 +1,245 @@
+"""
+bookloo - Render Pool
+Process pool for CPU-bound image and PDF work, so it neither blocks the event
+loop nor competes for the GIL with request handling.
+
+Functions submitted to the pool must be module-level and take/return
+picklable values (bytes, dicts, paths). PDFs are rendered from a layout
+description (plain dict with texts and prepared image file paths) by the
+builder registered for its kind.
+
+PDF builds have a timeout, and a process cannot be interrupted: each build
+runs in a process of its own (at most RENDER_POOL_WORKERS at once), so a
+stuck build is killed without touching other books' work in the pool.
+"""
+
+import asyncio
+import importlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Union
+
+from app.config import Settings, get_settings
+
+
+# Gelato print resolution
+TARGET_DPI = 300
+# Full-bleed page (216mm incl. bleed) at 300 DPI: ~2551 px
+PRINT_PAGE_PIXELS = int(216 / 25.4 * TARGET_DPI)
+
+
+def prepare_print_image(content: bytes, target_pixels: int = PRINT_PAGE_PIXELS) -> bytes:
+    """
+    Decode an image, resize it to print resolution and re-encode as 300 DPI JPEG.
+    Runs inside a pool process.
+    """
+    from PIL import Image as PILImage
+
+    img = PILImage.open(io.BytesIO(content))
+    img = img.convert("RGB")
+
+    # Resize if image is smaller (upscale for quality)
+    # or much larger (downscale to save space)
+    current_max = max(img.size)
+    if current_max < target_pixels * 0.8 or current_max > target_pixels * 1.5:
+        ratio = target_pixels / current_max
+        new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+        img = img.resize(new_size, PILImage.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=95, dpi=(TARGET_DPI, TARGET_DPI))
+    return output.getvalue()
+
+
+def prepare_print_image_file(content: bytes, path: str, target_pixels: int = PRINT_PAGE_PIXELS) -> str:
+    """prepare_print_image, written to `path` (for layout descriptions). Runs inside a pool process."""
+    with open(path, "wb") as f:
+        f.write(prepare_print_image(content, target_pixels))
+    return path
+
+
+# Client image derivatives: name -> longest edge in px (None = original size)
+DERIVATIVE_SIZES: dict[str, Optional[int]] = {"thumb": 320, "medium": 960, "full": None}
+
+
+def make_image_derivatives(content: bytes, sizes: Optional[dict] = None) -> dict[str, dict]:
+    """
+    Downscale an image to each derivative size, encoded as WebP and JPEG.
+    The full size only gets a WebP (the original is its JPEG fallback).
+    Runs inside a pool process.
+    
+    Returns:
+        name -> {"width": px, "webp": bytes, "jpeg": bytes or None}
+    """
+    from PIL import Image as PILImage
+
+    img = PILImage.open(io.BytesIO(content))
+    img = img.convert("RGB")
+
+    derivatives = {}
+    for name, edge in (sizes or DERIVATIVE_SIZES).items():
+        variant = img
+        if edge and max(img.size) > edge:
+            ratio = edge / max(img.size)
+            variant = img.resize((int(img.size[0] * ratio), int(img.size[1] * ratio)), PILImage.Resampling.LANCZOS)
+        webp = io.BytesIO()
+        variant.save(webp, format="WEBP", quality=80, method=4)
+        jpeg = None
+        if edge:
+            buffer = io.BytesIO()
+            variant.save(buffer, format="JPEG", quality=82, optimize=True, progressive=True)
+            jpeg = buffer.getvalue()
+        derivatives[name] = {"width": variant.size[0], "webp": webp.getvalue(), "jpeg": jpeg}
+    return derivatives
+
+
+# Layout kind -> builder(layout, output). Referenced by import path so pool
+# processes only import the engine they render.
+PDF_BUILDERS: dict[str, str] = {
+    "inner_book": "app.engines.pdf_engine:build_inner_pdf",
+    "cover": "app.engines.pdf_engine:build_cover_pdf",
+    "layout_book": "app.engines.layout_engine:build_layout_pdf",
+    "layout_book_advanced": "app.engines.layout_engine:build_layout_pdf_advanced",
+}
+
+
+def _build_pdf(kind: str, layout: dict, output_path: Optional[str]) -> Union[bytes, str]:
+    """Render a layout description. Runs inside a pool process."""
+    module_name, func_name = PDF_BUILDERS[kind].split(":")
+    builder = getattr(importlib.import_module(module_name), func_name)
+    if output_path:
+        builder(layout, output_path)
+        return output_path
+    buffer = io.BytesIO()
+    builder(layout, buffer)
+    return buffer.getvalue()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_isolated_slots: Optional[asyncio.Semaphore] = None
+
+
+def get_render_pool(settings: Optional[Settings] = None) -> ProcessPoolExecutor:
+    """Get the process-wide render pool (created on first use)."""
+    global _pool
+    if _pool is None:
+        settings = settings or get_settings()
+        # spawn: forking a process that already runs gRPC/HTTP threads can deadlock
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.render_pool_workers),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_render_pool(func, *args):
+    """
+    Run a picklable function in the render pool and await its result.
+    A pool whose worker process died is broken for good: it is replaced and
+    the call retried once.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    pool = get_render_pool()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        print("⚠️ Render pool broken (a worker process died), starting a new one")
+        if _pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        return await loop.run_in_executor(get_render_pool(), func, *args)
+
+
+async def render_pdf(
+    kind: str,
+    layout: dict,
+    output_path: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Union[bytes, str]:
+    """
+    Render a PDF from a layout description in a process of its own.
+
+    Args:
+        kind: Builder name (see PDF_BUILDERS)
+        layout: Picklable layout description (texts, prepared image file paths)
+        output_path: Write the PDF there and return the path instead of bytes
+        timeout: Seconds before the job is abandoned (default RENDER_JOB_TIMEOUT_SECONDS)
+    """
+    timeout = timeout or get_settings().render_job_timeout_seconds
+    try:
+        return await run_isolated(_build_pdf, kind, layout, output_path, timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️ Render job '{kind}' exceeded {timeout}s, its process was terminated")
+        raise
+
+
+async def run_isolated(func, *args, timeout: float):
+    """
+    Run a picklable function in a process of its own, terminated once it
+    finishes or exceeds `timeout` (raises asyncio.TimeoutError).
+    """
+    global _isolated_slots
+    if _isolated_slots is None:
+        _isolated_slots = asyncio.Semaphore(max(1, get_settings().render_pool_workers))
+
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+
+    def settle(setter, value):
+        # Called from the pool's result thread
+        loop.call_soon_threadsafe(lambda: result.done() or setter(value))
+
+    async with _isolated_slots:
+        pool = multiprocessing.get_context("spawn").Pool(1)
+        try:
+            pool.apply_async(
+                func, args,
+                callback=lambda value: settle(result.set_result, value),
+                error_callback=lambda error: settle(result.set_exception, error),
+            )
+            return await asyncio.wait_for(result, timeout)
+        finally:
+            await asyncio.to_thread(pool.terminate)
+
+
+async def prepare_print_images(
+    urls: list[Optional[str]],
+    workdir: str,
+    images=None,
+    concurrency: Optional[int] = None,
+) -> list[Optional[str]]:
+    """
+    Fetch (through the image cache, bounded concurrency) and prepare print
+    images for a layout. Returns one file path per URL, None for missing or
+    broken images.
+    """
+    from app.services.image_cache import get_image_cache
+
+    images = images or get_image_cache()
+    semaphore = asyncio.Semaphore(concurrency or get_settings().pdf_image_prefetch_concurrency)
+
+    async def prepare(index: int, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return None
+        try:
+            async with semaphore:
+                content = await images.get(url)
+            path = os.path.join(workdir, f"image_{index}.jpg")
+            return await run_in_render_pool(prepare_print_image_file, content, path)
+        except Exception as e:
+            print(f"Error loading image {url}: {e}")
+            return None
+
+    return list(await asyncio.gather(*(prepare(i, url) for i, url in enumerate(urls))))
+
+
+def shutdown_render_pool() -> None:
+    """Stop the pool processes (called on shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,187 @@
+"""
+bookloo - Speculative Scene Store
+Keeps scenes that were generated before payment (while the user views the preview).
+
+- Scenes are uploaded privately and only published when complete_book_task claims them.
+- A scene is only recorded while the book is still in preview and unclaimed
+  (checked in a transaction); a scene that finishes after payment is deleted.
+- Each user has a daily spend budget for speculative generation. Unused
+  reservations go back to the day they were taken from.
+- Unclaimed scenes are deleted once their TTL expires.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from firebase_admin import firestore
+
+from app.config import Settings, get_settings
+from app.models.book import BookStatus
+from app.services.book_cache import get_book_cache
+from app.services.db_executor import run_db
+from app.services.firebase import get_db, StorageService
+from app.services.image_cache import get_image_cache
+
+
+class SpeculativeSceneStore:
+    """Private storage, budgets and garbage collection for speculative scenes."""
+
+    BOOKS_COLLECTION = "books"
+    BUDGET_COLLECTION = "speculation_budgets"
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.db = get_db()
+        self.books = self.db.collection(self.BOOKS_COLLECTION)
+        self.budgets = self.db.collection(self.BUDGET_COLLECTION)
+        self.storage = StorageService()
+
+    @staticmethod
+    def budget_day() -> str:
+        """The current budget day; pass it to reserve_budget and release_budget."""
+        return datetime.utcnow().strftime("%Y%m%d")
+
+    def _budget_ref(self, user_id: str, day: str):
+        return self.budgets.document(f"{user_id}_{day}")
+
+    async def reserve_budget(self, user_id: str, scene_count: int, day: str) -> int:
+        """
+        Reserve spend for up to `scene_count` scenes from the user's budget for `day`.
+
+        Returns:
+            Number of scenes that may be generated (0 if the budget is used up)
+        """
+        cost = self.settings.speculative_scene_cost_cents
+        budget = self.settings.speculative_daily_budget_cents_per_user
+        ref = self._budget_ref(user_id, day)
+
+        @firestore.transactional
+        def reserve(transaction) -> int:
+            snapshot = ref.get(transaction=transaction)
+            spent = (snapshot.to_dict() or {}).get("spent_cents", 0) if snapshot.exists else 0
+            affordable = (budget - spent) // cost if cost > 0 else scene_count
+            granted = max(0, min(scene_count, affordable))
+            if granted:
+                transaction.set(ref, {
+                    "user_id": user_id,
+                    "spent_cents": spent + granted * cost,
+                    "updated_at": datetime.utcnow(),
+                }, merge=True)
+            return granted
+
+        return await run_db(reserve, self.db.transaction())
+
+    async def release_budget(self, user_id: str, scene_count: int, day: str) -> None:
+        """Give back budget for scenes that were reserved on `day` but never generated."""
+        if scene_count <= 0:
+            return
+        await run_db(self._budget_ref(user_id, day).update, {
+            "spent_cents": firestore.Increment(-scene_count * self.settings.speculative_scene_cost_cents),
+            "updated_at": datetime.utcnow(),
+        })
+
+    async def store_scene(self, book_id: str, scene_number: int, image_url: str) -> Optional[str]:
+        """
+        Copy a generated scene into private storage (provider URLs expire).
+
+        Returns:
+            The private blob path, or None if the download failed or the book
+            was paid (claimed) or left the preview in the meantime
+        """
+        try:
+            content = await get_image_cache().get(image_url)
+        except Exception as e:
+            print(f"   ⚠️ Speculative scene {scene_number} download failed: {e}")
+            return None
+
+        blob_path = await self.storage.upload_private_image(
+            book_id, content, f"speculative_scene_{scene_number}.jpg"
+        )
+        expires_at = datetime.utcnow() + timedelta(hours=self.settings.speculative_ttl_hours)
+        ref = self.books.document(book_id)
+
+        @firestore.transactional
+        def record(transaction) -> bool:
+            # complete_book_task flips the status before it claims: a scene
+            # landing after that would be generated twice and never cleaned up
+            snapshot = ref.get(field_paths=["status", "speculative_claimed"], transaction=transaction)
+            data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            if data.get("status") != BookStatus.READY_FOR_PURCHASE.value or data.get("speculative_claimed"):
+                return False
+            transaction.update(ref, {
+                f"speculative_scenes.scene_{scene_number}": blob_path,
+                "speculative_expires_at": expires_at,
+            })
+            return True
+
+        if not await run_db(record, self.db.transaction()):
+            print(f"   ⏹️ Book {book_id} left preview, dropping speculative scene {scene_number}")
+            await self.storage.delete_blob(blob_path)
+            return None
+        get_book_cache().invalidate(book_id)
+        return blob_path
+
+    async def claim_scenes(self, book_id: str) -> dict[int, str]:
+        """
+        Publish the stored speculative scenes of a paid book.
+
+        The book is marked claimed in the same transaction that takes its
+        `speculative_scenes` map, so no scene can be recorded after it.
+
+        Returns:
+            scene_number -> public URL
+        """
+        ref = self.books.document(book_id)
+
+        @firestore.transactional
+        def take(transaction) -> dict[str, str]:
+            snapshot = ref.get(field_paths=["speculative_scenes"], transaction=transaction)
+            stored = ((snapshot.to_dict() or {}) if snapshot.exists else {}).get("speculative_scenes") or {}
+            transaction.update(ref, {
+                "speculative_scenes": firestore.DELETE_FIELD,
+                "speculative_expires_at": firestore.DELETE_FIELD,
+                "speculative_claimed": True,
+            })
+            return stored
+
+        stored = await run_db(take, self.db.transaction())
+        get_book_cache().invalidate(book_id)
+
+        claimed = {}
+        for key, blob_path in stored.items():
+            try:
+                claimed[int(key.removeprefix("scene_"))] = await self.storage.publish_blob(blob_path)
+            except Exception as e:
+                print(f"   ⚠️ Could not claim speculative {key}: {e}")
+        return claimed
+
+    async def collect_expired(self) -> int:
+        """Delete unclaimed speculative scenes past their TTL. Returns the number of books cleaned."""
+        query = self.books.where("speculative_expires_at", "<", datetime.utcnow())
+
+        cleaned = 0
+        for doc in await run_db(lambda: list(query.stream())):
+            stored = (doc.to_dict() or {}).get("speculative_scenes", {})
+            for blob_path in stored.values():
+                await self.storage.delete_blob(blob_path)
+            await run_db(doc.reference.update, {
+                "speculative_scenes": firestore.DELETE_FIELD,
+                "speculative_expires_at": firestore.DELETE_FIELD,
+            })
+            get_book_cache().invalidate(doc.id)
+            cleaned += 1
+        return cleaned
+
+
+async def run_speculation_gc_loop(settings: Settings) -> None:
+    """Periodically garbage-collect expired speculative scenes (runs until cancelled)."""
+    interval = max(1, settings.speculative_gc_interval_minutes) * 60
+    while True:
+        try:
+            cleaned = await SpeculativeSceneStore(settings).collect_expired()
+            if cleaned:
+                print(f"🧹 Removed expired speculative scenes from {cleaned} books")
+        except Exception as e:
+            print(f"⚠️ Speculative scene GC failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,141 @@
+"""
+bookloo - Status Writer
+Coalesces BookRepository.update_status calls per book, so a pipeline that
+reports progress many times a minute costs at most one Firestore write per
+flush interval.
+
+- First update after a quiet period is written immediately
+- Later updates within the interval are merged and written once at its end
+- Terminal states (READY_FOR_PURCHASE, COMPLETED, FAILED) are written at once
+  and replace anything still buffered
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from app.config import Settings, get_settings
+from app.models.book import BookStatus
+from app.services.db_executor import run_db
+
+
+TERMINAL_STATUSES = {BookStatus.READY_FOR_PURCHASE, BookStatus.COMPLETED, BookStatus.FAILED}
+
+
+class StatusWriter:
+    """Per-book write-behind buffer for status/progress fields."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or get_settings()
+        self.interval = self.settings.status_flush_interval_ms / 1000
+
+        self._pending: dict[str, tuple[object, dict]] = {}  # book_id -> (doc_ref, merged fields)
+        self._flushers: dict[str, asyncio.Task] = {}
+        self._last_write: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}  # one write in flight per book
+
+        # Metrics
+        self.requested = 0
+        self.writes = 0
+        self.coalesced = 0
+
+    async def update(self, doc_ref, book_id: str, status: BookStatus, fields: dict) -> None:
+        """Write (or buffer) a status update for the book document."""
+        self.requested += 1
+        if status in TERMINAL_STATUSES or self.interval <= 0:
+            await self.discard(book_id)
+            await self._write(doc_ref, book_id, fields)
+            return
+
+        if book_id in self._pending:
+            self.coalesced += 1
+            self._pending[book_id][1].update(fields)
+            return
+
+        wait = self._last_write.get(book_id, 0) + self.interval - time.monotonic()
+        if wait <= 0:
+            await self._write(doc_ref, book_id, fields)
+            return
+
+        self._pending[book_id] = (doc_ref, dict(fields))
+        self._flushers[book_id] = asyncio.create_task(self._flush_later(book_id, wait))
+
+    async def discard(self, book_id: str) -> None:
+        """
+        Drop a buffered update and wait for one already being written, so a
+        direct status write that follows lands last.
+        """
+        self._pending.pop(book_id, None)
+        flusher = self._flushers.pop(book_id, None)
+        if flusher is not None:
+            flusher.cancel()  # still sleeping: flushers leave _flushers before writing
+        lock = self._locks.get(book_id)
+        if lock is not None:
+            async with lock:
+                pass
+
+    async def flush_all(self) -> None:
+        """Write every buffered update now (called on shutdown)."""
+        for book_id in list(self._pending):
+            await self._flush(book_id)
+
+    def stats(self) -> dict:
+        return {
+            "requested": self.requested,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+        }
+
+    # ---------- internals ----------
+
+    async def _flush_later(self, book_id: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._flushers.pop(book_id, None)
+        await self._flush(book_id)
+
+    async def _flush(self, book_id: str) -> None:
+        flusher = self._flushers.pop(book_id, None)
+        if flusher is not None and flusher is not asyncio.current_task():
+            flusher.cancel()
+        pending = self._pending.pop(book_id, None)
+        if pending is None:
+            return
+        doc_ref, fields = pending
+        try:
+            await self._write(doc_ref, book_id, fields)
+        except Exception as e:
+            print(f"⚠️ Status flush for {book_id} failed: {e}")
+
+    async def _write(self, doc_ref, book_id: str, fields: dict) -> None:
+        lock = self._locks.setdefault(book_id, asyncio.Lock())
+        async with lock:
+            self._last_write[book_id] = time.monotonic()
+            await run_db(doc_ref.update, fields)
+            self.writes += 1
+        if len(self._last_write) > 10_000:
+            # Only recent books matter for throttling
+            cutoff = time.monotonic() - self.interval
+            self._last_write = {k: v for k, v in self._last_write.items() if v >= cutoff}
+            self._locks = {k: v for k, v in self._locks.items() if k in self._last_write or v.locked()}
+
+
+_writer: Optional[StatusWriter] = None
+
+
+def get_status_writer() -> StatusWriter:
+    """Get the process-wide status writer."""
+    global _writer
+    if _writer is None:
+        _writer = StatusWriter(get_settings())
+    return _writer
+
+
+async def flush_status_writes() -> None:
+    if _writer is not None:
+        await _writer.flush_all()
+
+
+def status_writer_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    return _writer.stats() if _writer else {}
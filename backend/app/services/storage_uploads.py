@@ -0,0 +1,130 @@
+"""
+bookloo - Storage Uploads
+The google-cloud-storage client is synchronous. Uploads and other blob calls
+run on a dedicated, bounded thread pool, so several artefacts upload at once
+(at most STORAGE_UPLOAD_CONCURRENCY per process) without blocking the event
+loop.
+
+- Public objects are created with `predefined_acl=publicRead`: one request
+  instead of upload + make_public
+- With STORAGE_PUBLIC_BUCKET (public by bucket policy, required for uniform
+  bucket-level access) no ACL is sent at all
+- Large files (the print PDF) stream from disk as a resumable upload in
+  STORAGE_UPLOAD_CHUNK_MB chunks, so memory per upload stays fixed
+- Latency and bytes are logged and counted per upload
+"""
+
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import get_settings
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class UploadStats:
+    def __init__(self):
+        self.uploads = 0
+        self.failures = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, size: int, seconds: float) -> None:
+        self.uploads += 1
+        self.bytes += size
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "avg_ms": round(self.seconds / self.uploads * 1000, 1) if self.uploads else 0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+_stats = UploadStats()
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """Get the process-wide Storage executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, get_settings().storage_upload_concurrency),
+            thread_name_prefix="storage",
+        )
+    return _executor
+
+
+async def run_storage(func, *args, **kwargs):
+    """Run a blocking Storage call on the Storage executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_storage_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _acl(public: bool) -> Optional[str]:
+    return "publicRead" if public and not get_settings().storage_public_bucket else None
+
+
+async def upload_blob(blob, data: bytes, content_type: str, public: bool = False) -> None:
+    """Upload bytes to a blob in one request, public-readable if asked to."""
+    acl = _acl(public)
+
+    def upload() -> float:
+        start = time.perf_counter()
+        blob.upload_from_string(data, content_type=content_type, predefined_acl=acl)
+        return time.perf_counter() - start
+
+    await _timed_upload(blob, len(data), upload)
+
+
+async def upload_blob_file(blob, path: str, content_type: str, public: bool = False) -> None:
+    """Stream a file to a blob as a chunked resumable upload."""
+    acl = _acl(public)
+    # Must be a multiple of 256 KB
+    blob.chunk_size = max(1, get_settings().storage_upload_chunk_mb) * 1024 * 1024
+
+    def upload() -> float:
+        start = time.perf_counter()
+        blob.upload_from_filename(path, content_type=content_type, predefined_acl=acl)
+        return time.perf_counter() - start
+
+    await _timed_upload(blob, os.path.getsize(path), upload)
+
+
+async def _timed_upload(blob, size: int, upload) -> None:
+    try:
+        seconds = await run_storage(upload)
+    except Exception:
+        _stats.failures += 1
+        raise
+    _stats.record(size, seconds)
+    print(f"   ☁️ Uploaded {blob.name} ({size / 1024:.0f} KB in {seconds * 1000:.0f} ms)")
+
+
+def shutdown_storage_executor() -> None:
+    """Let queued uploads finish, then stop the threads (called on shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def storage_upload_stats() -> dict:
+    """Snapshot for the metrics endpoint."""
+    if _executor is None:
+        return {}
+    return {
+        **_stats.snapshot(),
+        "workers": _executor._max_workers,
+        "queued": _executor._work_queue.qsize(),
+    }
@@ -0,0 +1,64 @@
+"""
+bookloo - Worker Entry Point
+Runs book generation jobs outside the API process.
+
+Usage:
+    JOB_BACKEND=firestore RUN_EMBEDDED_WORKER=false uvicorn app.main:app   # API nodes
+    JOB_BACKEND=firestore python -m app.worker                             # generation workers
+"""
+
+import asyncio
+import signal
+
+from app.config import get_settings
+from app.jobs.worker import start_worker
+from app.services.book_cache import start_book_cache_listener
+from app.services.asset_registry import install_reload_handler, warm_asset_registry
+from app.services.firebase import initialize_firebase
+from app.services.http_client import init_http_client, close_http_client
+from app.services.render_pool import shutdown_render_pool
+from app.services.status_writer import flush_status_writes
+from app.services.db_executor import shutdown_db_executor
+from app.services.storage_uploads import shutdown_storage_executor
+from app.services.gemini import shutdown_gemini
+import pillow_heif
+
+# Register HEIF opener for Pillow (to support mobile iPhone uploads)
+pillow_heif.register_heif_opener()
+
+
+async def main() -> None:
+    settings = get_settings()
+    initialize_firebase(settings)
+    init_http_client(settings)
+
+    if settings.job_backend == "memory":
+        print("⚠️ JOB_BACKEND=memory: this worker only sees jobs queued in its own process")
+
+    worker, task = start_worker(settings)
+    book_cache_listener = start_book_cache_listener(settings)
+    asset_warmup = asyncio.create_task(warm_asset_registry())
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    # SIGHUP: pick up replaced templates/style references without a restart
+    install_reload_handler()
+
+    await stop.wait()
+    await worker.stop()
+    await task
+    asset_warmup.cancel()
+    if book_cache_listener:
+        book_cache_listener.cancel()
+    await flush_status_writes()
+    await close_http_client()
+    shutdown_render_pool()
+    shutdown_db_executor()
+    shutdown_storage_executor()
+    shutdown_gemini()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Benchmark: /status and /my-books throughput while many book pipelines write
+progress to Firestore.
+
+The app runs in-process (httpx ASGITransport), so pipelines and requests
+share one event loop exactly like in production. Pipelines are simulated
+with the real BookRepository writes (status, previews); no AI calls.
+
+Uses the Firestore configured in .env — point it at a test project or the
+emulator:
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python bench_status_throughput.py
+    python bench_status_throughput.py --pipelines 50 --clients 100 --seconds 30
+    python bench_status_throughput.py --baseline   # Firestore calls on the event loop (old behaviour)
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import Executor, Future
+
+import httpx
+
+from app.config import get_settings
+from app.main import app
+from app.models.book import BookStatus
+from app.services import db_executor
+from app.services.firebase import BookRepository, initialize_firebase
+from app.services.status_writer import status_writer_stats
+
+
+class InlineExecutor(Executor):
+    """Runs submitted calls immediately on the calling thread (= blocks the loop)."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+async def simulate_pipeline(repo: BookRepository, book_id: str, stop: asyncio.Event):
+    progress = 0
+    while not stop.is_set():
+        progress = (progress + 5) % 95
+        await repo.update_status(book_id, BookStatus.GENERATING_PREVIEW, progress, message=f"Bench {progress}%")
+        if progress % 20 == 0:
+            await repo.update_preview_images(book_id, [f"https://example.com/{book_id}/{progress}.jpg"])
+        await asyncio.sleep(random.uniform(0.05, 0.2))
+
+
+async def run_client(client: httpx.AsyncClient, book_ids: list, user_ids: list, stop: asyncio.Event, latencies: dict):
+    while not stop.is_set():
+        if random.random() < 0.8:
+            endpoint, url = "status", f"/api/books/{random.choice(book_ids)}/status"
+        else:
+            endpoint, url = "my-books", f"/api/books/my-books?user_id={random.choice(user_ids)}"
+        start = time.perf_counter()
+        resp = await client.get(url)
+        elapsed = time.perf_counter() - start
+        if resp.status_code == 200:
+            latencies[endpoint].append(elapsed)
+        else:
+            latencies["errors"].append(elapsed)
+
+
+def report(name: str, samples: list, seconds: float):
+    if not samples:
+        print(f"   {name:10s} no successful requests")
+        return
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+    print(
+        f"   {name:10s} {len(samples) / seconds:8.1f} req/s   "
+        f"p50 {statistics.median(samples) * 1000:7.1f} ms   p95 {pct(0.95):7.1f} ms   p99 {pct(0.99):7.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pipelines", type=int, default=30)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--baseline", action="store_true", help="run Firestore calls on the event loop")
+    args = parser.parse_args()
+
+    initialize_firebase(get_settings())
+    if args.baseline:
+        db_executor._executor = InlineExecutor()
+
+    repo = BookRepository()
+    user_ids = [f"bench-user-{i}" for i in range(args.users)]
+    print(f"Creating {args.pipelines} books...")
+    book_ids = [
+        await repo.create_book("Bench", "space", "pixar_3d", user_ids[i % args.users], "https://example.com/photo.jpg")
+        for i in range(args.pipelines)
+    ]
+
+    stop = asyncio.Event()
+    latencies = {"status": [], "my-books": [], "errors": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+        tasks = [asyncio.create_task(simulate_pipeline(repo, book_id, stop)) for book_id in book_ids]
+        tasks += [
+            asyncio.create_task(run_client(client, book_ids, user_ids, stop, latencies))
+            for _ in range(args.clients)
+        ]
+        print(f"Running {args.pipelines} pipelines and {args.clients} clients for {args.seconds:.0f}s "
+              f"({'baseline: inline Firestore' if args.baseline else 'Firestore executor'})...")
+        await asyncio.sleep(args.seconds)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print("=" * 60)
+    report("status", latencies["status"], args.seconds)
+    report("my-books", latencies["my-books"], args.seconds)
+    print(f"   errors     {len(latencies['errors'])}")
+    print(f"   status writes: {status_writer_stats()}")
+    print("=" * 60)
+
+    print("Cleaning up...")
+    for book_id in book_ids:
+        for name in repo.CONTENT_FIELDS:
+            repo.content_ref(book_id, name).delete()
+        repo.collection.document(book_id).delete()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Migration: move heavy book data out of the main document (layout_version 2).
+
+Copies `pages`, `preview_scenes`, `preview_images` and `story` from
+`books/{id}` into `books/{id}/content/{pages,preview,story}` and removes them
+from the book document, in one transaction per book. Books that are already
+migrated are skipped, so the script can be re-run safely. Until a book is
+migrated, BookRepository keeps reading its inline fields.
+
+Usage:
+    python migrate_book_content.py --dry-run
+    python migrate_book_content.py
+"""
+import argparse
+
+from firebase_admin import firestore
+
+from app.config import get_settings
+from app.services.firebase import BookRepository, initialize_firebase
+
+
+def migrate_book(repo: BookRepository, ref, dry_run: bool) -> bool:
+    """
+    Migrate one book in a transaction, so concurrent pipeline writes are
+    never overwritten with older inline data. Returns False if there was
+    nothing to move.
+    """
+
+    @firestore.transactional
+    def run(transaction) -> bool:
+        snapshot = ref.get(transaction=transaction)
+        data = snapshot.to_dict() or {}
+        inline = [field for fields in repo.CONTENT_FIELDS.values() for field in fields if field in data]
+        if not snapshot.exists or (not inline and data.get("layout_version", 1) >= repo.LAYOUT_VERSION):
+            return False
+
+        # Books touched since the split may already hold newer content
+        content_refs = {name: repo.content_ref(ref.id, name) for name in repo.CONTENT_FIELDS}
+        content = {
+            doc.reference.id: doc.to_dict() or {}
+            for doc in transaction.get_all(list(content_refs.values()))
+            if doc.exists
+        }
+
+        book_fields = {"layout_version": repo.LAYOUT_VERSION}
+        for name, fields in repo.CONTENT_FIELDS.items():
+            stored = content.get(name, {})
+            values = {field: data[field] for field in fields if field in data and field not in stored}
+            if values and not dry_run:
+                transaction.set(content_refs[name], values, merge=True)
+            for field in fields:
+                if field in data:
+                    book_fields[field] = firestore.DELETE_FIELD
+
+        preview_images = content.get("preview", {}).get("preview_images", data.get("preview_images")) or []
+        book_fields["preview_cover_url"] = preview_images[0] if preview_images else None
+        if not dry_run:
+            transaction.update(ref, book_fields)
+
+        print(f"   {'[dry-run] ' if dry_run else ''}{ref.id}: moving {', '.join(inline) or 'nothing'}")
+        return True
+
+    return run(repo.db.transaction())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    initialize_firebase(get_settings())
+    repo = BookRepository()
+
+    migrated = skipped = failed = 0
+    for ref in repo.collection.list_documents():
+        try:
+            if migrate_book(repo, ref, args.dry_run):
+                migrated += 1
+            else:
+                skipped += 1
+        except Exception as e:
+            print(f"   ❌ {ref.id}: {e}")
+            failed += 1
+
+    print("=" * 60)
+    print(f"Migrated: {migrated}  Already migrated: {skipped}  Failed: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ async def test_cover_with_style():
     print(f"Available refs: {list(engine.COVER_STYLE_REFS.keys())}")
     
     # Try to load a style ref
-    style_ref = engine._get_cover_style_ref("space")
+    style_ref = await engine.assets.get(f"cover:{engine.COVER_STYLE_REFS['space']}")
     if style_ref:
         print(f"✅ Style ref loaded: {style_ref.size}")
     else:
@@ -0,0 +1,99 @@
+"""TTL/LRU behaviour and version-based invalidation of the per-process book cache."""
+
+from datetime import datetime
+
+from app.config import Settings
+from app.models.book import BookResponse, BookStatus
+from app.services.book_cache import BookCache
+
+
+def make_cache(**overrides) -> BookCache:
+    settings = Settings(book_cache_enabled=True, book_cache_ttl_seconds=60, book_cache_max_entries=100)
+    return BookCache(settings.model_copy(update=overrides))
+
+
+def make_book(book_id: str = "b1", **fields) -> BookResponse:
+    now = datetime.utcnow()
+    return BookResponse(**{
+        "id": book_id,
+        "user_id": "u1",
+        "child_name": "Mia",
+        "theme": "space",
+        "style": "pixar_3d",
+        "status": BookStatus.WAITING_FOR_APPROVAL,
+        "created_at": now,
+        "updated_at": now,
+        **fields,
+    })
+
+
+def test_read_through_returns_copies():
+    cache = make_cache()
+    cache.put("b1", make_book(), cache.version("b1"))
+
+    cached = cache.get("b1")
+    assert cached.child_name == "Mia"
+    cached.child_name = "changed"
+    assert cache.get("b1").child_name == "Mia"
+    assert cache.hits == 2
+
+
+def test_miss_for_unknown_book():
+    cache = make_cache()
+    assert cache.get("missing") is None
+    assert cache.misses == 1
+
+
+def test_invalidate_drops_the_entry():
+    cache = make_cache()
+    cache.put("b1", make_book(), cache.version("b1"))
+    cache.invalidate("b1")
+    assert cache.get("b1") is None
+    assert cache.invalidations == 1
+
+
+def test_read_that_raced_a_write_is_not_cached():
+    cache = make_cache()
+    version = cache.version("b1")  # reader starts
+    cache.invalidate("b1")  # a write lands while Firestore is being read
+    cache.put("b1", make_book(), version)
+    assert cache.get("b1") is None
+
+    cache.put("b1", make_book(), cache.version("b1"))
+    assert cache.get("b1") is not None
+
+
+def test_patch_updates_the_cached_copy_and_bumps_the_version():
+    cache = make_cache()
+    version = cache.version("b1")
+    cache.put("b1", make_book(), version)
+
+    cache.patch("b1", status=BookStatus.GENERATING_PREVIEW, progress=40)
+    cached = cache.get("b1")
+    assert cached.status == BookStatus.GENERATING_PREVIEW
+    assert cached.progress == 40
+    assert cache.version("b1") == version + 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = make_cache(book_cache_ttl_seconds=0)
+    cache.put("b1", make_book(), cache.version("b1"))
+    assert cache.get("b1") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(book_cache_max_entries=2)
+    for book_id in ("b1", "b2"):
+        cache.put(book_id, make_book(book_id), cache.version(book_id))
+    cache.get("b1")  # b2 is now least recently used
+    cache.put("b3", make_book("b3"), cache.version("b3"))
+
+    assert cache.get("b2") is None
+    assert cache.get("b1") is not None
+    assert cache.get("b3") is not None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = make_cache(book_cache_enabled=False)
+    cache.put("b1", make_book(), cache.version("b1"))
+    assert cache.get("b1") is None
@@ -0,0 +1,139 @@
+"""Lease, retry and idempotency rules of the job backends (memory and SQLite)."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.jobs.queue import (
+    Job,
+    JobStatus,
+    InMemoryJobBackend,
+    SQLiteJobBackend,
+    JOB_PRIORITY_LOW,
+    JOB_PRIORITY_NORMAL,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteJobBackend(str(tmp_path / "jobs.db"))
+    return InMemoryJobBackend()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_lease_serves_higher_priority_first(backend):
+    run(backend.enqueue(Job(name="speculate", payload={}, priority=JOB_PRIORITY_LOW, available_at=1)))
+    run(backend.enqueue(Job(name="complete", payload={}, priority=JOB_PRIORITY_NORMAL, available_at=2)))
+
+    job = run(backend.lease("w1", 60))
+    assert job.name == "complete"
+    assert job.status == JobStatus.LEASED.value
+    assert job.attempts == 1
+
+
+def test_lease_serves_oldest_first_within_priority(backend):
+    run(backend.enqueue(Job(name="newer", payload={}, available_at=2)))
+    run(backend.enqueue(Job(name="older", payload={}, available_at=1)))
+
+    assert run(backend.lease("w1", 60)).name == "older"
+    assert run(backend.lease("w1", 60)).name == "newer"
+    assert run(backend.lease("w1", 60)) is None
+
+
+def test_future_jobs_are_not_leased(backend):
+    run(backend.enqueue(Job(name="later", payload={}, available_at=time.time() + 3600)))
+    assert run(backend.lease("w1", 60)) is None
+
+
+def test_idempotency_key_dedups_live_jobs(backend):
+    first, created = run(backend.enqueue(Job(name="preview", payload={}, idempotency_key="preview:b1")))
+    assert created
+
+    duplicate, created = run(backend.enqueue(Job(name="preview", payload={}, idempotency_key="preview:b1")))
+    assert not created
+    assert duplicate.id == first.id
+
+    other, created = run(backend.enqueue(Job(name="preview", payload={}, idempotency_key="preview:b2")))
+    assert created
+    assert other.id != first.id
+
+
+def test_dead_job_does_not_block_its_key(backend):
+    job, _ = run(backend.enqueue(Job(name="preview", payload={}, idempotency_key="k", max_attempts=1)))
+    run(backend.lease("w1", 60))
+    run(backend.fail(job.id, "w1", "boom", None))
+    assert run(backend.get(job.id)).status == JobStatus.DEAD.value
+
+    retry, created = run(backend.enqueue(Job(name="preview", payload={}, idempotency_key="k")))
+    assert created
+    assert retry.id != job.id
+
+
+def test_failed_job_is_requeued_until_retry_at(backend):
+    job, _ = run(backend.enqueue(Job(name="preview", payload={})))
+    run(backend.lease("w1", 60))
+    run(backend.fail(job.id, "w1", "boom", time.time() + 3600))
+
+    stored = run(backend.get(job.id))
+    assert stored.status == JobStatus.QUEUED.value
+    assert stored.last_error == "boom"
+    assert stored.lease_owner is None
+    assert run(backend.lease("w1", 60)) is None
+
+
+def test_expired_lease_is_leased_again(backend):
+    job, _ = run(backend.enqueue(Job(name="preview", payload={}, max_attempts=3)))
+    run(backend.lease("w1", -1))  # worker died: lease already expired
+
+    again = run(backend.lease("w2", 60))
+    assert again.id == job.id
+    assert again.lease_owner == "w2"
+    assert again.attempts == 2
+
+
+def test_expired_lease_on_final_attempt_is_buried(backend):
+    job, _ = run(backend.enqueue(Job(name="poison", payload={}, max_attempts=2)))
+    run(backend.lease("w1", -1))
+    run(backend.lease("w2", -1))  # second (final) attempt dies too
+
+    assert run(backend.lease("w3", 60)) is None
+    stored = run(backend.get(job.id))
+    assert stored.status == JobStatus.DEAD.value
+    assert stored.attempts == 2
+    assert "lease expired" in stored.last_error
+
+
+def test_only_the_owner_can_heartbeat_and_complete(backend):
+    job, _ = run(backend.enqueue(Job(name="preview", payload={})))
+    run(backend.lease("w1", 60))
+
+    assert not run(backend.heartbeat(job.id, "w2", 60))
+    assert run(backend.heartbeat(job.id, "w1", 60))
+
+    run(backend.complete(job.id, "w2"))
+    assert run(backend.get(job.id)).status == JobStatus.LEASED.value
+    run(backend.complete(job.id, "w1"))
+    assert run(backend.get(job.id)).status == JobStatus.SUCCEEDED.value
+
+
+def test_job_is_leasable():
+    now = 100.0
+    assert Job(name="j", payload={}, available_at=now).is_leasable(now)
+    assert not Job(name="j", payload={}, available_at=now + 1).is_leasable(now)
+
+    expired = Job(name="j", payload={}, status=JobStatus.LEASED.value, lease_expires_at=now - 1, attempts=1)
+    assert expired.is_leasable(now)
+    assert not expired.is_exhausted(now)
+
+    expired.attempts = expired.max_attempts
+    assert not expired.is_leasable(now)
+    assert expired.is_exhausted(now)
+
+    running = Job(name="j", payload={}, status=JobStatus.LEASED.value, lease_expires_at=now + 1)
+    assert not running.is_leasable(now)
+    assert not Job(name="j", payload={}, status=JobStatus.SUCCEEDED.value).is_leasable(now)
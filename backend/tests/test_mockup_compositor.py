@@ -0,0 +1,87 @@
+"""Page geometry and compositing of the local mockup compositor."""
+
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.engines import mockup_compositor
+from app.engines.mockup_compositor import compose_mockup, get_template, perspective_coeffs
+
+
+def apply_coeffs(coeffs, x: float, y: float) -> tuple[float, float]:
+    """PIL's PERSPECTIVE transform: output pixel (x, y) samples input (u, v)."""
+    a, b, c, d, e, f, g, h = coeffs
+    w = g * x + h * y + 1
+    return (a * x + b * y + c) / w, (d * x + e * y + f) / w
+
+
+def test_rectangle_onto_itself_is_the_identity():
+    coeffs = perspective_coeffs([(0, 0), (0, 100), (200, 100), (200, 0)], 200, 100)
+    assert np.allclose(coeffs, (1, 0, 0, 0, 1, 0, 0, 0), atol=1e-9)
+
+
+def test_quad_corners_map_onto_image_corners():
+    quad = [(12, 30), (5, 410), (380, 440), (400, 8)]
+    width, height = 300, 400
+    coeffs = perspective_coeffs(quad, width, height)
+
+    corners = [(0, 0), (0, height), (width, height), (width, 0)]
+    for (x, y), expected in zip(quad, corners):
+        assert np.allclose(apply_coeffs(coeffs, x, y), expected, atol=1e-6)
+
+
+@pytest.fixture
+def templates(tmp_path, monkeypatch):
+    """Blank white templates in place of the photo assets."""
+    for name, size in (("open_book_clean.png", (1024, 576)), ("cover_template.jpg", (1024, 1024))):
+        Image.new("RGB", size, "white").save(tmp_path / name)
+    monkeypatch.setattr(mockup_compositor, "ASSETS_DIR", tmp_path)
+    monkeypatch.setattr(mockup_compositor, "_templates", {})
+    return tmp_path
+
+
+def scene_bytes(color: str = "red") -> bytes:
+    output = BytesIO()
+    Image.new("RGB", (1024, 1024), color).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_template_geometry_is_computed_once(templates):
+    template = get_template("open_book_clean.png")
+    assert get_template("open_book_clean.png") is template
+
+    # Right page of open_book_clean.png (see MockupEngineV2.PLACEMENTS)
+    assert template.origin == (540, 25)
+    assert template.box_size == (450, 520)
+    assert template.scene_size == (450, 520)
+    assert template.mask.size == template.box_size
+    assert template.text_box == (32, 25, 450, 520)
+
+
+def test_scene_lands_on_the_page_only(templates):
+    result = Image.open(BytesIO(compose_mockup(scene_bytes("red"), 13)))
+    assert result.size == (1024, 576)
+
+    r, g, b = result.getpixel((540 + 225, 25 + 260))  # middle of the right page
+    assert r > 200 and g < 60 and b < 60
+    r, g, b = result.getpixel((1010, 560))  # outside the page
+    assert min(r, g, b) > 240
+
+
+def test_story_text_is_printed_on_the_left_page(templates):
+    plain = np.asarray(Image.open(BytesIO(compose_mockup(scene_bytes(), 13))).convert("L"))
+    printed = np.asarray(Image.open(BytesIO(compose_mockup(scene_bytes(), 13, "Once upon a time " * 10))).convert("L"))
+
+    left_page = (slice(25, 545), slice(32, 482))
+    assert printed[left_page].min() < 100
+    assert plain[left_page].min() > 200
+
+
+def test_cover_has_no_text_box(templates):
+    template = get_template("cover_template.jpg")
+    assert template.text_box is None
+    result = Image.open(BytesIO(compose_mockup(scene_bytes("blue"), 0, "ignored")))
+    r, g, b = result.getpixel((270 + 240, 200 + 300))
+    assert b > 200 and r < 60
@@ -0,0 +1,106 @@
+"""Token bucket grants, per-tenant fairness and priorities of the provider rate limiter."""
+
+import asyncio
+import time
+
+from app.services.rate_limiter import PRIORITY_LOW, PRIORITY_NORMAL, TokenBucketLimiter
+
+
+async def _acquire_in_order(limiter: TokenBucketLimiter, callers: list[tuple[str, str, int]]) -> list[str]:
+    """Queue (label, tenant, priority) callers in list order; returns labels in grant order."""
+    granted = []
+
+    async def call(label: str, tenant: str, priority: int):
+        await limiter.acquire(tenant, priority)
+        granted.append(label)
+
+    tasks = []
+    for label, tenant, priority in callers:
+        tasks.append(asyncio.create_task(call(label, tenant, priority)))
+        await asyncio.sleep(0)  # enqueue in this order
+    await asyncio.gather(*tasks)
+    return granted
+
+
+def test_unlimited_limiter_never_waits():
+    async def main():
+        limiter = TokenBucketLimiter("test", requests_per_minute=0)
+        for _ in range(100):
+            await limiter.acquire("book")
+        return limiter
+
+    limiter = asyncio.run(main())
+    assert limiter.granted == 100
+    assert limiter.throttled == 0
+
+
+def test_burst_is_granted_immediately_then_throttled():
+    async def main():
+        limiter = TokenBucketLimiter("test", requests_per_minute=600, burst=3)  # one token per 0.1 s
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire("book")
+        burst_seconds = time.monotonic() - started
+        await limiter.acquire("book")
+        return limiter, burst_seconds, time.monotonic() - started
+
+    limiter, burst_seconds, total_seconds = asyncio.run(main())
+    assert burst_seconds < 0.05
+    assert total_seconds >= 0.08
+    assert limiter.granted == 4
+    assert limiter.throttled == 1
+
+
+def test_waiters_are_served_round_robin_per_tenant():
+    async def main():
+        limiter = TokenBucketLimiter("test", requests_per_minute=1200, burst=1)
+        await limiter.acquire("warmup")  # drain the bucket
+        return await _acquire_in_order(limiter, [
+            ("a1", "book-a", PRIORITY_NORMAL),
+            ("a2", "book-a", PRIORITY_NORMAL),
+            ("a3", "book-a", PRIORITY_NORMAL),
+            ("b1", "book-b", PRIORITY_NORMAL),
+        ])
+
+    # A large book does not make the next one wait for all of its calls
+    assert asyncio.run(main()) == ["a1", "b1", "a2", "a3"]
+
+
+def test_low_priority_waits_for_normal_priority():
+    async def main():
+        limiter = TokenBucketLimiter("test", requests_per_minute=1200, burst=1)
+        await limiter.acquire("warmup")
+        return await _acquire_in_order(limiter, [
+            ("speculative", "book-a", PRIORITY_LOW),
+            ("paid", "book-b", PRIORITY_NORMAL),
+        ])
+
+    assert asyncio.run(main()) == ["paid", "speculative"]
+
+
+def test_cancelled_waiter_does_not_consume_a_token():
+    async def main():
+        limiter = TokenBucketLimiter("test", requests_per_minute=1200, burst=1)
+        await limiter.acquire("warmup")
+        abandoned = asyncio.create_task(limiter.acquire("book-a"))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await limiter.acquire("book-b")
+        return limiter
+
+    limiter = asyncio.run(main())
+    assert limiter.granted == 2
+    assert limiter.queue_depth == 0
+
+
+def test_penalize_pauses_callers():
+    async def main():
+        limiter = TokenBucketLimiter("test", requests_per_minute=6000, burst=5)
+        limiter.penalize(0.2)
+        started = time.monotonic()
+        await limiter.acquire("book")
+        return limiter, time.monotonic() - started
+
+    limiter, waited = asyncio.run(main())
+    assert waited >= 0.15
+    assert limiter.penalties == 1
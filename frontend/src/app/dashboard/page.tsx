@@ -10,7 +10,7 @@ import { useSearchParams, useRouter } from 'next/navigation';
 import Link from 'next/link';
 import Image from 'next/image';
 import confetti from 'canvas-confetti';
-import { getMyBooks, getBookStatus, BookDetails } from '@/lib/api';
+import { getMyBooks, getBookStatus, BookSummary } from '@/lib/api';
 
 function DashboardContent() {
     const searchParams = useSearchParams();
@@ -18,8 +18,10 @@ function DashboardContent() {
     const paymentSuccess = searchParams.get('payment_success') === 'true';
     const highlightBookId = searchParams.get('book_id');
 
-    const [books, setBooks] = useState<BookDetails[]>([]);
+    const [books, setBooks] = useState<BookSummary[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [userId, setUserId] = useState<string | null>(null);
 
     // Initial load
@@ -31,7 +33,8 @@ function DashboardContent() {
         const fetchBooks = async () => {
             try {
                 const data = await getMyBooks(storedUserId);
-                setBooks(data);
+                setBooks(data.books);
+                setNextCursor(data.next_cursor);
             } catch (error) {
                 console.error('Error fetching books:', error);
             } finally {
@@ -58,6 +61,20 @@ function DashboardContent() {
         }
     }, [paymentSuccess, router]);
 
+    const loadMore = async () => {
+        if (!userId || !nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const data = await getMyBooks(userId, nextCursor);
+            setBooks(prev => [...prev, ...data.books]);
+            setNextCursor(data.next_cursor);
+        } catch (error) {
+            console.error('Error fetching books:', error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     // Polling for processing books
     useEffect(() => {
         const processingBooks = books.filter(b =>
@@ -126,9 +143,9 @@ function DashboardContent() {
                         <div key={book.id} className={`card-magical p-6 flex flex-col h-full transition-all duration-500 ${highlightBookId === book.id && paymentSuccess ? 'ring-4 ring-purple-400 scale-[1.02]' : ''}`}>
                             {/* Book Preview Image */}
                             <div className="aspect-[4/5] rounded-2xl bg-gray-50 mb-6 overflow-hidden relative group">
-                                {book.preview_images && book.preview_images.length > 0 ? (
+                                {book.cover_image_url ? (
                                     <img
-                                        src={book.preview_images[0]}
+                                        src={book.cover_image_url}
                                         alt={book.child_name}
                                         className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-700"
                                     />
@@ -200,6 +217,14 @@ function DashboardContent() {
                     ))}
                 </div>
             )}
+
+            {nextCursor && (
+                <div className="text-center mt-12">
+                    <button onClick={loadMore} disabled={loadingMore} className="btn-primary px-8 py-3">
+                        {loadingMore ? 'Lade...' : 'Mehr laden'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 }
@@ -9,7 +9,8 @@ import { useEffect, useState } from 'react';
 import { useRouter, useParams } from 'next/navigation';
 import Link from 'next/link';
 import Image from 'next/image';
-import { getBookDetails, getBookStatus, createCheckoutSession } from '@/lib/api';
+import { getBookDetails, getBookStatus, createCheckoutSession, PreviewScene } from '@/lib/api';
+import SceneImage from '@/components/SceneImage';
 
 interface BookData {
     id: string;
@@ -17,12 +18,7 @@ interface BookData {
     theme: string;
     status: string;
     preview_images?: string[];
-    preview_scenes?: Array<{
-        scene_id: number;
-        status: 'locked' | 'unlocked' | 'generating';
-        image_url?: string;
-        thumbnail_url?: string;
-    }>;
+    preview_scenes?: PreviewScene[];
     pdf_url?: string;
     pages?: Array<{
         page_number: number;
@@ -189,8 +185,10 @@ export default function PreviewPage() {
                                         >
                                             <div className="aspect-[3/4] rounded-xl overflow-hidden bg-gray-50 relative">
                                                 {imageUrl ? (
-                                                    <img
+                                                    <SceneImage
                                                         src={imageUrl}
+                                                        derivatives={sceneData?.image_url ? sceneData.derivatives : undefined}
+                                                        sizes="(min-width: 1024px) 35vw, (min-width: 768px) 50vw, 100vw"
                                                         alt={`Preview Scene ${sceneId}`}
                                                         className="w-full h-full object-cover"
                                                     />
@@ -3,6 +3,7 @@
 import { useEffect, useState } from 'react';
 import { BookStatus, PreviewScene } from '@/lib/api';
 import { motion, AnimatePresence } from 'framer-motion';
+import SceneImage from '@/components/SceneImage';
 
 interface LoadingScreenProps {
     status: BookStatus | null;
@@ -221,8 +222,10 @@ export default function LoadingScreen({ status }: LoadingScreenProps) {
                                         style={{ transform: 'rotateY(180deg)', backfaceVisibility: 'hidden' }}
                                     >
                                         {isReady && (
-                                            <img
+                                            <SceneImage
                                                 src={sceneData?.image_url!}
+                                                derivatives={sceneData?.derivatives}
+                                                sizes="160px"
                                                 alt={`Preview ${sceneId}`}
                                                 className="w-full h-full object-cover"
                                             />
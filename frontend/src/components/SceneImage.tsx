@@ -0,0 +1,39 @@
+"use client";
+
+import { ImageDerivatives } from "@/lib/api";
+
+interface SceneImageProps {
+    src: string;
+    alt: string;
+    derivatives?: ImageDerivatives;
+    sizes?: string; // rendered width, e.g. "(min-width: 768px) 40vw, 100vw"
+    className?: string;
+}
+
+/**
+ * Preview image that lets the browser pick the smallest sufficient
+ * derivative (WebP, JPEG fallback). Falls back to `src` for images stored
+ * before derivatives existed.
+ */
+export default function SceneImage({ src, alt, derivatives, sizes = "100vw", className = "" }: SceneImageProps) {
+    if (!derivatives) {
+        return <img src={src} alt={alt} className={className} loading="lazy" />;
+    }
+
+    const variants = [derivatives.thumb, derivatives.medium, derivatives.full];
+    const srcSet = (format: "webp" | "jpeg") => variants.map(v => `${v[format]} ${v.width}w`).join(", ");
+
+    return (
+        <picture>
+            <source type="image/webp" srcSet={srcSet("webp")} sizes={sizes} />
+            <img
+                src={derivatives.medium.jpeg}
+                srcSet={srcSet("jpeg")}
+                sizes={sizes}
+                alt={alt}
+                className={className}
+                loading="lazy"
+            />
+        </picture>
+    );
+}
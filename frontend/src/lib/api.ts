@@ -23,11 +23,24 @@ export interface BookCreateResponse {
     preview_images?: string[];
 }
 
+export interface ImageVariant {
+    width: number;
+    webp: string;
+    jpeg: string;
+}
+
+export interface ImageDerivatives {
+    thumb: ImageVariant;
+    medium: ImageVariant;
+    full: ImageVariant;
+}
+
 export interface PreviewScene {
     scene_id: number;
     status: 'locked' | 'unlocked' | 'generating';
     image_url?: string;
     thumbnail_url?: string;
+    derivatives?: ImageDerivatives;
 }
 
 export interface BookStatus {
@@ -54,16 +67,28 @@ export interface BookDetails {
     }>;
     pdf_url?: string;
     preview_images?: string[];
-    preview_scenes?: Array<{
-        scene_id: number;
-        status: 'locked' | 'unlocked' | 'generating';
-        image_url?: string;
-        thumbnail_url?: string;
-    }>;
+    preview_scenes?: PreviewScene[];
     created_at: string;
     updated_at: string;
 }
 
+export interface BookSummary {
+    id: string;
+    child_name: string;
+    theme: string;
+    status: string;
+    progress: number;
+    cover_image_url?: string;
+    pdf_url?: string;
+    created_at: string;
+    updated_at: string;
+}
+
+export interface BookList {
+    books: BookSummary[];
+    next_cursor: string | null;
+}
+
 /**
  * Create a new personalized book
  */
@@ -174,15 +199,18 @@ export async function getBookStatus(bookId: string): Promise<BookStatus> {
 }
 
 /**
- * Get all books for a specific user
+ * Get one page of a user's books (newest first).
+ * Pass the previous page's next_cursor to continue.
  */
-export async function getMyBooks(userId: string): Promise<BookDetails[]> {
-    const response = await fetch(`${API_BASE}/api/books/user/${userId}`);
+export async function getMyBooks(userId: string, startAfter?: string | null, limit = 24): Promise<BookList> {
+    const params = new URLSearchParams({ user_id: userId, limit: String(limit) });
+    if (startAfter) params.set('start_after', startAfter);
+    const response = await fetch(`${API_BASE}/api/books/my-books?${params}`);
 
     if (!response.ok) {
         // Fallback for demo or if endpoint doesn't exist yet
         console.warn('âŒ Failed to fetch user books, using empty list');
-        return [];
+        return { books: [], next_cursor: null };
     }
 
     return response.json();